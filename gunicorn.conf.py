@@ -0,0 +1,170 @@
+"""
+Configuración de gunicorn para los tres arranques del sitio: start.sh,
+impaorg.service y docker/Dockerfile (todos corren `gunicorn -c gunicorn.conf.py`).
+
+Todo se puede cambiar por variables de entorno (.env o Environment= del servicio):
+
+- GUNICORN_WORKER_CLASS: gthread (por defecto), sync, gevent o uvicorn (ASGI,
+  sirve impa_site.asgi; ver "Modo ASGI" en el README).
+- GUNICORN_WORKERS / GUNICORN_THREADS: si no se fijan, se calculan con los CPU
+  y la memoria disponibles (ver calcular_workers).
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER: reciclado de workers.
+- GUNICORN_TIMEOUT / GUNICORN_KEEPALIVE: deben acompañar a los timeouts de Nginx
+  (nginx/imparg.org.conf).
+- GUNICORN_PRELOAD=0: no precargar la app en el master.
+"""
+import os
+from pathlib import Path
+
+# gunicorn lee esta configuración antes de cargar Django: las GUNICORN_* de .env se
+# cargan acá (como en settings/base.py, sin pisar las que ya vienen en el entorno)
+_ENV_FILE = Path(__file__).resolve().parent / ".env"
+if _ENV_FILE.exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(_ENV_FILE)
+
+# Memoria que ocupa un worker con el sitio cargado (MB), y la que se deja libre
+# para el master, MySQL y el sistema. Con preload parte de la memoria de cada
+# worker es compartida con el master, así que el número es conservador.
+MB_POR_WORKER = int(os.environ.get("GUNICORN_WORKER_MEMORY_MB", 200))
+MB_RESERVADOS = int(os.environ.get("GUNICORN_RESERVED_MEMORY_MB", 512))
+MAX_WORKERS = int(os.environ.get("GUNICORN_MAX_WORKERS", 8))
+
+CLASES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "gevent": "gevent",
+    "uvicorn": "uvicorn_worker.UvicornWorker",
+}
+
+
+def _env_bool(nombre, default):
+    valor = os.environ.get(nombre)
+    if valor is None or valor == "":
+        return default
+    return valor.strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+def cpus_disponibles():
+    """CPUs que puede usar el proceso (respeta taskset y el límite de cgroup de Docker)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        cuota, periodo = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if cuota != "max":
+            cpus = min(cpus, max(1, int(int(cuota) / int(periodo))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def memoria_disponible_mb():
+    """Memoria física en MB (o el límite de cgroup si es menor). None si no se puede leer."""
+    try:
+        total = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        total = None
+    try:
+        limite = Path("/sys/fs/cgroup/memory.max").read_text().strip()
+        if limite != "max":
+            total = min(total or int(limite), int(limite))
+    except (OSError, ValueError):
+        pass
+    return total // (1024 * 1024) if total else None
+
+
+def calcular_workers(cpus, memoria_mb, clase="gthread"):
+    """
+    Cantidad de workers: 2 * CPU + 1 para sync; CPU + 1 para gthread, gevent y
+    uvicorn, que atienden varios requests por worker. Nunca más de lo que entra en
+    memoria ni más de MAX_WORKERS.
+    """
+    por_cpu = 2 * cpus + 1 if clase == "sync" else cpus + 1
+    workers = min(por_cpu, MAX_WORKERS)
+    if memoria_mb:
+        workers = min(workers, (memoria_mb - MB_RESERVADOS) // MB_POR_WORKER)
+    return max(1, workers)
+
+
+_clase = os.environ.get("GUNICORN_WORKER_CLASS", "gthread").strip().lower()
+worker_class = CLASES.get(_clase, _clase)
+
+wsgi_app = os.environ.get(
+    "GUNICORN_APP",
+    "impa_site.asgi:application" if _clase == "uvicorn" else "impa_site.wsgi:application",
+)
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', '5010')}")
+
+workers = int(os.environ.get("GUNICORN_WORKERS") or calcular_workers(cpus_disponibles(), memoria_disponible_mb(), _clase))
+# Solo gthread usa threads; para gevent, conexiones simultáneas por worker
+threads = int(os.environ.get("GUNICORN_THREADS", 4)) if _clase == "gthread" else 1
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 200))
+
+# Cargar Django en el master antes del fork: los workers comparten esa memoria
+# (copy-on-write) y arrancan más rápido. Con gevent no: el monkey-patching tiene
+# que ocurrir antes de importar la app, y eso pasa en cada worker.
+preload_app = _env_bool("GUNICORN_PRELOAD", _clase != "gevent")
+
+# Reciclar cada worker después de N requests (con jitter para que no se
+# reinicien todos a la vez): acota el crecimiento de memoria por fragmentación o
+# cachés en proceso (LocMem de renditions).
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+# Timeouts alineados con Nginx: el request que tarda más de `timeout` se corta acá,
+# antes que el proxy_read_timeout de Nginx (90 s en imparg.org.conf, 120 s en el
+# proxy). keepalive tiene que ser mayor que el keepalive_timeout del upstream en
+# Nginx (60 s) para que gunicorn no cierre una conexión que Nginx está por
+# reutilizar (eso da 502 intermitentes).
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 65))
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG") or None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+# /tmp puede estar en disco en la VM; /dev/shm evita que el heartbeat se trabe
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        # Cargar en el master lo que cada worker cargaría en su primer request (URLs,
+        # hooks de Wagtail, Site, tabla de redirects y URLs de páginas): los workers
+        # nuevos, también los reciclados, ya lo tienen
+        from django.urls import get_resolver
+        from wagtail import hooks
+
+        from home import cache_deps, sitios, urls_paginas
+        from home.redirects import tabla
+        from home.render_cache import DEP_RENDER
+
+        get_resolver().reverse_dict
+        hooks.search_for_hooks()
+        sitios.mapa.vigente()
+        tabla.vigente()
+        urls_paginas.tabla.vigente()
+        # El deploy puede traer templates de bloques nuevos: los bodies se renderizan de nuevo
+        cache_deps.bump(DEP_RENDER)
+    server.log.info(
+        "IMPA: %s workers %s (threads=%s, preload=%s, max_requests=%s±%s) en %s",
+        server.cfg.workers,
+        server.cfg.worker_class_str,
+        server.cfg.threads,
+        server.cfg.preload_app,
+        server.cfg.max_requests,
+        server.cfg.max_requests_jitter,
+        ",".join(server.cfg.bind),
+    )
+
+
+def post_fork(server, worker):
+    # Con preload, una conexión a la base abierta en el master quedaría compartida
+    # entre todos los workers: cerrarla para que cada uno abra la suya.
+    if server.cfg.preload_app:
+        from django.db import connections
+
+        connections.close_all()
@@ -0,0 +1,272 @@
+"""
+API JSON de solo lectura para la intranet, el mapa y apps externas (/api/v1/...).
+
+  /api/v1/churches/?provincia=Neuquén&campos=id,titulo,url&limite=50&desde=123
+  /api/v1/noticias/?campos=id,titulo,fecha,url&desde=2026-03-10.245
+  /api/v1/radios/
+
+- campos: solo esas claves en cada resultado (las disponibles, en CAMPOS_*).
+- limite y desde: paginación por cursor; "next" trae la URL de la página siguiente.
+- Las filas salen de .values() (sin instanciar páginas ni .specific).
+- La respuesta se guarda en la caché con la versión de sus dependencias en la clave
+  (home.cache_deps): al publicar se sube la versión y la siguiente consulta se arma
+  de nuevo. Con If-None-Match igual al ETag se responde 304 sin cuerpo.
+"""
+import hashlib
+import json
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, QueryDict
+from django.utils.html import strip_tags
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+from wagtail.models import Site
+
+from home import cache_deps
+from home.models import IglesiaPage, NoticiaPage, RadioPage, _parse_cursor_noticia
+from home.signals import DEP_NOTICIAS, DEP_PAGINAS
+from home.urls_paginas import url_publica
+
+API_CACHE_SECONDS = 600
+# Lo que pueden guardar la respuesta navegadores y proxies (después revalidan con el ETag)
+API_MAX_AGE = 60
+LIMITE = 50
+MAX_LIMITE = 200
+# Estado de Icecast (oyentes, tema): no depende de publicar, se refresca por tiempo
+RADIOS_EN_VIVO_SECONDS = 30
+
+CAMPOS_IGLESIAS = (
+    "id",
+    "titulo",
+    "nombre",
+    "direccion",
+    "ciudad",
+    "provincia",
+    "latitud",
+    "longitud",
+    "mapa_url",
+    "pastor_nombre",
+    "pastor_email",
+    "pastor_telefono",
+    "url",
+)
+CAMPOS_NOTICIAS = ("id", "titulo", "fecha", "autor", "intro", "url")
+CAMPOS_RADIOS = ("id", "titulo", "stream_url", "url")
+
+# Parámetros que entiende cada recurso: solo estos entran en la clave de la caché y en "next"
+PARAMETROS_IGLESIAS = ("campos", "limite", "desde", "provincia", "ciudad")
+PARAMETROS_NOTICIAS = ("campos", "limite", "desde")
+PARAMETROS_RADIOS = ("campos",)
+
+
+class ErrorApi(Exception):
+    """Parámetro inválido: se responde 400 con el mensaje."""
+
+
+def _campos(request, disponibles):
+    pedido = request.GET.get("campos")
+    if not pedido:
+        return list(disponibles)
+    campos = [c.strip() for c in pedido.split(",") if c.strip()]
+    desconocidos = [c for c in campos if c not in disponibles]
+    if desconocidos:
+        raise ErrorApi(f"Campos desconocidos: {', '.join(desconocidos)}. Disponibles: {', '.join(disponibles)}")
+    return campos
+
+
+def _limite(request):
+    try:
+        return max(1, min(int(request.GET.get("limite", LIMITE)), MAX_LIMITE))
+    except ValueError:
+        raise ErrorApi("limite debe ser un número")
+
+
+def _parametros(request, nombres):
+    """Los parámetros reconocidos que vinieron (como los lee armar_*: el último valor)."""
+    return {n: request.GET[n].strip() for n in nombres if request.GET.get(n, "").strip()}
+
+
+def _normalizados(parametros):
+    """Misma forma para consultas equivalentes: ' Neuquén' = 'neuquén', 'id, url' = 'id,url'."""
+    normalizados = dict(parametros)
+    if "campos" in normalizados:
+        normalizados["campos"] = ",".join(c.strip() for c in normalizados["campos"].split(",") if c.strip())
+    for filtro in ("provincia", "ciudad"):
+        if filtro in normalizados:
+            normalizados[filtro] = normalizados[filtro].lower()  # se filtran con iexact
+    return normalizados
+
+
+def _siguiente(request, cursor, nombres):
+    if cursor is None:
+        return None
+    params = QueryDict(mutable=True)
+    params.update(_parametros(request, nombres))
+    params["desde"] = cursor
+    return f"{request.path}?{params.urlencode()}"
+
+
+def _recortar(filas, campos):
+    return [{c: fila[c] for c in campos} for fila in filas]
+
+
+# ---------- Filas ----------
+def _fila_iglesia(v, raices):
+    # Email y teléfono del pastor solo si la iglesia eligió mostrarlos (como en la ficha)
+    publico = v["mostrar_contacto_publicamente"]
+    return {
+        "id": v["pk"],
+        "titulo": v["title"],
+        "nombre": v["nombre"],
+        "direccion": v["direccion"],
+        "ciudad": v["ciudad"],
+        "provincia": v["provincia"],
+        "latitud": float(v["latitud"]) if v["latitud"] is not None else None,
+        "longitud": float(v["longitud"]) if v["longitud"] is not None else None,
+        "mapa_url": v["mapa_url"],
+        "pastor_nombre": v["pastor_nombre"],
+        "pastor_email": v["pastor_email"] if publico else "",
+        "pastor_telefono": v["pastor_telefono"] if publico else "",
+        "url": url_publica(v["url_path"], raices),
+    }
+
+
+def armar_iglesias(request):
+    campos = _campos(request, CAMPOS_IGLESIAS)
+    limite = _limite(request)
+    qs = IglesiaPage.objects.live().values(
+        "pk", "title", "url_path", "mostrar_contacto_publicamente", *CAMPOS_IGLESIAS[2:-1]
+    )
+    for filtro in ("provincia", "ciudad"):
+        if request.GET.get(filtro):
+            qs = qs.filter(**{f"{filtro}__iexact": request.GET[filtro].strip()})
+    if request.GET.get("desde"):
+        try:
+            qs = qs.filter(pk__gt=int(request.GET["desde"]))
+        except ValueError:
+            raise ErrorApi("desde debe ser un id")
+    valores = list(qs.order_by("pk")[: limite + 1])
+    cursor = str(valores[limite - 1]["pk"]) if len(valores) > limite else None
+    raices = Site.get_site_root_paths()
+    filas = [_fila_iglesia(v, raices) for v in valores[:limite]]
+    return {"results": _recortar(filas, campos), "next": _siguiente(request, cursor, PARAMETROS_IGLESIAS)}
+
+
+def armar_noticias(request):
+    campos = _campos(request, CAMPOS_NOTICIAS)
+    limite = _limite(request)
+    qs = NoticiaPage.objects.live().values("pk", "title", "url_path", "date", "autor", "intro")
+    if request.GET.get("desde"):
+        desde = _parse_cursor_noticia(request.GET["desde"])
+        if not desde:
+            raise ErrorApi("desde debe ser un cursor fecha.id (ej. 2026-03-10.245)")
+        fecha, pk = desde
+        qs = qs.filter(Q(date__lt=fecha) | Q(date=fecha, pk__lt=pk))
+    valores = list(qs.order_by("-date", "-pk")[: limite + 1])
+    cursor = None
+    if len(valores) > limite:
+        ultimo = valores[limite - 1]
+        cursor = f"{ultimo['date'].isoformat()}.{ultimo['pk']}"
+    raices = Site.get_site_root_paths()
+    filas = [
+        {
+            "id": v["pk"],
+            "titulo": v["title"],
+            "fecha": v["date"].isoformat(),
+            "autor": v["autor"],
+            "intro": strip_tags(v["intro"]).strip(),
+            "url": url_publica(v["url_path"], raices),
+        }
+        for v in valores[:limite]
+    ]
+    return {"results": _recortar(filas, campos), "next": _siguiente(request, cursor, PARAMETROS_NOTICIAS)}
+
+
+def armar_radios(request, en_vivo):
+    campos = _campos(request, CAMPOS_RADIOS)
+    raices = Site.get_site_root_paths()
+    filas = [
+        {"id": v["pk"], "titulo": v["title"], "stream_url": v["stream_url"], "url": url_publica(v["url_path"], raices)}
+        for v in RadioPage.objects.live().order_by("path").values("pk", "title", "stream_url", "url_path")
+    ]
+    return {"results": _recortar(filas, campos), "en_vivo": en_vivo}
+
+
+# ---------- Respuesta con caché y ETag ----------
+def responder(request, recurso, deps, armar, parametros, variante=""):
+    """
+    JSON de armar(request), cacheado por versión de `deps` y los `parametros` reconocidos
+    (normalizados), con ETag. Los demás parámetros no cambian la respuesta ni la clave:
+    ?x=1, ?x=2... no llenan la caché.
+    """
+    consulta = urlencode(sorted(_normalizados(_parametros(request, parametros)).items()))
+    clave = "api:{}:{}:{}".format(
+        recurso,
+        cache_deps.versions(*deps),
+        hashlib.md5(f"{request.path}?{consulta}|{variante}".encode("utf-8")).hexdigest(),
+    )
+    guardado = cache.get(clave)
+    if guardado is None:
+        try:
+            datos = armar(request)
+        except ErrorApi as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        cuerpo = json.dumps(datos, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        guardado = (cuerpo, f'"{hashlib.md5(cuerpo).hexdigest()}"')
+        cache.set(clave, guardado, API_CACHE_SECONDS)
+    cuerpo, etag = guardado
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(cuerpo, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = f"public, max-age={API_MAX_AGE}"
+    # Datos públicos: los puede leer cualquier sitio (intranet en impa.ar, apps)
+    response["Access-Control-Allow-Origin"] = "*"
+    return response
+
+
+@require_GET
+def iglesias(request):
+    return responder(request, "iglesias", [DEP_PAGINAS], armar_iglesias, PARAMETROS_IGLESIAS)
+
+
+@require_GET
+def noticias(request):
+    return responder(request, "noticias", [DEP_NOTICIAS], armar_noticias, PARAMETROS_NOTICIAS)
+
+
+async def _radios_en_vivo():
+    from home.stream_radios import aobtener_radios_stream
+
+    en_vivo = await cache.aget("api:radios:en_vivo")
+    if en_vivo is None:
+        try:
+            radios = await aobtener_radios_stream(timeout=5)
+        except Exception:
+            radios = []
+        en_vivo = [
+            {
+                "mount": r.mount_point,
+                "nombre": r.nombre_display,
+                "stream_url": r.stream_url,
+                "oyentes": r.listeners_current,
+                "sonando": r.currently_playing,
+            }
+            for r in radios
+        ]
+        await cache.aset("api:radios:en_vivo", en_vivo, RADIOS_EN_VIVO_SECONDS)
+    return en_vivo
+
+
+@require_GET
+async def radios(request):
+    # Icecast se espera sin ocupar un thread (como /radios/estado/); lo demás es sync
+    en_vivo = await _radios_en_vivo()
+    variante = hashlib.md5(json.dumps(en_vivo, sort_keys=True).encode("utf-8")).hexdigest()
+    return await sync_to_async(responder)(
+        request, "radios", [DEP_PAGINAS], lambda r: armar_radios(r, en_vivo), PARAMETROS_RADIOS, variante
+    )
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class HomeConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "home"
+
+    def ready(self):
+        from home import signals  # noqa: F401
+        from home.renditions import instalar_lock_en_renditions
+
+        instalar_lock_en_renditions()
@@ -0,0 +1,228 @@
+"""
+Benchmarks de las páginas principales sobre un sitio sintético (ver el comando
+benchmark_paginas).
+
+construir_sitio() arma en la base actual un sitio con miles de iglesias repartidas
+por provincia, decenas de miles de noticias y la Doctrina completa. Las páginas
+hijas se insertan en lote (sin add_child, que hace varias consultas por página).
+medir_paginas() pide cada página con el cliente de test y mide latencia y cantidad
+de consultas; comparar() contrasta un resultado con otro guardado como referencia.
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.cache import caches
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from wagtail.models import Page, Site
+
+from home.management.commands.load_doctrina_articulos import DOCTRINA_BLOCKS
+from home.models import (
+    ChurchSiteContent,
+    HomePage,
+    IglesiaPage,
+    IglesiasIndexPage,
+    InstitutionalPage,
+    MapaPage,
+    NOTICIAS_POR_PAGINA,
+    NoticiaPage,
+    NoticiasIndexPage,
+    _cursor_noticia,
+)
+
+PROVINCIAS = [
+    "Buenos Aires", "Catamarca", "Chaco", "Chubut", "Córdoba", "Corrientes", "Entre Ríos",
+    "Formosa", "Jujuy", "La Pampa", "La Rioja", "Mendoza", "Misiones", "Neuquén", "Río Negro",
+    "Salta", "San Juan", "San Luis", "Santa Cruz", "Santa Fe", "Santiago del Estero",
+    "Tierra del Fuego", "Tucumán",
+]
+
+PALABRAS = (
+    "iglesia culto oración jóvenes misión pastor encuentro alabanza comunidad convención "
+    "bautismo escuela bíblica retiro ayuno campamento evangelio familia servicio"
+).split()
+
+LOTE = 500
+
+
+def _crear_hijos(parent, objetos):
+    """
+    Inserta páginas hijas de `parent` en lote: primero las filas de Page (bulk_create) y
+    después las de la tabla del modelo específico. Bulk_create no admite herencia
+    multi-tabla, así que la segunda parte usa QuerySet._insert, igual que bulk_create.
+    No dispara señales (ni índice de búsqueda ni reference index).
+    """
+    if not objetos:
+        return
+    modelo = type(objetos[0])
+    ahora = timezone.now()
+    base = parent.get_last_child()
+    paso = Page._str2int(base.path[-Page.steplen:]) if base else 0
+    for i, obj in enumerate(objetos, start=paso + 1):
+        obj.path = Page._get_path(parent.path, parent.depth + 1, i)
+        obj.depth = parent.depth + 1
+        obj.numchild = 0
+        obj.url_path = f"{parent.url_path}{obj.slug}/"
+        obj.draft_title = obj.title
+        obj.locale_id = parent.locale_id
+        obj.live = True
+        obj.first_published_at = obj.last_published_at = ahora
+
+    page_fields = [f for f in Page._meta.concrete_fields if not f.primary_key]
+    hijo_fields = modelo._meta.local_concrete_fields
+    for inicio in range(0, len(objetos), LOTE):
+        lote = objetos[inicio : inicio + LOTE]
+        Page.objects.bulk_create(
+            [Page(**{f.attname: getattr(obj, f.attname) for f in page_fields}) for obj in lote]
+        )
+        # MySQL no devuelve los IDs de bulk_create: buscarlos por path
+        ids = dict(Page.objects.filter(path__in=[o.path for o in lote]).values_list("path", "id"))
+        for obj in lote:
+            obj.page_ptr_id = obj.id = ids[obj.path]
+        modelo.objects._insert(lote, fields=hijo_fields)
+    Page.objects.filter(pk=parent.pk).update(numchild=parent.numchild + len(objetos))
+    parent.numchild += len(objetos)
+
+
+def construir_sitio(iglesias=2000, noticias=20000, micrositios=50, semilla=1):
+    """
+    Crea el sitio sintético bajo la raíz de Wagtail y lo deja como sitio por defecto.
+    Devuelve un dict con las URLs a medir.
+    """
+    rnd = random.Random(semilla)
+    with transaction.atomic():
+        root = Page.get_first_root_node()
+        home = HomePage(title="Inicio", slug="inicio-benchmark")
+        root.add_child(instance=home)
+        Site.objects.update_or_create(
+            is_default_site=True,
+            defaults={"hostname": "localhost", "port": 80, "root_page": home},
+        )
+
+        iglesias_index = IglesiasIndexPage(title="Iglesias", slug="iglesias")
+        noticias_index = NoticiasIndexPage(title="Noticias", slug="noticias")
+        mapa = MapaPage(title="Mapa", slug="mapa")
+        doctrina = InstitutionalPage(title="Doctrina", slug="doctrina", tipo="doctrina", body=DOCTRINA_BLOCKS)
+        for page in (iglesias_index, noticias_index, mapa, doctrina):
+            home.add_child(instance=page)
+
+        _crear_hijos(iglesias_index, [
+            IglesiaPage(
+                title=f"Iglesia {PROVINCIAS[i % len(PROVINCIAS)]} {i}",
+                slug=f"iglesia-{i}",
+                nombre=f"Iglesia {i}",
+                direccion=f"Calle {rnd.randint(1, 3000)}",
+                ciudad=f"Ciudad {i % 300}",
+                provincia=PROVINCIAS[i % len(PROVINCIAS)],
+                pastor_nombre=f"Pastor {i}",
+                latitud=round(rnd.uniform(-54.8, -22.0), 6),
+                longitud=round(rnd.uniform(-73.5, -53.6), 6),
+            )
+            for i in range(iglesias)
+        ])
+
+        hoy = date.today()
+        _crear_hijos(noticias_index, [
+            NoticiaPage(
+                title=" ".join(rnd.sample(PALABRAS, 4)).capitalize() + f" {i}",
+                slug=f"noticia-{i}",
+                date=hoy - timedelta(days=i // 3),
+                autor="Prensa IMPA",
+                intro=" ".join(rnd.choices(PALABRAS, k=30)),
+                body=f"<p>{' '.join(rnd.choices(PALABRAS, k=200))}</p>",
+            )
+            for i in range(noticias)
+        ])
+
+        primeras = IglesiaPage.objects.child_of(iglesias_index).order_by("path")[:micrositios]
+        ChurchSiteContent.objects.bulk_create([
+            ChurchSiteContent(iglesia_page=iglesia, body=f"<p>{' '.join(rnd.choices(PALABRAS, k=150))}</p>")
+            for iglesia in primeras
+        ])
+
+    from search.documents import reconstruir
+
+    reconstruir()
+
+    def ruta(page):
+        return page.url_path[len(home.url_path) - 1 :]
+
+    # Cursor de una página del fondo del listado (las últimas NOTICIAS_POR_PAGINA noticias)
+    profunda = NoticiaPage.objects.child_of(noticias_index).order_by("date", "pk")[NOTICIAS_POR_PAGINA:].first()
+    return {
+        "home": "/",
+        "iglesias": ruta(iglesias_index),
+        "mapa": ruta(mapa),
+        "noticias": ruta(noticias_index),
+        "noticias_profunda": f"{ruta(noticias_index)}?desde={_cursor_noticia(profunda)}" if profunda else "",
+        "doctrina": ruta(doctrina),
+        "busqueda": "/search/?query=iglesia+culto",
+        "micrositio": f"/iglesias/{primeras[0].slug}/sitio/" if micrositios and iglesias else "",
+    }
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def medir(client, url, repeticiones=10):
+    """
+    Pide la URL una vez con las cachés vacías ("frío") y `repeticiones` veces más.
+    Tiempos en milisegundos.
+    """
+    for cache in caches.all():
+        cache.clear()
+    tiempos = []
+    consultas = []
+    status = None
+    for _ in range(repeticiones + 1):
+        # El log de consultas es una cola de 9000: si está llena, CaptureQueriesContext no cuenta nada
+        reset_queries()
+        with CaptureQueriesContext(connection) as ctx:
+            inicio = time.perf_counter()
+            response = client.get(url)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(len(ctx.captured_queries))
+        status = response.status_code
+    calientes = tiempos[1:] or tiempos
+    return {
+        "url": url,
+        "status": status,
+        "frio_ms": round(tiempos[0], 2),
+        "p50_ms": round(statistics.median(calientes), 2),
+        "p95_ms": round(_percentil(calientes, 95), 2),
+        "consultas_frio": consultas[0],
+        "consultas": consultas[-1],
+    }
+
+
+def medir_paginas(urls, repeticiones=10):
+    """{nombre: resultado de medir()} para cada URL no vacía de `urls`."""
+    client = Client(HTTP_HOST="localhost")
+    return {nombre: medir(client, url, repeticiones) for nombre, url in urls.items() if url}
+
+
+def comparar(actual, referencia, umbral=1.25):
+    """
+    Regresiones de `actual` respecto de `referencia` (ambos con la forma de medir_paginas):
+    p50 más lento que referencia * umbral, o más consultas que la referencia.
+    Devuelve una lista de mensajes (vacía si no hay regresiones).
+    """
+    regresiones = []
+    for nombre, base in referencia.items():
+        nuevo = actual.get(nombre)
+        if not nuevo:
+            continue
+        if nuevo["p50_ms"] > base["p50_ms"] * umbral:
+            regresiones.append(
+                f"{nombre}: p50 {nuevo['p50_ms']} ms (referencia {base['p50_ms']} ms, umbral x{umbral})"
+            )
+        for campo in ("consultas", "consultas_frio"):
+            if nuevo[campo] > base[campo]:
+                regresiones.append(f"{nombre}: {nuevo[campo]} {campo} (referencia {base[campo]})")
+    return regresiones
@@ -0,0 +1,46 @@
+"""
+Versiones de dependencias para invalidar cachés sin borrar claves.
+
+Cada dependencia (ej. "paginas", "noticias") tiene una versión en la caché. Las claves
+que dependen de ella incluyen esa versión; al publicar algo se cambia la versión y las
+entradas viejas simplemente dejan de usarse (y expiran).
+
+La versión es un valor al azar, no un contador:
+- bump() solo escribe (sin leer y sumar): dos publicaciones simultáneas en distintos
+  workers nunca terminan con la misma versión de antes, aunque el backend no tenga
+  incr atómico.
+- Si la caché desaloja la clave (al llenarse), la próxima lectura crea una versión
+  nueva: equivale a invalidar, nunca vuelve a validar entradas viejas.
+"""
+import secrets
+
+from django.core.cache import cache
+
+_PREFIX = "deps:"
+
+
+def _nueva() -> str:
+    return secrets.token_hex(4)
+
+
+def version(dep) -> str:
+    """Versión actual de la dependencia (se crea una si no hay)."""
+    key = f"{_PREFIX}{dep}"
+    actual = cache.get(key)
+    if actual is None:
+        nueva = _nueva()
+        if cache.add(key, nueva, None):
+            return nueva
+        actual = cache.get(key, nueva)
+    return actual
+
+
+def versions(*deps) -> str:
+    """Las versiones de varias dependencias juntas, para armar una clave de caché."""
+    values = cache.get_many([f"{_PREFIX}{d}" for d in deps])
+    return ".".join(values.get(f"{_PREFIX}{d}") or version(d) for d in deps)
+
+
+def bump(*deps):
+    """Invalida todo lo que dependa de estas dependencias."""
+    cache.set_many({f"{_PREFIX}{dep}": _nueva() for dep in deps}, None)
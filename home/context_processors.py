@@ -1,7 +1,6 @@
 """Context processors para templates del sitio."""
-from wagtail.models import Site
-
 from home.intranet_auth import get_intranet_user
+from home.sitios import sitio_por_defecto
 
 
 # Slugs que aparecen como tabs bajo el header (orden fijo)
@@ -13,7 +12,7 @@ NAV_HIDE_SLUGS = ["recursos"]
 
 def site_menu(request):
     """Añade 'site_menu' (todos los hijos), 'site_nav' (institucionales) y 'site_tabs' (tabs)."""
-    site = Site.objects.filter(is_default_site=True).first()
+    site = sitio_por_defecto()
     if not site or not site.root_page_id:
         return {"site_menu": [], "site_nav": [], "site_tabs": []}
     try:
@@ -0,0 +1,157 @@
+"""
+Exportación en CSV o JSONL de iglesias y envíos de formularios, en streaming.
+
+Las filas se leen por lotes de LOTE con keyset (id > último visto) y se escriben a
+medida que salen, así la memoria no crece con la cantidad de filas. Con MySQL,
+queryset.iterator() igual trae todo el resultado al cliente (PyMySQL no hace cursores
+del lado del servidor). Cada lote es una consulta corta por el índice de la clave primaria.
+
+Lo usan las vistas de /admin/exportar/ (StreamingHttpResponse) y el comando exportar.
+"""
+import csv
+import json
+
+from wagtail.contrib.forms.models import FormSubmission
+from wagtail.models import Site
+
+from home.models import FormField, IglesiaPage
+from home.urls_paginas import url_publica
+
+LOTE = 500
+FORMATOS = ("csv", "jsonl")
+
+# Trae el contacto de los pastores aunque no sea público: no alcanza con entrar al admin
+PERMISO_IGLESIAS = "home.change_iglesiapage"
+
+# Excel toma como fórmula una celda que empieza así (los envíos del formulario los escribe cualquiera)
+_INICIO_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+COLUMNAS_IGLESIAS = [
+    "id",
+    "titulo",
+    "nombre",
+    "direccion",
+    "ciudad",
+    "provincia",
+    "pastor_nombre",
+    "pastor_email",
+    "pastor_telefono",
+    "mostrar_contacto_publicamente",
+    "latitud",
+    "longitud",
+    "mapa_url",
+    "intranet_id",
+    "url",
+]
+
+
+def por_lotes(queryset, lote=LOTE):
+    """Recorre queryset (sin ordenar) por pk ascendente, de a `lote` filas por consulta."""
+    ultimo = None
+    while True:
+        qs = queryset.order_by("pk")
+        if ultimo is not None:
+            qs = qs.filter(pk__gt=ultimo)
+        filas = list(qs[:lote])
+        if not filas:
+            return
+        yield from filas
+        ultimo = filas[-1]["pk"] if isinstance(filas[-1], dict) else filas[-1].pk
+        if len(filas) < lote:
+            return
+
+
+def filas_iglesias(lote=LOTE):
+    """Un dict por iglesia publicada (COLUMNAS_IGLESIAS)."""
+    raices = Site.get_site_root_paths()
+    campos = [c for c in COLUMNAS_IGLESIAS if c not in ("id", "titulo", "url")]
+    qs = IglesiaPage.objects.live().values("pk", "title", "url_path", *campos)
+    for fila in por_lotes(qs, lote):
+        yield {
+            "id": fila["pk"],
+            "titulo": fila["title"],
+            **{c: fila[c] for c in campos},
+            "url": url_publica(fila["url_path"], raices),
+        }
+
+
+COLUMNAS_FIJAS_ENVIOS = ("id", "pagina", "fecha")
+
+
+def _columna_campo(nombre):
+    """
+    Columna de un campo del formulario. Un campo llamado como una columna fija (los
+    nombres los elige quien arma el formulario) va como campo_<nombre>, y también los
+    que ya empiezan con campo_, para que dos campos nunca caigan en la misma columna.
+    """
+    if nombre in COLUMNAS_FIJAS_ENVIOS or nombre.startswith("campo_"):
+        return f"campo_{nombre}"
+    return nombre
+
+
+def columnas_envios(page_ids):
+    """id, pagina, fecha y los campos de los formularios (en el orden del formulario)."""
+    nombres = FormField.objects.filter(page_id__in=page_ids).order_by("page_id", "sort_order")
+    campos = list(dict.fromkeys(_columna_campo(n) for n in nombres.values_list("clean_name", flat=True)))
+    return list(COLUMNAS_FIJAS_ENVIOS) + campos
+
+
+def filas_envios(page_ids, lote=LOTE):
+    """Un dict por envío de los formularios `page_ids`, del más viejo al más nuevo."""
+    qs = FormSubmission.objects.filter(page_id__in=page_ids).values("pk", "page_id", "submit_time", "form_data")
+    for fila in por_lotes(qs, lote):
+        yield {
+            **{_columna_campo(k): v for k, v in fila["form_data"].items()},
+            "id": fila["pk"],
+            "pagina": fila["page_id"],
+            "fecha": fila["submit_time"].isoformat(),
+        }
+
+
+class _Eco:
+    """Archivo de mentira para csv.writer: devuelve lo escrito en vez de guardarlo."""
+
+    def write(self, valor):
+        return valor
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, list):
+        valor = ", ".join(str(v) for v in valor)
+    if isinstance(valor, str) and valor.startswith(_INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def csv_lineas(columnas, filas):
+    """
+    Líneas CSV (con BOM para que Excel reconozca UTF-8). Columnas que falten quedan vacías;
+    los textos que empiezan como una fórmula van con ' adelante para que Excel no la ejecute.
+    """
+    writer = csv.writer(_Eco())
+    yield "\ufeff" + writer.writerow(columnas)
+    for fila in filas:
+        yield writer.writerow([_texto(fila.get(c)) for c in columnas])
+
+
+def jsonl_lineas(filas):
+    for fila in filas:
+        yield json.dumps(fila, ensure_ascii=False, default=str) + "\n"
+
+
+def lineas(formato, columnas, filas):
+    return csv_lineas(columnas, filas) if formato == "csv" else jsonl_lineas(filas)
+
+
+def en_bloques(textos, n=LOTE):
+    """Junta las líneas de a `n`: menos escrituras al socket (y menos saltos a thread en ASGI)."""
+    bloque = []
+    for linea in textos:
+        bloque.append(linea)
+        if len(bloque) >= n:
+            yield "".join(bloque)
+            bloque = []
+    if bloque:
+        yield "".join(bloque)
@@ -3,44 +3,88 @@ Utilidades para autenticación con la intranet en imparg.org.
 - Login con usuario/contraseña de la intranet (POST /api/v1/auth/login).
 - Obtener usuario desde sesión (tras login o token).
 - Comprobar si puede editar la página "sitio" de una iglesia.
+
+Las funciones con prefijo "a" (alogin_intranet, afetch_me_from_intranet,
+aensure_intranet_user_for_edit) son las versiones async, con httpx: las usan las
+vistas async para que esperar a la intranet no ocupe un thread del servidor.
+requests y httpx se importan al usarse: home.views carga este módulo en cada worker
+y la mayoría nunca llama a la intranet.
 """
 import logging
-import requests
+
 from django.conf import settings
 
+from impa_site.profiling_middleware import medir_http
+
 logger = logging.getLogger(__name__)
 
 
+ERROR_SIN_URL = "No está configurada la URL de la intranet (INTRANET_API_BASE_URL)."
+ERROR_CONEXION = "No se pudo conectar con la intranet. Revisá INTRANET_API_BASE_URL."
+ERROR_LOGIN = "Error al iniciar sesión. Intentá de nuevo."
+
+
+def _intranet_url(path):
+    base = getattr(settings, "INTRANET_API_BASE_URL", None) or ""
+    return f"{base}{path}" if base else None
+
+
+def _resultado_login(status_code, headers, json_fn):
+    """(access_token, user, None) o (None, None, mensaje) a partir de la respuesta de /auth/login."""
+    data = json_fn() if headers.get("content-type", "").startswith("application/json") else {}
+    if status_code != 200:
+        return None, None, data.get("error", "Credenciales inválidas. Por favor intentá nuevamente.")
+    token = (data.get("access_token") or "").strip()
+    if not token:
+        return None, None, "La intranet no devolvió token."
+    return token, data.get("user") or {}, None
+
+
 def login_intranet(username, password):
     """
     Llama a POST /api/v1/auth/login de la intranet con usuario y contraseña.
     Devuelve (access_token, user_dict_del_login, None) si OK, o (None, None, mensaje_error) si falla.
     """
-    base = getattr(settings, "INTRANET_API_BASE_URL", None) or ""
-    if not base:
-        return None, None, "No está configurada la URL de la intranet (INTRANET_API_BASE_URL)."
-    url = f"{base}/api/v1/auth/login"
+    url = _intranet_url("/api/v1/auth/login")
+    if not url:
+        return None, None, ERROR_SIN_URL
+    import requests
+
     try:
-        r = requests.post(
-            url,
-            json={"username": username, "password": password},
-            headers={"Content-Type": "application/json"},
-            timeout=15,
-        )
-        data = r.json() if r.headers.get("content-type", "").startswith("application/json") else {}
-        if r.status_code != 200:
-            return None, None, data.get("error", "Credenciales inválidas. Por favor intentá nuevamente.")
-        token = (data.get("access_token") or "").strip()
-        if not token:
-            return None, None, "La intranet no devolvió token."
-        user_from_login = data.get("user") or {}
-        return token, user_from_login, None
+        with medir_http("intranet"):
+            r = requests.post(
+                url,
+                json={"username": username, "password": password},
+                headers={"Content-Type": "application/json"},
+                timeout=15,
+            )
+        return _resultado_login(r.status_code, r.headers, r.json)
     except requests.RequestException as e:
         logger.warning("intranet login request error: %s", e)
-        return None, None, "No se pudo conectar con la intranet. Revisá INTRANET_API_BASE_URL."
+        return None, None, ERROR_CONEXION
     except Exception as e:
         logger.warning("intranet login error: %s", e)
-        return None, None, "Error al iniciar sesión. Intentá de nuevo."
+        return None, None, ERROR_LOGIN
+
+
+async def alogin_intranet(username, password):
+    """Versión async de login_intranet (mismo resultado)."""
+    url = _intranet_url("/api/v1/auth/login")
+    if not url:
+        return None, None, ERROR_SIN_URL
+    import httpx
+
+    try:
+        async with httpx.AsyncClient(timeout=15) as client:
+            with medir_http("intranet"):
+                r = await client.post(url, json={"username": username, "password": password})
+        return _resultado_login(r.status_code, r.headers, r.json)
+    except httpx.HTTPError as e:
+        logger.warning("intranet login request error: %s", e)
+        return None, None, ERROR_CONEXION
+    except Exception as e:
+        logger.warning("intranet login error: %s", e)
+        return None, None, ERROR_LOGIN
 
 
 def build_user_data_from_login(user_dict):
@@ -70,16 +114,38 @@ def fetch_me_from_intranet(access_token):
     Llama a GET /api/v1/public/me con el token y devuelve el dict del usuario
     o None si falla.
     """
-    base = getattr(settings, "INTRANET_API_BASE_URL", None) or ""
-    if not base:
+    url = _intranet_url("/api/v1/public/me")
+    if not url:
         return None
-    url = f"{base}/api/v1/public/me"
+    import requests
+
     try:
-        r = requests.get(
-            url,
-            headers={"Authorization": f"Bearer {(access_token or '').strip()}"},
-            timeout=10,
-        )
+        with medir_http("intranet"):
+            r = requests.get(
+                url,
+                headers={"Authorization": f"Bearer {(access_token or '').strip()}"},
+                timeout=10,
+            )
+        if r.status_code != 200:
+            logger.warning("intranet fetch_me status %s url=%s", r.status_code, url)
+            return None
+        return r.json()
+    except Exception as e:
+        logger.warning("intranet fetch_me error: %s url=%s", e, url)
+        return None
+
+
+async def afetch_me_from_intranet(access_token):
+    """Versión async de fetch_me_from_intranet."""
+    url = _intranet_url("/api/v1/public/me")
+    if not url:
+        return None
+    import httpx
+
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            with medir_http("intranet"):
+                r = await client.get(url, headers={"Authorization": f"Bearer {(access_token or '').strip()}"})
         if r.status_code != 200:
             logger.warning("intranet fetch_me status %s url=%s", r.status_code, url)
             return None
@@ -98,6 +164,15 @@ def get_intranet_user(request):
     return request.session.get("intranet_user")
 
 
+def _necesita_refrescar(user):
+    """Refrescar si no hay usuario, o si es pastor sin church_id (lo necesitamos para can_edit)."""
+    roles = (user or {}).get("roles") or []
+    return not user or (
+        (("pastorado" in roles) or ("pastor" in roles))
+        and user.get("church_id") is None
+    )
+
+
 def ensure_intranet_user_for_edit(request):
     """
     Si hay token guardado pero el usuario de sesión no tiene church_id (p. ej. fallback
@@ -107,15 +182,7 @@ def ensure_intranet_user_for_edit(request):
     """
     user = request.session.get("intranet_user")
     token = request.session.get("intranet_access_token")
-    if not token:
-        return user
-    # Refrescar si falta church_id y es pastor (necesitamos church_id para can_edit)
-    roles = (user or {}).get("roles") or []
-    need_refresh = not user or (
-        (("pastorado" in roles) or ("pastor" in roles))
-        and user.get("church_id") is None
-    )
-    if not need_refresh:
+    if not token or not _necesita_refrescar(user):
         return user
     fresh = fetch_me_from_intranet(token)
     if fresh:
@@ -124,6 +191,19 @@ def ensure_intranet_user_for_edit(request):
     return user
 
 
+async def aensure_intranet_user_for_edit(request):
+    """Versión async de ensure_intranet_user_for_edit (sesión con aget/aset)."""
+    user = await request.session.aget("intranet_user")
+    token = await request.session.aget("intranet_access_token")
+    if not token or not _necesita_refrescar(user):
+        return user
+    fresh = await afetch_me_from_intranet(token)
+    if fresh:
+        await request.session.aset("intranet_user", fresh)
+        return fresh
+    return user
+
+
 def can_edit_church_site(iglesia_page, intranet_user):
     """
     True si el usuario intranet puede editar la página "sitio" de esta iglesia.
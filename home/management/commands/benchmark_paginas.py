@@ -0,0 +1,105 @@
+"""
+Benchmark de las páginas principales (inicio, iglesias, mapa, noticias, búsqueda,
+micrositio de iglesia, Doctrina) sobre un sitio sintético grande.
+
+Crea una base de test aparte (test_<DB_NAME> en MySQL; en memoria con SQLite), arma
+el sitio con home.benchmarks.construir_sitio, mide latencia y consultas SQL de cada
+página y borra la base al terminar. No toca los datos ni la caché reales.
+
+Ejecutar:
+  python manage.py benchmark_paginas --salida benchmark.json
+  python manage.py benchmark_paginas --iglesias 500 --noticias 5000 --repeticiones 5
+  python manage.py benchmark_paginas --baseline benchmark.json --umbral 1.3
+
+Para comparar motores: sin DB_NAME en .env usa SQLite; con DB_NAME, MySQL local.
+Con --baseline termina con error si alguna página es más lenta que la referencia por
+más del umbral o hace más consultas.
+"""
+import json
+import platform
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from home.benchmarks import comparar, construir_sitio, medir_paginas
+
+CACHES_BENCHMARK = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": f"benchmark-{alias}"}
+    for alias in ("default", "renditions")
+}
+
+
+class Command(BaseCommand):
+    help = "Mide latencia y consultas SQL de las páginas principales sobre un sitio sintético."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iglesias", type=int, default=2000, help="Iglesias a crear (default: 2000).")
+        parser.add_argument("--noticias", type=int, default=20000, help="Noticias a crear (default: 20000).")
+        parser.add_argument("--repeticiones", type=int, default=10, help="Pedidos por página (default: 10).")
+        parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados.")
+        parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar.")
+        parser.add_argument(
+            "--umbral",
+            type=float,
+            default=1.25,
+            help="Factor de tolerancia de latencia respecto del baseline (default: 1.25).",
+        )
+
+    def handle(self, *args, **options):
+        referencia = None
+        if options["baseline"]:
+            try:
+                referencia = json.loads(Path(options["baseline"]).read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer el baseline: {e}")
+
+        nombre_original = connection.settings_dict["NAME"]
+        self.stdout.write(f"Creando base de test ({connection.vendor})...")
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Caché en memoria y sin log de búsquedas: no tocar la caché compartida de producción
+            with override_settings(CACHES=CACHES_BENCHMARK, SEARCH_QUERY_LOG_ENABLED=False):
+                self.stdout.write(
+                    f"Armando sitio sintético: {options['iglesias']} iglesias, {options['noticias']} noticias..."
+                )
+                urls = construir_sitio(iglesias=options["iglesias"], noticias=options["noticias"])
+                paginas = medir_paginas(urls, repeticiones=options["repeticiones"])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        resultado = {
+            "fecha": timezone.now().isoformat(),
+            "backend": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "iglesias": options["iglesias"],
+            "noticias": options["noticias"],
+            "repeticiones": options["repeticiones"],
+            "paginas": paginas,
+        }
+
+        self.stdout.write(f"\n{'página':<20} {'status':>6} {'frío ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'SQL':>5}")
+        for nombre, r in paginas.items():
+            self.stdout.write(
+                f"{nombre:<20} {r['status']:>6} {r['frio_ms']:>9} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['consultas']:>5}"
+            )
+
+        if options["salida"]:
+            Path(options["salida"]).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"\nResultados guardados en {options['salida']}"))
+
+        if referencia is not None:
+            if referencia.get("backend") != resultado["backend"]:
+                self.stdout.write(self.style.WARNING(
+                    f"El baseline es de {referencia.get('backend')} y esta corrida de {resultado['backend']}."
+                ))
+            regresiones = comparar(paginas, referencia.get("paginas", {}), umbral=options["umbral"])
+            if regresiones:
+                for r in regresiones:
+                    self.stderr.write(self.style.ERROR(f"  {r}"))
+                raise CommandError(f"{len(regresiones)} regresiones respecto de {options['baseline']}.")
+            self.stdout.write(self.style.SUCCESS("Sin regresiones respecto del baseline."))
@@ -0,0 +1,64 @@
+"""
+Build de estáticos para producción: collectstatic y CSS crítico.
+
+1. collectstatic con el storage de WhiteNoise (CompressedManifestStaticFilesStorage):
+   copia con hash en el nombre (impa_site.9b14...css, cacheable por un año) y
+   variantes .gz y .br generadas de antemano (.br solo si está instalado Brotli).
+2. Extrae de impa_site.css las reglas de arriba del pliegue (home.static_assets) a
+   STATIC_ROOT/css/impa_site.critico.css, que base.html pone inline.
+3. Muestra el tamaño de cada CSS/JS del sitio sin comprimir, con gzip y con brotli.
+
+Ejecutar (reemplaza a collectstatic en el despliegue; reiniciar gunicorn después):
+  python manage.py build_static
+  python manage.py build_static --clear
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from home.static_assets import CSS_CRITICO, CSS_PRINCIPAL, extraer_criticas, tamanos
+
+# Estáticos propios del sitio (los del admin de Wagtail no se listan)
+PREFIJOS_PROPIOS = ("css/", "js/")
+
+
+class Command(BaseCommand):
+    help = "collectstatic (hash + .gz/.br) y CSS crítico para inline en base.html."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Borrar STATIC_ROOT antes de copiar.")
+
+    def handle(self, *args, **options):
+        try:
+            import brotli  # noqa: F401
+        except ImportError:
+            self.stdout.write(self.style.WARNING("Brotli no está instalado: solo se generan variantes .gz."))
+
+        call_command("collectstatic", interactive=False, clear=options["clear"], verbosity=0)
+        raiz = Path(settings.STATIC_ROOT)
+
+        try:
+            css = (raiz / CSS_PRINCIPAL).read_text(encoding="utf-8")
+        except OSError as e:
+            raise CommandError(f"No se encontró {CSS_PRINCIPAL} en STATIC_ROOT: {e}")
+        critico = extraer_criticas(css)
+        (raiz / CSS_CRITICO).write_text(critico, encoding="utf-8")
+
+        try:
+            manifest = json.loads((raiz / "staticfiles.json").read_text(encoding="utf-8"))["paths"]
+        except (OSError, ValueError, KeyError):
+            manifest = {}
+        propios = sorted(hashed for nombre, hashed in manifest.items() if nombre.startswith(PREFIJOS_PROPIOS))
+
+        self.stdout.write(f"\n{'archivo':<44} {'bytes':>8} {'gzip':>8} {'brotli':>8}")
+        for ruta, t in tamanos(raiz, propios).items():
+            self.stdout.write(f"{ruta:<44} {t['bytes']:>8} {t['gzip'] or '-':>8} {t['brotli'] or '-':>8}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nCSS crítico: {len(critico.encode('utf-8'))} bytes de {len(css.encode('utf-8'))} "
+                f"(inline en cada página; reiniciar gunicorn para que lo tome)."
+            )
+        )
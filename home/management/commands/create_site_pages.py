@@ -24,6 +24,7 @@ from home.models import (
     FormField,
     MapaPage,
 )
+from search.diferido import indexado_diferido
 
 
 # Campos del formulario de contacto (todos opcionales)
@@ -70,6 +71,7 @@ class Command(BaseCommand):
             help="Publicar hijos de la Home que estén en borrador.",
         )
 
+    @indexado_diferido()
     def handle(self, *args, **options):
         root = Page.objects.type(HomePage).filter(depth=2).first()
         if not root:
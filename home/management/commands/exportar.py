@@ -0,0 +1,45 @@
+"""
+Exporta iglesias o envíos de formularios a CSV o JSONL, escribiendo a medida que lee
+(memoria constante; ver home/exportar.py). Lo mismo que /admin/exportar/, sin pasar
+por gunicorn: para exportaciones grandes o programadas.
+
+Ejecutar:
+  python manage.py exportar iglesias --salida iglesias.csv
+  python manage.py exportar formularios --formato jsonl --salida contacto.jsonl
+  python manage.py exportar formularios --pagina 12 > envios.csv
+"""
+import sys
+
+from django.core.management.base import BaseCommand
+
+from home import exportar
+from home.models import FormField
+
+
+class Command(BaseCommand):
+    help = "Exporta iglesias o envíos de formularios a CSV/JSONL en streaming."
+
+    def add_arguments(self, parser):
+        parser.add_argument("que", choices=["iglesias", "formularios"])
+        parser.add_argument("--formato", choices=exportar.FORMATOS, default="csv")
+        parser.add_argument("--pagina", type=int, action="append", help="ID de la página del formulario (default: todos).")
+        parser.add_argument("--salida", help="Archivo de salida (default: stdout).")
+
+    def handle(self, *args, **options):
+        if options["que"] == "iglesias":
+            columnas, filas = exportar.COLUMNAS_IGLESIAS, exportar.filas_iglesias()
+        else:
+            page_ids = options["pagina"] or list(FormField.objects.values_list("page_id", flat=True).distinct())
+            columnas, filas = exportar.columnas_envios(page_ids), exportar.filas_envios(page_ids)
+
+        salida = open(options["salida"], "w", encoding="utf-8", newline="") if options["salida"] else sys.stdout
+        n = 0
+        try:
+            for bloque in exportar.en_bloques(exportar.lineas(options["formato"], columnas, filas)):
+                salida.write(bloque)
+                n += bloque.count("\n")
+        finally:
+            if salida is not sys.stdout:
+                salida.close()
+        if options["salida"]:
+            self.stdout.write(self.style.SUCCESS(f"{n} líneas escritas en {options['salida']}"))
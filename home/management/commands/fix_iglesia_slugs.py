@@ -16,6 +16,7 @@ from django.core.management.base import BaseCommand
 from wagtail.models import Page
 
 from home.models import IglesiasIndexPage, IglesiaPage
+from search.diferido import indexado_diferido
 
 
 def slug_from_title(title):
@@ -38,6 +39,7 @@ class Command(BaseCommand):
             help="Solo mostrar qué se cambiaría, sin guardar.",
         )
 
+    @indexado_diferido()
     def handle(self, *args, **options):
         dry_run = options["dry_run"]
         index = IglesiasIndexPage.objects.live().first()
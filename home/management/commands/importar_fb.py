@@ -1,3 +1,4 @@
+import os
 import re
 from datetime import datetime
 from time import mktime
@@ -7,6 +8,8 @@ from django.core.management.base import BaseCommand
 from django.utils.text import slugify
 
 from home.models import NoticiaPage, NoticiasIndexPage
+from impa_site.profiling_middleware import medir_http
+from search.diferido import indexado_diferido
 
 
 def _extraer_imagen_desde_entry(entry):
@@ -51,8 +54,10 @@ def _extraer_imagen_desde_entry(entry):
 class Command(BaseCommand):
     help = "Importa noticias de Facebook de la Iglesia vía RSS.app"
 
+    @indexado_diferido()
     def handle(self, *args, **options):
-        RSS_URL = "https://rss.app/feeds/DpG11mcZkMgvGykq.xml"
+        # FB_RSS_URL en el entorno lo reemplaza (ej. el stub de loadtest/)
+        RSS_URL = os.environ.get("FB_RSS_URL", "https://rss.app/feeds/DpG11mcZkMgvGykq.xml")
 
         parent = NoticiasIndexPage.objects.live().first()
         if not parent:
@@ -64,12 +69,18 @@ class Command(BaseCommand):
             return
 
         try:
-            feed = feedparser.parse(RSS_URL)
+            with medir_http("rss"):
+                feed = feedparser.parse(RSS_URL)
         except Exception as e:
             self.stderr.write(
                 self.style.ERROR(f"Error al obtener el feed RSS: {str(e)}")
             )
             return
+        # feedparser no lanza excepciones: un 5xx o una conexión caída vuelven como feed vacío
+        if feed.get("status", 200) >= 400 or (feed.get("bozo") and not feed.entries):
+            motivo = feed.get("status") or feed.get("bozo_exception")
+            self.stderr.write(self.style.ERROR(f"Error al obtener el feed RSS: {motivo}"))
+            return
 
         count_new = 0
         count_actualizadas = 0
@@ -0,0 +1,70 @@
+"""
+Genera de antemano las renditions de imágenes que usan los templates
+(tarjetas de noticias, carrusel del inicio, fotos de autoridades, etc.).
+
+Busca los {% image ... %} de los templates de home, junta las imágenes que se
+muestran en cada uno y genera las que falten en paralelo.
+
+Ejecutar:
+  python manage.py pregenerar_renditions
+  python manage.py pregenerar_renditions --workers 2
+  python manage.py pregenerar_renditions --dry-run  # solo mostrar cuántas faltan
+  python manage.py pregenerar_renditions --todas    # regenerar las que perdieron el archivo
+"""
+from django.core.management.base import BaseCommand
+
+from home.renditions import generar_en_paralelo, trabajos_pendientes
+
+
+class Command(BaseCommand):
+    help = "Genera en paralelo las renditions de imágenes que usan los templates y todavía no existen."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Procesos en paralelo (default: CPUs, máximo 4).",
+        )
+        parser.add_argument(
+            "--todas",
+            action="store_true",
+            help="Revisar también las que ya existen en la base y regenerar las que no tienen archivo.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo mostrar qué se generaría.",
+        )
+
+    def handle(self, *args, **options):
+        trabajos, sin_origen = trabajos_pendientes(solo_faltantes=not options["todas"])
+        for template, expr in sin_origen:
+            self.stdout.write(self.style.WARNING(
+                f"  {template}: {{% image {expr} %}} no tiene origen en home.renditions.ORIGENES (se omite)"
+            ))
+        if not trabajos:
+            self.stdout.write("No hay renditions pendientes.")
+            return
+        if options["dry_run"]:
+            for image_id, spec in trabajos:
+                self.stdout.write(f"  [generaría] imagen {image_id} → {spec}")
+            self.stdout.write(self.style.WARNING(f"\nDry-run: {len(trabajos)} renditions pendientes."))
+            return
+
+        creadas = regeneradas = existentes = errores = 0
+        resultados = generar_en_paralelo(trabajos, workers=options["workers"], verificar_archivo=options["todas"])
+        for image_id, spec, resultado in resultados:
+            if resultado == "creada":
+                creadas += 1
+            elif resultado == "regenerada":
+                regeneradas += 1
+            elif resultado == "existente":
+                existentes += 1
+            else:
+                errores += 1
+                self.stderr.write(self.style.ERROR(f"  imagen {image_id} {spec}: {resultado}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"\nListo. {creadas} creadas, {regeneradas} regeneradas (faltaba el archivo), "
+            f"{existentes} ya existían, {errores} con error."
+        ))
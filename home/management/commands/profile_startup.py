@@ -0,0 +1,73 @@
+"""
+Perfil del arranque de un worker: cuánto tarda Django en estar listo para atender
+el primer request y qué apps se llevan ese tiempo en imports (python -X importtime).
+
+Cada arranque corre en un proceso nuevo (como un worker de gunicorn recién
+levantado), con el settings indicado. Con varios --settings-modulo compara los totales.
+
+Ejecutar:
+  python manage.py profile_startup
+  python manage.py profile_startup --settings-modulo impa_site.settings.production impa_site.settings.public
+  python manage.py profile_startup --top 25 --salida arranque.json
+
+settings.production y settings.public exigen SECRET_KEY en el entorno (o en .env).
+"""
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from home.startup_profile import FASES, perfilar
+
+
+class Command(BaseCommand):
+    help = "Mide el arranque de Django (por fase) y el tiempo de imports por app."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--settings-modulo",
+            nargs="+",
+            default=[os.environ.get("DJANGO_SETTINGS_MODULE", "impa_site.settings.dev")],
+            help="Módulo(s) de settings a medir (default: el actual).",
+        )
+        parser.add_argument("--repeticiones", type=int, default=5, help="Arranques por settings (default: 5).")
+        parser.add_argument("--top", type=int, default=15, help="Apps a listar (default: 15).")
+        parser.add_argument("--salida", help="Archivo JSON donde guardar los resultados.")
+
+    def handle(self, *args, **options):
+        resultados = []
+        for modulo in options["settings_modulo"]:
+            self.stdout.write(f"Midiendo {modulo} ({options['repeticiones']} arranques)...")
+            try:
+                resultados.append(perfilar(modulo, options["repeticiones"], cwd=settings.BASE_DIR))
+            except RuntimeError as e:
+                raise CommandError(str(e))
+
+        for r in resultados:
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(f"\n{r['settings']}: {r['total_ms']} ms hasta listo")
+                + f" ({r['modulos_importados']} módulos importados)"
+            )
+            anterior = 0
+            for fase in FASES:
+                self.stdout.write(f"  {fase:<10} +{r['fases'][fase] - anterior:>8.1f} ms")
+                anterior = r["fases"][fase]
+            self.stdout.write(f"\n  {'app':<32} {'imports ms':>10} {'módulos':>8}")
+            for app, g in list(r["apps"].items())[: options["top"]]:
+                self.stdout.write(f"  {app:<32} {g['ms']:>10.1f} {g['modulos']:>8}")
+
+        if len(resultados) > 1:
+            base = resultados[0]
+            self.stdout.write(self.style.MIGRATE_HEADING("\nComparación"))
+            for r in resultados[1:]:
+                diferencia = r["total_ms"] - base["total_ms"]
+                self.stdout.write(
+                    f"  {r['settings']}: {diferencia:+.1f} ms ({diferencia / base['total_ms']:+.0%}) "
+                    f"respecto de {base['settings']}"
+                )
+
+        if options["salida"]:
+            Path(options["salida"]).write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"\nResultados guardados en {options['salida']}"))
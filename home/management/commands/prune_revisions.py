@@ -0,0 +1,56 @@
+"""
+Borra las revisiones viejas de las páginas: por página quedan las N más nuevas y
+las publicadas, programadas, en moderación o con comentarios (ver home/revisiones.py).
+Borra en lotes cortos con pausa entre uno y otro: se puede correr con el sitio andando.
+
+Ejecutar:
+  python manage.py prune_revisions                    # deja las 10 últimas por página
+  python manage.py prune_revisions --conservar 5 --dry-run
+  python manage.py prune_revisions --optimizar        # y devolver el espacio en MySQL
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import filesizeformat
+
+from home import revisiones
+
+
+class Command(BaseCommand):
+    help = "Borra en lotes las revisiones de páginas que exceden la política de retención."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--conservar", type=int, default=10, help="Revisiones más nuevas que quedan por página (default: 10).")
+        parser.add_argument("--lote", type=int, default=revisiones.LOTE, help=f"Revisiones por transacción (default: {revisiones.LOTE}).")
+        parser.add_argument("--pausa", type=float, default=0.2, metavar="SEGUNDOS", help="Espera entre lotes (default: 0.2).")
+        parser.add_argument("--dry-run", action="store_true", help="Solo contar lo que se borraría.")
+        parser.add_argument(
+            "--optimizar",
+            action="store_true",
+            help="Al terminar, OPTIMIZE TABLE (solo MySQL) para que InnoDB devuelva el espacio.",
+        )
+
+    def handle(self, *args, **options):
+        if options["conservar"] < 1:
+            raise CommandError("--conservar tiene que ser al menos 1.")
+        borrar = not options["dry_run"]
+        antes = revisiones.tamano_tabla()
+
+        total = tamano = 0
+        for n, bytes_lote in revisiones.podar(options["conservar"], options["lote"], options["pausa"], borrar=borrar):
+            total += n
+            tamano += bytes_lote
+            if n and options["verbosity"] > 1:
+                self.stdout.write(f"  {n} revisiones ({filesizeformat(bytes_lote)})")
+
+        verbo = "Se borrarían" if options["dry_run"] else "Borradas"
+        self.stdout.write(self.style.SUCCESS(f"{verbo}: {total} revisiones, {filesizeformat(tamano)} de contenido."))
+
+        if borrar and options["optimizar"] and total:
+            if revisiones.optimizar_tabla():
+                despues = revisiones.tamano_tabla()
+                if antes is not None and despues is not None:
+                    self.stdout.write(
+                        f"Tabla de revisiones: {filesizeformat(antes)} → {filesizeformat(despues)} "
+                        f"({filesizeformat(max(antes - despues, 0))} liberados)."
+                    )
+            else:
+                self.stdout.write("--optimizar solo aplica a MySQL; se omite.")
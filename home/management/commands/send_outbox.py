@@ -0,0 +1,58 @@
+"""
+Envía los emails pendientes del outbox (formulario de contacto; ver home/outbox.py).
+
+Normalmente los manda un thread apenas se guarda el formulario. Este comando se
+encarga de los reintentos y de lo que quedó pendiente si se reinició gunicorn.
+
+Ejecutar:
+  python manage.py send_outbox                       # un pasada (cron cada minuto)
+  python manage.py send_outbox --loop 30             # como servicio, cada 30 s
+  python manage.py send_outbox --reintentar-fallidos # volver a encolar los fallidos
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from home import outbox
+from home.models import EmailSaliente
+
+
+class Command(BaseCommand):
+    help = "Envía los emails pendientes del outbox, en lotes y con reintentos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=None, help="Emails por conexión SMTP (default: OUTBOX_BATCH_SIZE).")
+        parser.add_argument("--loop", type=int, default=0, metavar="SEGUNDOS", help="Repetir cada tantos segundos (sin fin).")
+        parser.add_argument(
+            "--reintentar-fallidos",
+            action="store_true",
+            help="Pasar los fallidos a pendientes (con los intentos en cero) antes de enviar.",
+        )
+
+    def handle(self, *args, **options):
+        if options["reintentar_fallidos"]:
+            n = EmailSaliente.objects.filter(estado=EmailSaliente.FALLIDO).update(
+                estado=EmailSaliente.PENDIENTE, intentos=0
+            )
+            self.stdout.write(f"{n} fallidos vuelven a la cola.")
+
+        while True:
+            total = {"enviados": 0, "reintentos": 0, "fallidos": 0}
+            while True:
+                resultado = outbox.enviar_pendientes(options["lote"])
+                for clave, n in resultado.items():
+                    total[clave] += n
+                if not any(resultado.values()):
+                    break
+            if any(total.values()) or not options["loop"]:
+                pendientes = EmailSaliente.objects.filter(estado=EmailSaliente.PENDIENTE).count()
+                self.stdout.write(
+                    f"Enviados: {total['enviados']}, a reintentar: {total['reintentos']}, "
+                    f"fallidos: {total['fallidos']}, pendientes en cola: {pendientes}"
+                )
+            if not options["loop"]:
+                break
+            # Entre pasadas no retener la conexión a la base
+            connections.close_all()
+            time.sleep(options["loop"])
@@ -24,6 +24,7 @@ from django.core.management.base import BaseCommand
 from wagtail.models import Page
 
 from home.models import IglesiasIndexPage, IglesiaPage
+from search.diferido import indexado_diferido
 
 
 def slugify_unique(base_slug, existing_slugs):
@@ -58,6 +59,7 @@ class Command(BaseCommand):
             help="Solo mostrar qué se haría, sin crear ni actualizar.",
         )
 
+    @indexado_diferido()
     def handle(self, *args, **options):
         dry_run = options["dry_run"]
         api_url = os.environ.get("INTRANET_CHURCHES_API_URL") or getattr(
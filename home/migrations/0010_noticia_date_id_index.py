@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0009_add_noticia_facebook_fields'),
+        ('wagtailcore', '0096_referenceindex_referenceindex_source_object_and_more'),
+        ('wagtailimages', '0027_image_description'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='noticiapage',
+            index=models.Index(fields=['date', 'page_ptr'], name='home_noticia_date_id_idx'),
+        ),
+    ]
@@ -1,9 +1,11 @@
 import re
 import unicodedata
+from datetime import date
 
 from django.db import models
+from django.utils import timezone
+from django.utils.functional import cached_property
 from wagtail import blocks
-from wagtail.rich_text import expand_db_html
 from wagtail.admin.panels import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.fields import RichTextField, StreamField
 from wagtail.models import Page
@@ -27,6 +29,12 @@ LINK_BLOCK = blocks.StructBlock([
 ], icon="link")
 
 
+# Specs de {% image %} usados en listados (deben coincidir con los templates)
+CARRUSEL_SPEC = "max-1200x700"
+NOTICIA_TARJETA_SPEC = "fill-400x220"
+AUTORIDAD_FOTO_SPEC = "max-200x300"
+
+
 # ---------- HomePage ----------
 class HomePage(Page):
     intro = RichTextField(blank=True)
@@ -59,12 +67,22 @@ class HomePage(Page):
         return self.get_children().live()
 
     def get_ultimas_noticias(self, n=6):
-        """Últimas n noticias publicadas (desde la página Noticias)."""
+        """Últimas n noticias publicadas (desde la página Noticias), con sus miniaturas precargadas."""
         noticias_page = self.get_children().filter(slug="noticias").live().first()
         if not noticias_page:
             return []
-        from home.models import NoticiaPage
-        return list(NoticiaPage.objects.child_of(noticias_page.specific).live().order_by("-date")[:n])
+        from home.renditions import prefetch_renditions
+        from home.rich_text import precargar
+        noticias = NoticiaPage.objects.child_of(noticias_page).live().order_by("-date")[:n]
+        noticias = prefetch_renditions(noticias, "imagen_destacada", NOTICIA_TARJETA_SPEC)
+        precargar(n.intro for n in noticias)
+        return noticias
+
+    def get_carousel_images(self):
+        """Imágenes del carrusel en orden, con sus renditions cargadas en dos consultas."""
+        from home.renditions import imagenes_con_renditions
+        ids = [b["value"] for b in self.carousel.raw_data if b["type"] == "image"]
+        return imagenes_con_renditions(ids, CARRUSEL_SPEC)
 
 
 # ---------- Fase 2: InstitutionalPage ----------
@@ -86,10 +104,39 @@ class InstitutionalPage(Page):
     parent_page_types = ["home.HomePage"]
     subpage_types = []
 
+    def get_body_blocks(self):
+        """
+        Bloques del body en una sola pasada. En Doctrina cada 'heading' es un artículo:
+        se le asigna número (1, 2, ...) y un ancla, y se arma el índice.
+        Devuelve (bloques, indice): bloques es una lista de (block, numero, ancla), con
+        numero y ancla en None para los bloques que no son artículo; indice es una
+        lista de (numero, titulo, ancla).
+        """
+        bloques, indice = [], []
+        numero = 0
+        for block in self.body:
+            if self.tipo == "doctrina" and block.block_type == "heading":
+                numero += 1
+                ancla = f"articulo-{numero}"
+                bloques.append((block, numero, ancla))
+                indice.append((numero, block.value, ancla))
+            else:
+                bloques.append((block, None, None))
+        return bloques, indice
+
+    @cached_property
+    def bloques_e_indice(self):
+        """get_body_blocks() una sola vez por instancia (lo usa includes/institutional_body.html)."""
+        return self.get_body_blocks()
+
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
+        # body_blocks e índice se arman en el template solo si el body no está en la caché
         if self.tipo == "autoridades":
-            context["autoridades"] = Autoridad.objects.all()
+            from home.renditions import prefetch_renditions
+            from home.rich_text import precargar
+            context["autoridades"] = prefetch_renditions(Autoridad.objects.all(), "foto", AUTORIDAD_FOTO_SPEC)
+            precargar(a.descripcion for a in context["autoridades"])
         return context
 
 
@@ -217,6 +264,27 @@ class ChurchSiteContent(models.Model):
 
 
 # ---------- Fase 4: Noticias ----------
+NOTICIAS_POR_PAGINA = 20
+MAX_NOTICIAS_POR_PAGINA = 50
+
+# Columnas que necesita la tarjeta del listado (título, enlace, fecha, autor, intro)
+NOTICIA_LISTADO_CAMPOS = ("title", "slug", "url_path", "date", "autor", "intro")
+
+
+def _cursor_noticia(noticia) -> str:
+    """Cursor de paginación: fecha e id de la última noticia mostrada (ej. 2026-03-10.245)."""
+    return f"{noticia.date.isoformat()}.{noticia.pk}"
+
+
+def _parse_cursor_noticia(cursor):
+    """(fecha, id) desde un cursor, o None si falta o no es válido."""
+    try:
+        fecha, pk = (cursor or "").split(".", 1)
+        return date.fromisoformat(fecha), int(pk)
+    except ValueError:
+        return None
+
+
 class NoticiasIndexPage(Page):
     intro = RichTextField(blank=True)
 
@@ -228,7 +296,49 @@ class NoticiasIndexPage(Page):
     subpage_types = ["home.NoticiaPage"]
 
     def get_noticias(self):
-        return NoticiaPage.objects.child_of(self).live().order_by("-date")
+        """Noticias publicadas, más nuevas primero, solo con las columnas del listado."""
+        return (
+            NoticiaPage.objects.child_of(self)
+            .live()
+            .only(*NOTICIA_LISTADO_CAMPOS)
+            .order_by("-date", "-pk")
+        )
+
+    def get_noticias_pagina(self, cursor=None, limit=NOTICIAS_POR_PAGINA):
+        """
+        Una página del listado con paginación por cursor sobre (date, id): las páginas
+        profundas cuestan lo mismo que la primera (no hay OFFSET).
+        Devuelve (noticias, cursor_siguiente); cursor_siguiente es None en la última página.
+        """
+        limit = max(1, min(limit, MAX_NOTICIAS_POR_PAGINA))
+        qs = self.get_noticias()
+        desde = _parse_cursor_noticia(cursor)
+        if desde:
+            fecha, pk = desde
+            qs = qs.filter(models.Q(date__lt=fecha) | models.Q(date=fecha, pk__lt=pk))
+        noticias = list(qs[: limit + 1])
+        if len(noticias) > limit:
+            noticias = noticias[:limit]
+            return noticias, _cursor_noticia(noticias[-1])
+        return noticias, None
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        try:
+            limit = int(request.GET.get("n", NOTICIAS_POR_PAGINA))
+        except ValueError:
+            limit = NOTICIAS_POR_PAGINA
+        limit = max(1, min(limit, MAX_NOTICIAS_POR_PAGINA))
+        cursor = request.GET.get("desde")
+        noticias, siguiente = self.get_noticias_pagina(cursor=cursor, limit=limit)
+        from home.rich_text import precargar
+        precargar(n.intro for n in noticias)
+        context["noticias"] = noticias
+        context["cursor_siguiente"] = siguiente
+        context["es_primera_pagina"] = not _parse_cursor_noticia(cursor)
+        # Los links de paginación conservan ?n= si se pidió otro tamaño de página
+        context["por_pagina"] = limit if limit != NOTICIAS_POR_PAGINA else None
+        return context
 
 
 class NoticiaPage(Page):
@@ -260,6 +370,12 @@ class NoticiaPage(Page):
     parent_page_types = ["home.NoticiasIndexPage"]
     subpage_types = []
 
+    class Meta:
+        indexes = [
+            # Listado y paginación por cursor: ORDER BY date DESC, id DESC
+            models.Index(fields=["date", "page_ptr"], name="home_noticia_date_id_idx"),
+        ]
+
     def _extraer_primera_imagen_url(self, html_string):
         """Extrae la primera URL de imagen de un HTML (src o data-src)."""
         if not html_string or not isinstance(html_string, str):
@@ -289,22 +405,17 @@ class NoticiaPage(Page):
         """
         if self.url_imagen_fb:
             return self.url_imagen_fb
+        from home.rich_text import imagenes_html
+
+        # Solo se expanden los <embed> de imagen hasta dar con una URL, no el body entero
         for field in (self.body, self.intro):
             if not field:
                 continue
             raw = getattr(field, "source", None) or str(field)
-            if not raw:
-                continue
-            try:
-                html = expand_db_html(raw)
-            except Exception:
-                html = raw
-            url = self._extraer_primera_imagen_url(html)
-            if url:
-                return url
-            url = self._extraer_primera_imagen_url(raw)
-            if url:
-                return url
+            for tag in imagenes_html(raw):
+                url = self._extraer_primera_imagen_url(tag)
+                if url:
+                    return url
         return None
 
 
@@ -371,16 +482,10 @@ class RadiosIndexPage(Page):
         return self.get_children().live()
 
     def get_context(self, request, *args, **kwargs):
-        import logging
+        from home.stream_radios import radios_para_pagina
+
         context = super().get_context(request, *args, **kwargs)
-        try:
-            from home.stream_radios import obtener_radios_stream
-            context["stream_radios"] = obtener_radios_stream(timeout=8)
-        except Exception as e:
-            logging.getLogger(__name__).warning(
-                "No se pudo obtener radios de imparg.org/stream/: %s", e
-            )
-            context["stream_radios"] = []
+        context["stream_radios"] = radios_para_pagina()
         return context
 
 
@@ -411,6 +516,13 @@ class ContactoPage(AbstractEmailForm):
     parent_page_types = ["home.HomePage"]
     subpage_types = []
 
+    def send_mail(self, form):
+        # El envío por SMTP no se hace en el request: queda en el outbox (home/outbox.py)
+        from home import outbox
+
+        addresses = [x.strip() for x in self.to_address.split(",")]
+        outbox.encolar(self.subject, self.render_email(form), addresses, self.from_address)
+
 
 class FormField(AbstractFormField):
     page = models.ForeignKey(ContactoPage, on_delete=models.CASCADE, related_name="form_fields")
@@ -440,10 +552,11 @@ class MapaPage(Page):
     def get_context(self, request, *args, **kwargs):
         context = super().get_context(request, *args, **kwargs)
         if not self.iframe_url and not self.embed_code:
+            from home.urls_paginas import urls_for
             iglesias = []
-            for iglesia in IglesiaPage.objects.live().filter(
-                latitud__isnull=False, longitud__isnull=False
-            ):
+            paginas = list(IglesiaPage.objects.live().filter(latitud__isnull=False, longitud__isnull=False))
+            urls = urls_for(paginas, request)
+            for iglesia in paginas:
                 iglesias.append({
                     "title": iglesia.title,
                     "lat": float(iglesia.latitud),
@@ -451,7 +564,7 @@ class MapaPage(Page):
                     "direccion": iglesia.direccion or "",
                     "ciudad": iglesia.ciudad or "",
                     "pastor_nombre": iglesia.pastor_nombre or "",
-                    "url": iglesia.get_url(request=request),
+                    "url": urls[iglesia.pk],
                 })
             context["iglesias"] = iglesias
         else:
@@ -495,3 +608,32 @@ class Autoridad(models.Model):
 
 
 register_snippet(Autoridad)
+
+
+# ---------- Outbox de emails (formulario de contacto; ver home/outbox.py) ----------
+class EmailSaliente(models.Model):
+    """Email pendiente de envío. Lo entrega home.outbox (thread tras el commit o comando send_outbox)."""
+    PENDIENTE = "pendiente"
+    ENVIADO = "enviado"
+    FALLIDO = "fallido"
+    ESTADOS = [(PENDIENTE, "Pendiente"), (ENVIADO, "Enviado"), (FALLIDO, "Fallido")]
+
+    asunto = models.CharField(max_length=255)
+    cuerpo = models.TextField()
+    remitente = models.CharField(max_length=254, blank=True, help_text="Vacío = DEFAULT_FROM_EMAIL")
+    destinatarios = models.TextField(help_text="Separados por coma")
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    enviado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["estado", "proximo_intento"], name="home_email_pendiente_idx")]
+        verbose_name = "Email saliente"
+        verbose_name_plural = "Emails salientes"
+
+    def __str__(self):
+        return f"{self.asunto} → {self.destinatarios} ({self.estado})"
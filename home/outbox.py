@@ -0,0 +1,144 @@
+"""
+Outbox de emails: el formulario de contacto guarda el email y responde sin esperar
+al servidor SMTP.
+
+encolar() crea un EmailSaliente y, después del commit, un thread lo entrega (como las
+renditions en home/renditions.py). Lo que no se pudo entregar queda pendiente con
+reintentos espaciados (OUTBOX_RETRY_DELAYS). Lo reintenta el comando send_outbox,
+por cron o con --loop, que también manda lo que quedó si se reinició gunicorn.
+
+Cada lote usa una sola conexión SMTP. Un email se reserva antes de mandarlo, así el
+thread y el comando no lo mandan dos veces. Si el proceso muere, la reserva vence a
+los RESERVA_SEGUNDOS y se reintenta (a lo sumo un duplicado, nunca una pérdida).
+
+Para probar sin SMTP: OUTBOX_EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend
+(con EMAIL_FILE_PATH) o ...console.EmailBackend.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.utils import timezone
+
+from home.models import EmailSaliente
+
+logger = logging.getLogger(__name__)
+
+RESERVA_SEGUNDOS = 300
+
+# Un solo thread de envío por proceso
+_enviando = threading.Lock()
+
+
+def encolar(asunto, cuerpo, destinatarios, remitente=""):
+    """Guarda el email para enviarlo fuera del request. Devuelve el EmailSaliente."""
+    email = EmailSaliente.objects.create(
+        asunto=asunto,
+        cuerpo=cuerpo,
+        destinatarios=",".join(destinatarios),
+        remitente=remitente or "",
+    )
+    if settings.OUTBOX_SEND_ON_COMMIT:
+        transaction.on_commit(enviar_en_segundo_plano)
+    return email
+
+
+def _mensaje(email, connection):
+    return EmailMessage(
+        email.asunto,
+        email.cuerpo,
+        email.remitente or settings.DEFAULT_FROM_EMAIL,
+        [d for d in email.destinatarios.split(",") if d],
+        connection=connection,
+        headers={"Auto-Submitted": "auto-generated"},
+    )
+
+
+def _reservar(lote):
+    """Los pendientes que tocan ahora (hasta `lote`), marcados para que nadie más los tome."""
+    ahora = timezone.now()
+    ids = list(
+        EmailSaliente.objects.filter(estado=EmailSaliente.PENDIENTE, proximo_intento__lte=ahora)
+        .order_by("id")
+        .values_list("id", flat=True)[:lote]
+    )
+    reserva = ahora + timedelta(seconds=RESERVA_SEGUNDOS)
+    tomados = [
+        i
+        for i in ids
+        if EmailSaliente.objects.filter(id=i, estado=EmailSaliente.PENDIENTE, proximo_intento__lte=ahora).update(
+            proximo_intento=reserva
+        )
+    ]
+    return list(EmailSaliente.objects.filter(id__in=tomados).order_by("id"))
+
+
+def _fallo(email, error):
+    email.intentos += 1
+    email.ultimo_error = str(error)[:2000]
+    esperas = settings.OUTBOX_RETRY_DELAYS
+    if email.intentos > len(esperas):
+        email.estado = EmailSaliente.FALLIDO
+        logger.error("Email %s descartado tras %s intentos: %s", email.pk, email.intentos, error)
+    else:
+        email.proximo_intento = timezone.now() + timedelta(seconds=esperas[email.intentos - 1])
+        logger.warning("Email %s no enviado (intento %s): %s", email.pk, email.intentos, error)
+    email.save(update_fields=["intentos", "ultimo_error", "estado", "proximo_intento"])
+
+
+def enviar_pendientes(lote=None):
+    """Envía un lote de pendientes con una sola conexión. Devuelve {"enviados", "reintentos", "fallidos"}."""
+    resultado = {"enviados": 0, "reintentos": 0, "fallidos": 0}
+    emails = _reservar(lote or settings.OUTBOX_BATCH_SIZE)
+    if not emails:
+        return resultado
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND or None)
+    try:
+        connection.open()
+    except Exception as e:
+        # Sin servidor: todo el lote se reintenta más tarde
+        for email in emails:
+            _fallo(email, e)
+            resultado["fallidos" if email.estado == EmailSaliente.FALLIDO else "reintentos"] += 1
+        return resultado
+    try:
+        for email in emails:
+            try:
+                _mensaje(email, connection).send()
+            except Exception as e:
+                _fallo(email, e)
+                resultado["fallidos" if email.estado == EmailSaliente.FALLIDO else "reintentos"] += 1
+                continue
+            email.intentos += 1
+            email.estado = EmailSaliente.ENVIADO
+            email.enviado_en = timezone.now()
+            email.ultimo_error = ""
+            email.save(update_fields=["intentos", "estado", "enviado_en", "ultimo_error"])
+            resultado["enviados"] += 1
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return resultado
+
+
+def enviar_en_segundo_plano():
+    """Vacía la cola en un thread (si ya hay uno enviando en este proceso, ese se encarga)."""
+    if not _enviando.acquire(blocking=False):
+        return
+
+    def _run():
+        try:
+            while any(enviar_pendientes().values()):
+                pass
+        except Exception:
+            logger.exception("Error enviando el outbox")
+        finally:
+            _enviando.release()
+            connections.close_all()
+
+    threading.Thread(target=_run, name="outbox", daemon=True).start()
@@ -0,0 +1,209 @@
+"""
+Redirecciones desde una tabla en memoria, en lugar del RedirectMiddleware de Wagtail
+(que consulta la base en cada 404).
+
+La tabla se arma una vez por proceso y tiene:
+- Cada Redirect de Wagtail. Wagtail los crea solo al cambiar el slug de una página
+  o moverla (WAGTAILREDIRECTS_AUTO_CREATE), p. ej. con fix_iglesia_slugs.
+- Variantes normalizadas de las páginas publicadas: NFC, minúsculas y sin acentos.
+  /iglesias/anelo/ → /iglesias/añelo/ aunque el cambio de slug sea anterior a los
+  redirects automáticos.
+
+Si el path pedido está en la tabla y no es una página publicada ni otra URL del sitio,
+se redirige antes de llamar a la vista (sin consultas ni render del 404). Si no, se
+busca en la tabla solo cuando la respuesta es 404, como hace Wagtail.
+
+Al publicar, despublicar, mover o borrar páginas, o al guardar un Redirect, se sube
+la versión "redirects" (home.cache_deps). Cada worker la revisa cada
+MEMORY_TABLES_RECHECK_SECONDS y rearma su tabla si cambió.
+"""
+import logging
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass, replace
+from urllib.parse import urlparse
+
+from django import http
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils.deprecation import MiddlewareMixin
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.models import Page, Site
+
+from home import cache_deps, sitios
+
+logger = logging.getLogger(__name__)
+
+DEP_REDIRECTS = "redirects"
+
+
+@dataclass(frozen=True)
+class Destino:
+    link: str
+    permanente: bool = True
+    # False: el path coincide con otra URL del sitio; solo se redirige si da 404
+    antes_de_vista: bool = True
+    # Página destino: si es del mismo sitio que el request se redirige a `relativo`
+    site_id: int = None
+    relativo: str = ""
+
+
+def normalizar(path):
+    """Path como los guarda Redirect: con / inicial, sin / final, IRI decodificado."""
+    return Redirect.normalise_path(path)
+
+
+def variantes(path):
+    """El path y sus formas normalizadas: NFC, minúsculas y sin acentos (añelo → anelo)."""
+    nfc = unicodedata.normalize("NFC", path)
+    sin_acentos = unicodedata.normalize("NFKD", nfc).encode("ascii", "ignore").decode("ascii")
+    return list(dict.fromkeys((path, nfc, nfc.lower(), sin_acentos, sin_acentos.lower())))
+
+
+def _es_pagina_wagtail(path):
+    """True si el path lo atiende el serve de Wagtail (no search/, auth/, sitio/ de iglesias, etc.)."""
+    try:
+        return resolve(path.rstrip("/") + "/").url_name == "wagtail_serve"
+    except Resolver404:
+        return False
+
+
+class TablaRedirects:
+    def __init__(self):
+        self.entradas = {}  # (site_id o None, path normalizado) → Destino
+        self.vivos = {}  # site_id → paths normalizados de páginas publicadas
+        self.version = None
+        self._chequeado = None  # time.monotonic() de la última revisión
+        self._lock = threading.Lock()
+
+    # ---------- Armado ----------
+    def construir(self):
+        entradas, vivos = {}, {}
+        paginas = {}  # site_id → [(path normalizado, url relativa)]
+        for site in sitios.mapa.vigente().sitios:
+            raiz = site.root_page.url_path
+            urls = (
+                Page.objects.live()
+                .filter(path__startswith=site.root_page.path)
+                .values_list("url_path", flat=True)
+            )
+            paginas[site.id] = [(normalizar(u[len(raiz) - 1 :]), u[len(raiz) - 1 :]) for u in urls]
+            vivos[site.id] = {path for path, _ in paginas[site.id]}
+        todos_vivos = set().union(*vivos.values()) if vivos else set()
+
+        def agregar(site_id, path, destino):
+            ocupados = vivos.get(site_id, set()) if site_id else todos_vivos
+            if path in ocupados or (site_id, path) in entradas:
+                return
+            if destino.antes_de_vista and not _es_pagina_wagtail(path):
+                destino = replace(destino, antes_de_vista=False)
+            entradas[(site_id, path)] = destino
+
+        # Redirects de Wagtail (los específicos de un sitio primero) y sus variantes
+        for redirect in Redirect.objects.select_related("redirect_page").order_by("site_id"):
+            destino = self._destino(redirect)
+            if destino is None:
+                continue
+            for path in variantes(redirect.old_path):
+                agregar(redirect.site_id, path, destino)
+
+        # Páginas con mayúsculas o acentos en la URL: sus variantes llevan a la página
+        for site_id, lista in paginas.items():
+            for path, url in lista:
+                for variante in variantes(path)[1:]:
+                    if variante != path:
+                        agregar(site_id, variante, Destino(url, site_id=site_id, relativo=url))
+
+        self.entradas, self.vivos = entradas, vivos
+        logger.info("Tabla de redirects: %s entradas", len(entradas))
+
+    @staticmethod
+    def _destino(redirect):
+        if not redirect.redirect_page_id:
+            return Destino(redirect.redirect_link, redirect.is_permanent) if redirect.redirect_link else None
+        page = redirect.redirect_page
+        partes = page.get_url_parts() if page.live else None
+        if not partes:
+            return None
+        site_id, raiz, relativo = partes
+        if redirect.redirect_page_route_path:
+            relativo = relativo.rstrip("/") + redirect.redirect_page_route_path
+        return Destino(raiz + relativo, redirect.is_permanent, site_id=site_id, relativo=relativo)
+
+    def vigente(self):
+        """Rearma la tabla si es la primera vez o si cambió la versión "redirects" (revisada cada tanto)."""
+        ahora = time.monotonic()
+        if self._chequeado is not None and ahora - self._chequeado < settings.MEMORY_TABLES_RECHECK_SECONDS:
+            return self
+        with self._lock:
+            if self._chequeado is not None and ahora - self._chequeado < settings.MEMORY_TABLES_RECHECK_SECONDS:
+                return self
+            version = cache_deps.version(DEP_REDIRECTS)
+            if version != self.version:
+                try:
+                    self.construir()
+                    self.version = version
+                except Exception:
+                    # Sin base (o sin tablas todavía): seguir con la tabla anterior y reintentar
+                    logger.exception("No se pudo armar la tabla de redirects")
+            self._chequeado = ahora
+        return self
+
+    def invalidar(self):
+        """Revisar la versión en el próximo request (después de subirla)."""
+        self._chequeado = None
+
+    # ---------- Búsqueda ----------
+    def _sitio(self, request):
+        # LogHostMiddleware ya dejó el Site en el request (home.sitios): sin consultas
+        site = Site.find_for_request(request)
+        return site.id if site else None
+
+    def buscar(self, request, antes_de_vista=False):
+        """El link para este request y si es permanente, o None."""
+        site_id = self._sitio(request)
+        completo = normalizar(request.get_full_path())
+        sin_query = urlparse(completo).path
+        if antes_de_vista and sin_query in self.vivos.get(site_id, ()):
+            return None
+        for path in dict.fromkeys((completo, sin_query)):
+            for variante in variantes(path):
+                for clave in ((site_id, variante), (None, variante)):
+                    destino = self.entradas.get(clave)
+                    if destino and (destino.antes_de_vista or not antes_de_vista):
+                        relativo = destino.relativo and destino.site_id == site_id
+                        return (destino.relativo if relativo else destino.link), destino.permanente
+        return None
+
+    def responder(self, request, antes_de_vista=False):
+        encontrado = self.vigente().buscar(request, antes_de_vista)
+        if encontrado is None or normalizar(encontrado[0]) == normalizar(request.path):
+            return None
+        link, permanente = encontrado
+        if permanente:
+            return http.HttpResponsePermanentRedirect(link)
+        return http.HttpResponseRedirect(link)
+
+
+tabla = TablaRedirects()
+
+
+def invalidar():
+    """Avisar a todos los workers que rearmen la tabla (y a este, en el próximo request)."""
+    cache_deps.bump(DEP_REDIRECTS)
+    tabla.invalidar()
+
+
+class RedirectMiddleware(MiddlewareMixin):
+    """Reemplaza a wagtail.contrib.redirects.middleware.RedirectMiddleware (ver el docstring del módulo)."""
+
+    def process_request(self, request):
+        if request.method in ("GET", "HEAD"):
+            return tabla.responder(request, antes_de_vista=True)
+        return None
+
+    def process_response(self, request, response):
+        if response.status_code != 404:
+            return response
+        return tabla.responder(request) or response
@@ -0,0 +1,79 @@
+"""
+HTML ya renderizado de los campos de contenido de una página (StreamField o rich text),
+por (página, revisión publicada, campo).
+
+El body de una página institucional o de una noticia solo cambia al publicar, pero se
+deserializa y se renderiza bloque por bloque en cada visita. Con
+{% render_cacheado page "body" %} (home_tags) el HTML se guarda la primera vez y las
+siguientes visitas a la misma revisión lo sacan de la caché sin tocar el campo.
+
+- Al publicar cambia live_revision_id y con él la clave: no hace falta invalidar.
+- Mover o despublicar páginas, cambiar slugs o sitios cambia URLs que pueden estar
+  enlazadas desde cualquier body: sube DEP_RENDER (home/signals.py). También al
+  arrancar gunicorn, por si el deploy trajo templates de bloques nuevos.
+- Los bodies traen URLs de renditions (imágenes del rich text y de ImageChooserBlock):
+  editar o borrar una imagen borra sus renditions y sube DEP_IMAGENES.
+- En la vista previa, o si la página no tiene revisión publicada, se renderiza sin caché.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from wagtail.blocks import StreamValue
+from wagtail.rich_text import expand_db_html
+
+from home import cache_deps
+from home.renditions import DEP_IMAGENES
+
+DEP_RENDER = "render"
+
+# El HTML queda válido mientras no se publique otra revisión; el tope es para no
+# acumular revisiones viejas en la caché
+RENDER_CACHE_SECONDS = getattr(settings, "RENDER_CACHE_SECONDS", 86400)
+
+
+def cacheable(page, request=None):
+    if request is not None and getattr(request, "is_preview", False):
+        return False
+    return bool(page.pk and page.live and page.live_revision_id)
+
+
+def clave(page, campo, template=None):
+    return "render:{}:{}:{}:{}:{}".format(
+        page.pk,
+        page.live_revision_id,
+        campo,
+        hashlib.md5(template.encode("utf-8")).hexdigest() if template else "",
+        cache_deps.versions(DEP_RENDER, DEP_IMAGENES),
+    )
+
+
+def renderizar_campo(page, campo, context=None, template=None):
+    """
+    HTML de page.<campo>: con `template`, ese template (con `page` y `valor` en el
+    contexto); si no, los bloques del StreamField uno tras otro o el rich text expandido.
+    """
+    valor = getattr(page, campo)
+    if template:
+        datos = dict(context.flatten()) if context is not None else {}
+        datos.update(page=page, valor=valor)
+        return render_to_string(template, datos)
+    if isinstance(valor, StreamValue):
+        parent = context.flatten() if context is not None else None
+        return mark_safe("".join(block.render_as_block(parent) for block in valor))
+    return mark_safe(expand_db_html(valor or ""))
+
+
+def campo_html(page, campo, context=None, template=None):
+    """Como renderizar_campo, pero desde la caché si la revisión publicada ya se renderizó."""
+    request = context.get("request") if context is not None else None
+    if not cacheable(page, request):
+        return renderizar_campo(page, campo, context, template)
+    key = clave(page, campo, template)
+    html = cache.get(key)
+    if html is None:
+        html = str(renderizar_campo(page, campo, context, template))
+        cache.set(key, html, RENDER_CACHE_SECONDS)
+    return mark_safe(html)
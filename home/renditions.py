@@ -0,0 +1,408 @@
+"""
+Pre-generación de renditions de imágenes (los recortes/redimensiones de {% image %}).
+
+Wagtail crea cada rendition la primera vez que un template la pide, dentro del
+request. Acá se junta qué specs usa cada template ({% image <expr> <spec> %}) y de
+qué imágenes salen, para generarlas antes: con el comando pregenerar_renditions
+(en paralelo, con un pool de procesos) o al publicar una página (en segundo plano).
+
+Dos procesos o requests que quieran generar la misma rendition a la vez (el comando,
+el publish o un {% image %} en un request) se serializan con un lock de archivo por
+(imagen, spec): el segundo encuentra la rendition ya creada.
+
+Para listados, prefetch_renditions() carga las imágenes y todas sus renditions en
+dos consultas en total, en lugar de una consulta por cada {% image %} del loop.
+
+CacheRenditionsLocal es la caché "renditions" de producción sin Redis: memoria del
+proceso (un {% image %} ya visto no va a la base ni a la tabla de caché), vaciada en
+todos los workers cuando cambia la versión DEP_IMAGENES.
+"""
+import hashlib
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache, partial, wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+
+from home import cache_deps
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo lock entre threads del mismo proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+
+# Dependencia (home.cache_deps) del HTML cacheado con URLs de renditions: sube al
+# guardar o borrar una imagen (archivo nuevo, punto focal) o al borrar renditions
+DEP_IMAGENES = "imagenes"
+
+# {% image noticia.imagen_destacada fill-400x220 class="..." %} → ("noticia.imagen_destacada", "fill-400x220")
+_IMAGE_TAG_RE = re.compile(r"{%\s*image\s+(\S+)\s+([\w.-]+(?:\|[\w.-]+)*)")
+
+_thread_lock = threading.Lock()
+
+
+class _Revision:
+    """Versión DEP_IMAGENES vista por un LOCATION (compartida por los threads del proceso)."""
+
+    def __init__(self):
+        self.version = None
+        self.chequeado = None  # time.monotonic() de la última revisión
+        self.lock = threading.Lock()
+
+
+_revisiones = {}
+
+
+class CacheRenditionsLocal(LocMemCache):
+    """
+    LocMemCache que se vacía cuando cambia la versión DEP_IMAGENES (revisada cada
+    MEMORY_TABLES_RECHECK_SECONDS, como la tabla de redirects). Wagtail borra de la
+    caché la rendition que se borra, pero solo en el proceso que la borró: la versión
+    lleva el aviso al resto.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._revision = _revisiones.setdefault(name, _Revision())
+
+    def _revisar(self):
+        r = self._revision
+        ahora = time.monotonic()
+        if r.chequeado is not None and ahora - r.chequeado < settings.MEMORY_TABLES_RECHECK_SECONDS:
+            return
+        with r.lock:
+            if r.chequeado is not None and ahora - r.chequeado < settings.MEMORY_TABLES_RECHECK_SECONDS:
+                return
+            version = cache_deps.version(DEP_IMAGENES)
+            if version != r.version:
+                self.clear()
+                r.version = version
+            r.chequeado = ahora
+
+    def invalidar(self):
+        """Revisar la versión en la próxima lectura (después de subirla)."""
+        self._revision.chequeado = None
+
+    def get(self, *args, **kwargs):
+        self._revisar()
+        return super().get(*args, **kwargs)
+
+    def get_many(self, *args, **kwargs):
+        self._revisar()
+        return super().get_many(*args, **kwargs)
+
+    def has_key(self, *args, **kwargs):
+        self._revisar()
+        return super().has_key(*args, **kwargs)
+
+
+def invalidar_imagenes():
+    """Cambió una imagen o se borró una rendition: HTML cacheado y caché de renditions."""
+    cache_deps.bump(DEP_IMAGENES)
+    backend = caches["renditions"]
+    if isinstance(backend, CacheRenditionsLocal):
+        backend.invalidar()
+
+
+def prefetch_renditions(objetos, campo, *specs):
+    """
+    Precarga la imagen del campo FK `campo` de cada objeto junto con sus renditions
+    para `specs` (una consulta para imágenes y otra para renditions, sin importar
+    cuántos objetos haya). Devuelve la misma lista de objetos.
+    Ej.: prefetch_renditions(noticias, "imagen_destacada", "fill-400x220")
+    """
+    from wagtail.images import get_image_model
+
+    objetos = list(objetos)
+    if objetos:
+        prefetch_related_objects(
+            objetos,
+            Prefetch(campo, queryset=get_image_model().objects.prefetch_renditions(*specs)),
+        )
+    return objetos
+
+
+def imagenes_con_renditions(image_ids, *specs):
+    """Imágenes con esos IDs, en el mismo orden y con renditions precargadas (dos consultas)."""
+    from wagtail.images import get_image_model
+
+    image_ids = [i for i in image_ids if i]
+    if not image_ids:
+        return []
+    by_id = get_image_model().objects.filter(pk__in=image_ids).prefetch_renditions(*specs).in_bulk()
+    return [by_id[i] for i in image_ids if i in by_id]
+
+
+def _ids_carrusel():
+    from home.models import HomePage
+
+    ids = []
+    for page in HomePage.objects.live().only("carousel"):
+        ids.extend(b["value"] for b in page.carousel.raw_data if b["type"] == "image" and b["value"])
+    return ids
+
+
+def _ids_noticias():
+    from home.models import NoticiaPage
+
+    return NoticiaPage.objects.live().filter(imagen_destacada__isnull=False).values_list(
+        "imagen_destacada_id", flat=True
+    )
+
+
+def _ids_recursos():
+    from home.models import RecursoPage
+
+    return RecursoPage.objects.live().filter(imagen__isnull=False).values_list("imagen_id", flat=True)
+
+
+def _ids_autoridades():
+    from home.models import Autoridad
+
+    return Autoridad.objects.filter(foto__isnull=False).values_list("foto_id", flat=True)
+
+
+# (template, expresión de {% image %}) → función que devuelve los IDs de imagen que se muestran ahí
+ORIGENES = {
+    ("home/home_page.html", "carousel_image"): _ids_carrusel,
+    ("home/home_page.html", "noticia.imagen_destacada"): _ids_noticias,
+    ("home/noticia_page.html", "page.imagen_destacada"): _ids_noticias,
+    ("home/recurso_page.html", "page.imagen"): _ids_recursos,
+    ("home/institutional_page.html", "aut.foto"): _ids_autoridades,
+}
+
+
+@lru_cache(maxsize=None)
+def specs_en_templates(templates_dir=TEMPLATES_DIR):
+    """
+    {(template, expresión): frozenset(specs)} de todos los {% image %} de los templates
+    de home. Se lee una vez por proceso: los templates solo cambian con un deploy.
+    """
+    encontrados = {}
+    for path in sorted(Path(templates_dir).rglob("*.html")):
+        nombre = path.relative_to(templates_dir).as_posix()
+        for expr, spec in _IMAGE_TAG_RE.findall(path.read_text(encoding="utf-8")):
+            encontrados.setdefault((nombre, expr), set()).add(spec)
+    return {clave: frozenset(specs) for clave, specs in encontrados.items()}
+
+
+def trabajos_pendientes(solo_faltantes=True):
+    """
+    Lista de (image_id, spec) a generar y lista de (template, expresión) de los
+    templates que no tienen un origen registrado en ORIGENES.
+    """
+    from wagtail.images import get_image_model
+
+    Rendition = get_image_model().get_rendition_model()
+    trabajos = set()
+    sin_origen = []
+    for clave, specs in specs_en_templates().items():
+        origen = ORIGENES.get(clave)
+        if not origen:
+            sin_origen.append(clave)
+            continue
+        ids = set(origen())
+        for spec in specs:
+            trabajos.update((image_id, spec) for image_id in ids)
+    if solo_faltantes and trabajos:
+        existentes = set(
+            Rendition.objects.filter(
+                image_id__in={i for i, _ in trabajos},
+                filter_spec__in={s for _, s in trabajos},
+            ).values_list("image_id", "filter_spec")
+        )
+        trabajos -= existentes
+    return sorted(trabajos), sin_origen
+
+
+@contextmanager
+def lock_rendition(image_id, spec):
+    """Lock exclusivo por (imagen, spec), compartido entre procesos del mismo servidor."""
+    if fcntl is None:
+        with _thread_lock:
+            yield
+        return
+    lock_dir = Path(settings.MEDIA_ROOT) / ".rendition-locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.md5(f"{image_id}:{spec}".encode("utf-8")).hexdigest()
+    with open(lock_dir / f"{digest}.lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def instalar_lock_en_renditions():
+    """
+    Hace que Image.create_rendition (lo que llama get_rendition, y con él {% image %},
+    cuando la rendition no existe) tome lock_rendition y vuelva a buscarla adentro:
+    si dos requests piden a la vez una rendition nueva, Pillow trabaja una sola vez y
+    el segundo usa la que creó el primero. Se llama desde HomeConfig.ready().
+    """
+    from wagtail.images import get_image_model
+
+    Image = get_image_model()
+    if getattr(Image.create_rendition, "con_lock", False):
+        return
+    original = Image.create_rendition
+
+    @wraps(original)
+    def create_rendition(self, filter):
+        with lock_rendition(self.pk, filter.spec):
+            existente = self.renditions.filter(
+                filter_spec=filter.spec, focal_point_key=filter.get_cache_key(self)
+            ).first()
+            if existente is not None:
+                return existente
+            return original(self, filter)
+
+    create_rendition.con_lock = True
+    Image.create_rendition = create_rendition
+
+
+def generar_rendition(image_id, spec, verificar_archivo=False):
+    """
+    Genera una rendition si no existe. Devuelve "creada", "existente", "regenerada"
+    o "error: ...". get_rendition toma el lock (instalar_lock_en_renditions): si otro
+    proceso la está creando, espera y usa esa.
+    Con verificar_archivo, si la rendition existe en la base pero su archivo no está
+    en el storage, se borra la fila y se vuelve a generar.
+    """
+    from wagtail.images import get_image_model
+    from wagtail.images.models import Filter
+
+    Image = get_image_model()
+    try:
+        image = Image.objects.get(pk=image_id)
+        existente = image.renditions.filter(
+            filter_spec=spec, focal_point_key=Filter(spec=spec).get_cache_key(image)
+        ).first()
+        if existente is None:
+            image.get_rendition(spec)
+            return "creada"
+        if not verificar_archivo or existente.file.storage.exists(existente.file.name):
+            return "existente"
+        # El post_delete de Wagtail la saca de la caché "renditions" y borra el archivo
+        # (que ya no está) al commit: en autocommit, antes de generar el nuevo con el mismo nombre
+        existente.delete()
+        image.get_rendition(spec)
+        return "regenerada"
+    except Exception as e:
+        return f"error: {e}"
+
+
+def _generar_en_worker(trabajo, verificar_archivo=False):
+    image_id, spec = trabajo
+    return image_id, spec, generar_rendition(image_id, spec, verificar_archivo)
+
+
+def generar_en_paralelo(trabajos, workers=None, verificar_archivo=False):
+    """
+    Genera renditions con un pool de procesos (fork: heredan Django ya configurado).
+    Va devolviendo (image_id, spec, resultado) a medida que terminan.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or max(1, min(4, os.cpu_count() or 1))
+    generar = partial(_generar_en_worker, verificar_archivo=verificar_archivo)
+    if workers == 1 or len(trabajos) <= 1:
+        for trabajo in trabajos:
+            yield generar(trabajo)
+        return
+    # Cada hijo abre su propia conexión; no heredar la del padre
+    connections.close_all()
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        yield from pool.map(generar, trabajos, chunksize=4)
+
+
+def ids_para_pagina(page):
+    """(image_id, spec) que usan los templates para una página recién publicada."""
+    from home.models import HomePage, NoticiaPage, RecursoPage
+
+    specs = specs_en_templates()
+    trabajos = []
+    if isinstance(page, NoticiaPage) and page.imagen_destacada_id:
+        for clave in (("home/home_page.html", "noticia.imagen_destacada"), ("home/noticia_page.html", "page.imagen_destacada")):
+            trabajos += [(page.imagen_destacada_id, s) for s in specs.get(clave, ())]
+    elif isinstance(page, HomePage):
+        ids = [b["value"] for b in page.carousel.raw_data if b["type"] == "image" and b["value"]]
+        trabajos += [(i, s) for i in ids for s in specs.get(("home/home_page.html", "carousel_image"), ())]
+    elif isinstance(page, RecursoPage) and page.imagen_id:
+        trabajos += [(page.imagen_id, s) for s in specs.get(("home/recurso_page.html", "page.imagen"), ())]
+    return trabajos
+
+
+# Un solo thread por proceso genera lo que se encola al publicar (una publicación masiva
+# no lanza decenas de threads con Pillow dentro del worker). Lo que no entra en la cola
+# queda para el comando pregenerar_renditions.
+MAX_EN_COLA = 1000
+
+_cola = queue.Queue()
+_en_cola = set()  # (image_id, spec) encolados o generándose
+_lock_cola = threading.Lock()
+_thread = None
+
+
+def _encolar(trabajos):
+    with _lock_cola:
+        nuevos = [t for t in dict.fromkeys(trabajos) if t not in _en_cola]
+        lugar = max(0, MAX_EN_COLA - len(_en_cola))
+        if len(nuevos) > lugar:
+            logger.warning("Cola de renditions llena: se omiten %s (ver pregenerar_renditions)", len(nuevos) - lugar)
+            nuevos = nuevos[:lugar]
+        _en_cola.update(nuevos)
+        for trabajo in nuevos:
+            _cola.put(trabajo)
+    _asegurar_thread()
+
+
+def _loop():
+    while True:
+        trabajo = _cola.get()
+        try:
+            image_id, spec = trabajo
+            resultado = generar_rendition(image_id, spec)
+            if resultado.startswith("error"):
+                logger.warning("Rendition %s de imagen %s: %s", spec, image_id, resultado)
+        finally:
+            with _lock_cola:
+                _en_cola.discard(trabajo)
+            _cola.task_done()
+            if _cola.empty():
+                connections.close_all()
+
+
+def _asegurar_thread():
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    with _lock_cola:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_loop, name="renditions", daemon=True)
+        _thread.start()
+
+
+def generar_en_segundo_plano(trabajos):
+    """Encola las renditions después del commit (no demora el publish); las genera el thread del proceso."""
+    if not trabajos or not getattr(settings, "RENDITIONS_PREGENERATE_ON_PUBLISH", True):
+        return
+    trabajos = list(trabajos)
+    transaction.on_commit(lambda: _encolar(trabajos))
@@ -0,0 +1,111 @@
+"""
+Poda de revisiones de páginas viejas (comando prune_revisions).
+
+sync_churches_from_intranet, importar_fb y fix_iglesia_slugs guardan una revisión por
+cada página que tocan, así que la tabla de revisiones crece miles de filas por día:
+el historial del admin, los backups y el buffer pool de MySQL lo pagan.
+
+Se conservan, por página, las `conservar` revisiones más nuevas y además cualquier
+revisión que:
+- sea la publicada o la última de alguna página (live_revision, latest_revision);
+- tenga publicación programada (approved_go_live_at);
+- esté en un workflow de moderación (TaskState), aprobado o no;
+- tenga comentarios del editor (Comment.revision_created: se borrarían en cascada).
+
+Se borra de a `lote` filas, cada lote en su propia transacción corta y con una pausa
+entre lotes, para que el sitio siga atendiendo. Las protecciones se vuelven a aplicar
+en la consulta de cada lote: si alguien publica o programa una revisión mientras corre
+la poda, esa revisión no se borra.
+"""
+import time
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum, TextField
+from django.db.models.functions import Cast, Length
+from wagtail.models import Comment, Page, Revision, TaskState
+
+LOTE = 500
+
+
+def purgables(qs):
+    """Las revisiones de qs que se pueden borrar (sin las protegidas; ver docstring del módulo)."""
+    return (
+        qs.filter(approved_go_live_at__isnull=True)
+        .exclude(id__in=Page.objects.filter(live_revision__isnull=False).values("live_revision_id"))
+        .exclude(id__in=Page.objects.filter(latest_revision__isnull=False).values("latest_revision_id"))
+        .exclude(id__in=TaskState.objects.filter(revision__isnull=False).values("revision_id"))
+        .exclude(id__in=Comment.objects.filter(revision_created__isnull=False).values("revision_created_id"))
+    )
+
+
+def candidatas(conservar):
+    """IDs de las revisiones de páginas más viejas que las `conservar` últimas de su página."""
+    revisiones = Revision.objects.page_revisions()
+    con_sobrantes = list(
+        revisiones.values("object_id").annotate(n=Count("id")).filter(n__gt=conservar).values_list("object_id", flat=True)
+    )
+    for object_id in con_sobrantes:
+        yield from revisiones.filter(object_id=object_id).order_by("-created_at", "-id").values_list("id", flat=True)[
+            conservar:
+        ]
+
+
+def _lotes(ids, lote):
+    bloque = []
+    for i in ids:
+        bloque.append(i)
+        if len(bloque) >= lote:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def _bytes(qs):
+    return qs.aggregate(n=Sum(Length(Cast("content", TextField()))))["n"] or 0
+
+
+def podar(conservar, lote=LOTE, pausa=0.0, borrar=True):
+    """
+    Borra (o con borrar=False solo cuenta) las revisiones sobrantes. Generador: devuelve
+    (revisiones, bytes de contenido) por cada lote procesado.
+    """
+    for ids in _lotes(candidatas(conservar), lote):
+        with transaction.atomic():
+            qs = purgables(Revision.objects.filter(id__in=ids))
+            tamano = _bytes(qs)
+            if borrar:
+                _, por_modelo = qs.delete()
+                n = por_modelo.get(Revision._meta.label, 0)
+            else:
+                n = qs.count()
+        yield n, tamano
+        if borrar and pausa:
+            time.sleep(pausa)
+
+
+def tamano_tabla():
+    """Bytes de datos e índices de la tabla de revisiones según MySQL (None con otras bases)."""
+    if connection.vendor != "mysql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT data_length + index_length FROM information_schema.TABLES "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            [Revision._meta.db_table],
+        )
+        fila = cursor.fetchone()
+    return int(fila[0]) if fila and fila[0] is not None else None
+
+
+def optimizar_tabla():
+    """
+    Devuelve al disco el espacio de las filas borradas (InnoDB no lo libera solo).
+    OPTIMIZE TABLE en InnoDB reconstruye la tabla en línea: lecturas y escrituras siguen.
+    """
+    if connection.vendor != "mysql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f"OPTIMIZE TABLE {connection.ops.quote_name(Revision._meta.db_table)}")
+        cursor.fetchall()
+    return True
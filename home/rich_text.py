@@ -0,0 +1,172 @@
+"""
+Expansión de rich text (|richtext, expand_db_html) con las referencias resueltas en bloque.
+
+Wagtail ya junta los <a linktype="page"> y <embed embedtype="image"> de un fragmento
+en una consulta por tipo, pero cada fragmento consulta de nuevo: un listado de 20
+noticias con intro son 20 consultas de páginas (más una por tipo de página, por
+.specific()) y la misma página enlazada se vuelve a buscar en cada fragmento.
+
+- PageLinkHandler e ImageEmbedHandler reemplazan a los de Wagtail (wagtail_hooks) y
+  buscan primero en una memoria del request; solo consultan los ids que faltan.
+- Los enlaces a páginas salen de la tabla de URLs en memoria (home/urls_paginas.py);
+  las que no estén ahí, desde url_path (values_list, sin .specific()).
+- Las imágenes se traen con las renditions de los formatos pedidos (prefetch_renditions).
+- precargar(fragmentos) junta las referencias de varios fragmentos (un listado entero)
+  y las resuelve con una consulta por tipo antes de renderizar.
+
+La memoria vive en un ContextVar que RichTextMemoMiddleware arma al empezar cada
+request y descarta al terminar. Fuera de un request (comandos, shell) no hay memoria:
+cada fragmento se resuelve en bloque, como en Wagtail.
+"""
+import re
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.html import escape
+from wagtail.images import get_image_model
+from wagtail.images.formats import get_image_format
+from wagtail.images.rich_text import ImageEmbedHandler as WagtailImageEmbedHandler
+from wagtail.models import Page, Site
+from wagtail.rich_text import expand_db_html
+from wagtail.rich_text.pages import PageLinkHandler as WagtailPageLinkHandler
+from wagtail.rich_text.rewriters import FIND_A_TAG, FIND_EMBED_TAG, extract_attrs
+
+from home import urls_paginas
+
+_memo: ContextVar["dict | None"] = ContextVar("impa_rich_text", default=None)
+
+# Imágenes de un fragmento sin expandir: un <embed> de imagen o un <img> literal (RSS)
+_IMAGEN_RE = re.compile(r'<embed\b[^>]*\bembedtype="image"[^>]*/>|<img\b[^>]*>', re.I | re.DOTALL)
+
+
+def _pendientes(tipo, ids):
+    """(resueltos, ids que faltan resolver) para `tipo` en la memoria del request."""
+    memo = _memo.get()
+    resueltos = memo.setdefault(tipo, {}) if memo is not None else {}
+    return resueltos, [i for i in dict.fromkeys(ids) if i not in resueltos]
+
+
+def urls_de_paginas(ids):
+    """{id: URL o None} de las páginas con esos ids (str, como vienen en el rich text)."""
+    resueltos, faltan = _pendientes("page", ids)
+    tabla = urls_paginas.tabla.vigente()
+    sin_tabla = []
+    for i in faltan:
+        resueltos[i] = tabla.url(int(i)) if i.isdigit() else None
+        if resueltos[i] is None and i.isdigit():
+            sin_tabla.append(i)
+    if sin_tabla:
+        # Páginas creadas después de armar la tabla (o sin URL): una consulta para todas
+        raices = Site.get_site_root_paths()
+        for pk, url_path in Page.objects.filter(id__in=sin_tabla).values_list("id", "url_path"):
+            resueltos[str(pk)] = urls_paginas.url_de_path(url_path, raices)
+    return resueltos
+
+
+def _specs(formatos):
+    specs = set()
+    for formato in formatos:
+        try:
+            specs.add(get_image_format(formato).filter_spec)
+        except KeyError:
+            pass
+    return specs
+
+
+def imagenes(ids, formatos=()):
+    """{id: imagen o None}, con las renditions de `formatos` ya cargadas (dos consultas)."""
+    resueltos, faltan = _pendientes("image", ids)
+    if faltan:
+        validos = [i for i in faltan if i.isdigit()]
+        encontradas = (
+            get_image_model().objects.filter(id__in=validos).prefetch_renditions(*_specs(formatos)).in_bulk()
+            if validos
+            else {}
+        )
+        for i in faltan:
+            resueltos[i] = encontradas.get(int(i)) if i.isdigit() else None
+    return resueltos
+
+
+class PageLinkHandler(WagtailPageLinkHandler):
+    @classmethod
+    def expand_db_attributes_many(cls, attrs_list):
+        ids = [str(attrs.get("id")) for attrs in attrs_list]
+        urls = urls_de_paginas(ids)
+        return ['<a href="%s">' % escape(urls[i]) if urls[i] else "<a>" for i in ids]
+
+
+class ImageEmbedHandler(WagtailImageEmbedHandler):
+    @classmethod
+    def get_many(cls, attrs_list):
+        ids = [str(attrs.get("id")) for attrs in attrs_list]
+        por_id = imagenes(ids, [attrs.get("format") for attrs in attrs_list])
+        return [por_id[i] for i in ids]
+
+
+def precargar(fragmentos):
+    """
+    Resuelve de una vez las páginas e imágenes referenciadas en varios fragmentos de
+    rich text (p. ej. las intros de un listado). Sin memoria de request no hace nada.
+    """
+    if _memo.get() is None:
+        return
+    paginas, ids_imagenes, formatos = [], [], set()
+    for fragmento in fragmentos:
+        html = getattr(fragmento, "source", None) or str(fragmento or "")
+        for match in FIND_A_TAG.finditer(html):
+            attrs = extract_attrs(match.group(1))
+            if attrs.get("linktype") == "page" and "id" in attrs:
+                paginas.append(attrs["id"])
+        for match in FIND_EMBED_TAG.finditer(html):
+            attrs = extract_attrs(match.group(1))
+            if attrs.get("embedtype") == "image" and "id" in attrs:
+                ids_imagenes.append(attrs["id"])
+                formatos.add(attrs.get("format"))
+    if paginas:
+        urls_de_paginas(paginas)
+    if ids_imagenes:
+        imagenes(ids_imagenes, formatos)
+
+
+def imagenes_html(html):
+    """Los <img> de un fragmento en orden, expandiendo de a uno los <embed> de imagen."""
+    for match in _IMAGEN_RE.finditer(html or ""):
+        tag = match.group(0)
+        if tag[:6].lower() == "<embed":
+            try:
+                tag = expand_db_html(tag)
+            except Exception:
+                continue
+        yield tag
+
+
+class RichTextMemoMiddleware:
+    """Memoria de referencias de rich text durante el request (ver docstring del módulo)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _memo.set({})
+        try:
+            # Las TemplateResponse ya vuelven renderizadas del handler
+            return self.get_response(request)
+        finally:
+            _memo.reset(token)
+
+    async def __acall__(self, request):
+        # sync_to_async copia el contexto: la vista sync ve el mismo diccionario
+        token = _memo.set({})
+        try:
+            return await self.get_response(request)
+        finally:
+            _memo.reset(token)
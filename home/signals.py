@@ -0,0 +1,137 @@
+"""Invalidación de cachés y pre-generación de renditions al publicar, despublicar, mover o borrar páginas."""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.images import get_image_model
+from wagtail.models import Page, Site
+from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+from home import cache_deps, redirects, renditions, sitios, urls_paginas
+from home.render_cache import DEP_RENDER
+from home.models import Autoridad, NoticiaPage, NoticiasIndexPage
+from search.diferido import pendientes
+
+# Dependencia general: cualquier cambio de contenido publicado
+DEP_PAGINAS = "paginas"
+# Listados de noticias (ej. "Últimas noticias" del inicio)
+DEP_NOTICIAS = "noticias"
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+def invalidar_paginas(sender, instance, **kwargs):
+    deps = [DEP_PAGINAS]
+    if issubclass(sender, (NoticiaPage, NoticiasIndexPage)):
+        deps.append(DEP_NOTICIAS)
+    cache_deps.bump(*deps)
+
+
+@receiver(post_delete, sender=NoticiaPage)
+def invalidar_noticia_borrada(sender, instance, **kwargs):
+    cache_deps.bump(DEP_PAGINAS, DEP_NOTICIAS)
+
+
+def _invalidar_redirects():
+    # Dentro de indexado_diferido (comandos masivos) se rearma una vez, al final
+    p = pendientes()
+    if p is not None:
+        p.redirects = True
+    else:
+        redirects.invalidar()
+
+
+# (live, url_path) de la página en la base antes de guardarla: publicar sin cambiar
+# ninguno de los dos (editar el contenido) no cambia la tabla de redirects
+@receiver(pre_save)
+def recordar_estado_publicado(sender, instance, update_fields=None, **kwargs):
+    if not isinstance(instance, Page) or instance.pk is None:
+        return
+    if update_fields is not None and not {"live", "url_path"} & set(update_fields):
+        return
+    instance._publicado_antes = Page.objects.filter(pk=instance.pk).values_list("live", "url_path").first()
+
+
+def _cambio_publicado(instance):
+    antes = getattr(instance, "_publicado_antes", None)
+    return antes is None or antes != (instance.live, instance.url_path)
+
+
+# Tabla de redirects en memoria: depende de los Redirect y de las URLs publicadas. Los
+# Redirect del cambio de slug los crea Wagtail con bulk_create (sin post_save), en su
+# receiver de page_slug_changed / post_page_move, que corre antes que este.
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(page_slug_changed)
+@receiver(post_page_move)
+@receiver(post_save, sender=Redirect)
+@receiver(post_delete, sender=Redirect)
+def invalidar_redirects(sender, instance, signal, **kwargs):
+    if signal not in (page_published, page_unpublished) or _cambio_publicado(instance):
+        _invalidar_redirects()
+    # Los Site en memoria guardan los datos de su página raíz (url_path, título)
+    if isinstance(instance, Page) and sitios.mapa.es_raiz(instance.pk):
+        sitios.invalidar()
+
+
+@receiver(post_delete)
+def invalidar_redirects_pagina_borrada(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        _invalidar_redirects()
+        urls_paginas.invalidar()
+        # Los enlaces a la página borrada en otros bodies renderizados
+        cache_deps.bump(DEP_RENDER)
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def invalidar_sitios(sender, instance, **kwargs):
+    sitios.invalidar()
+    redirects.invalidar()
+    urls_paginas.invalidar()
+    cache_deps.bump(DEP_RENDER)
+
+
+# Tabla de URLs en memoria: solo cambia con páginas nuevas, movidas, renombradas o
+# borradas (publicar sin cambiar el slug no toca url_path)
+@receiver(page_slug_changed)
+@receiver(post_page_move)
+def invalidar_urls(sender, instance, **kwargs):
+    urls_paginas.invalidar()
+
+
+@receiver(post_save)
+def invalidar_urls_pagina_nueva(sender, instance, created, **kwargs):
+    if created and isinstance(instance, Page):
+        urls_paginas.invalidar()
+
+
+# Bodies renderizados (home/render_cache.py): se guardan por revisión publicada, así
+# que publicar no los invalida; sí lo que cambia URLs que pueden estar enlazadas en ellos
+@receiver(page_unpublished)
+@receiver(page_slug_changed)
+@receiver(post_page_move)
+def invalidar_bodies_renderizados(sender, instance, **kwargs):
+    cache_deps.bump(DEP_RENDER)
+
+
+# HTML cacheado con URLs de renditions (bodies, carrusel y noticias del inicio) y la
+# caché "renditions" de cada worker: al reemplazar el archivo o cambiar el punto focal
+# Wagtail borra las renditions viejas
+@receiver(post_save, sender=get_image_model())
+@receiver(post_delete, sender=get_image_model())
+@receiver(post_delete, sender=get_image_model().get_rendition_model())
+def invalidar_html_con_imagenes(sender, instance, **kwargs):
+    renditions.invalidar_imagenes()
+
+
+@receiver(page_published)
+def pregenerar_renditions_al_publicar(sender, instance, **kwargs):
+    renditions.generar_en_segundo_plano(renditions.ids_para_pagina(instance))
+
+
+@receiver(post_save, sender=Autoridad)
+def pregenerar_renditions_autoridad(sender, instance, **kwargs):
+    if instance.foto_id:
+        specs = renditions.specs_en_templates().get(("home/institutional_page.html", "aut.foto"), ())
+        renditions.generar_en_segundo_plano([(instance.foto_id, s) for s in specs])
@@ -0,0 +1,126 @@
+"""
+Host → Site de Wagtail en memoria.
+
+Wagtail busca el Site de cada request con una consulta (Site.find_for_request) y el
+menú pedía además el sitio por defecto. Acá los Site se cargan una vez por proceso
+y LogHostMiddleware deja el Site resuelto en el request, donde Wagtail lo encuentra.
+Cada request recibe instancias nuevas del Site y su página raíz (sin .specific ni
+relaciones cacheadas de otro request), así el contenido de la raíz siempre es el publicado.
+Al guardar o borrar un Site se sube la versión "sitios" (home.cache_deps); cada
+worker la revisa cada MEMORY_TABLES_RECHECK_SECONDS, como la tabla de redirects.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.http.request import split_domain_port
+from wagtail.models import Site
+
+from home import cache_deps
+
+logger = logging.getLogger(__name__)
+
+DEP_SITIOS = "sitios"
+
+# Tope de (hostname, puerto) resueltos que se recuerdan (el Host lo elige el cliente)
+MAX_HOSTS = 1000
+
+
+def _copia(instancia):
+    """Instancia nueva con los mismos valores, como si viniera de la base (sin cachés)."""
+    campos = [f.attname for f in instancia._meta.concrete_fields]
+    return type(instancia).from_db(instancia._state.db, campos, [getattr(instancia, c) for c in campos])
+
+
+def _copia_site(site):
+    if site is None:
+        return None
+    copia = _copia(site)
+    copia.root_page = _copia(site.root_page)
+    return copia
+
+
+class MapaSitios:
+    def __init__(self):
+        self.sitios = []  # Site con root_page cargada; no se entregan, se copian
+        self.por_defecto = None
+        self.version = None
+        self._resueltos = {}  # (hostname, puerto) → Site o None
+        self._chequeado = None  # time.monotonic() de la última revisión
+        self._lock = threading.Lock()
+
+    def cargar(self):
+        sitios = list(Site.objects.select_related("root_page").order_by("id"))
+        self.sitios = sitios
+        # Si hay más de uno por defecto (no debería), el último creado, como Wagtail
+        self.por_defecto = next((s for s in reversed(sitios) if s.is_default_site), None)
+        self._resueltos = {}
+
+    def vigente(self):
+        """Recarga los Site si es la primera vez o si cambió la versión "sitios" (revisada cada tanto)."""
+        ahora = time.monotonic()
+        if self._chequeado is not None and ahora - self._chequeado < settings.MEMORY_TABLES_RECHECK_SECONDS:
+            return self
+        with self._lock:
+            if self._chequeado is not None and ahora - self._chequeado < settings.MEMORY_TABLES_RECHECK_SECONDS:
+                return self
+            version = cache_deps.version(DEP_SITIOS)
+            if version != self.version:
+                try:
+                    self.cargar()
+                    self.version = version
+                except Exception:
+                    logger.exception("No se pudieron cargar los sitios")
+            self._chequeado = ahora
+        return self
+
+    def vencido(self):
+        """Si el próximo vigente() va a revisar la versión (y puede consultar caché o base)."""
+        return self._chequeado is None or time.monotonic() - self._chequeado >= settings.MEMORY_TABLES_RECHECK_SECONDS
+
+    def invalidar(self):
+        """Revisar la versión en el próximo request (después de subirla)."""
+        self._chequeado = None
+
+    def es_raiz(self, page_id):
+        return any(s.root_page_id == page_id for s in self.sitios)
+
+    def buscar(self, hostname, port):
+        """El Site (compartido) para hostname:port, con las mismas reglas que Site.find_for_request."""
+        clave = (hostname, port)
+        if clave in self._resueltos:
+            return self._resueltos[clave]
+        candidatos = [s for s in self.sitios if s.hostname == hostname]
+        site = next((s for s in candidatos if s.port == port), None)
+        if site is None:
+            site = next((s for s in candidatos if s.is_default_site), None)
+        if site is None and candidatos and (len(candidatos) == 1 or self.por_defecto is None):
+            site = candidatos[0]
+        site = site or self.por_defecto
+        if len(self._resueltos) >= MAX_HOSTS:
+            self._resueltos = {}
+        self._resueltos[clave] = site
+        return site
+
+    def para_request(self, request):
+        return self.vigente().resolver(request)
+
+    def resolver(self, request):
+        """Como para_request, con los Site ya cargados (sin revisar la versión)."""
+        hostname = split_domain_port(request._get_raw_host())[0]
+        return _copia_site(self.buscar(hostname, request.get_port()))
+
+
+mapa = MapaSitios()
+
+
+def sitio_por_defecto():
+    """El Site por defecto (sin consultar la base)."""
+    return _copia_site(mapa.vigente().por_defecto)
+
+
+def invalidar():
+    """Avisar a todos los workers que recarguen los Site (y a este, en el próximo request)."""
+    cache_deps.bump(DEP_SITIOS)
+    mapa.invalidar()
@@ -0,0 +1,116 @@
+"""
+Perfil del arranque de un worker (ver el comando profile_startup).
+
+arrancar() corre en un proceso nuevo lo mismo que hace gunicorn al levantar un
+worker: cargar settings, django.setup(), armar el handler WSGI (middlewares), cargar
+las URLs y los hooks de Wagtail, que de otro modo se cargan en el primer request.
+Con -X importtime, agrupar_por_app() suma el tiempo de cada import a la app de
+INSTALLED_APPS a la que pertenece el módulo (o a su paquete de nivel superior).
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+# Fases del arranque; cada una se mide desde el inicio del intérprete
+SCRIPT = r"""
+import json, time
+inicio = time.perf_counter()
+fases = {}
+def marcar(nombre):
+    fases[nombre] = round((time.perf_counter() - inicio) * 1000, 2)
+from django.conf import settings
+settings.INSTALLED_APPS
+marcar("settings")
+import django
+django.setup(set_prefix=False)
+marcar("setup")
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+marcar("wsgi")
+from django.urls import get_resolver
+get_resolver().reverse_dict
+marcar("urls")
+from wagtail import hooks
+hooks.search_for_hooks()
+marcar("hooks")
+print(json.dumps({"fases": fases, "apps": list(settings.INSTALLED_APPS)}))
+"""
+
+FASES = ("settings", "setup", "wsgi", "urls", "hooks")
+
+
+def arrancar(settings_module, importtime=False, cwd=None):
+    """
+    Arranca Django en un proceso nuevo con `settings_module`.
+    Devuelve (ms totales, {fase: ms acumulados}, INSTALLED_APPS, salida de importtime).
+    """
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    comando = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", SCRIPT]
+    inicio = time.perf_counter()
+    proc = subprocess.run(comando, cwd=cwd, env=env, capture_output=True, text=True)
+    total = (time.perf_counter() - inicio) * 1000
+    if proc.returncode != 0:
+        ultima = (proc.stderr.strip().splitlines() or ["sin salida"])[-1]
+        raise RuntimeError(f"{settings_module}: el arranque falló ({ultima})")
+    datos = json.loads(proc.stdout.strip().splitlines()[-1])
+    return round(total, 2), datos["fases"], datos["apps"], proc.stderr
+
+
+def parsear_importtime(salida):
+    """[(módulo, self µs, acumulado µs)] a partir de la salida de -X importtime."""
+    modulos = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:"):
+            continue
+        partes = linea[len("import time:"):].split("|")
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # encabezado
+        modulos.append((partes[2].strip(), int(partes[0]), int(partes[1])))
+    return modulos
+
+
+def app_de(modulo, apps):
+    """La app de INSTALLED_APPS más específica que contiene a `modulo`, o su paquete de nivel superior."""
+    mejor = None
+    for app in apps:
+        if (modulo == app or modulo.startswith(app + ".")) and (mejor is None or len(app) > len(mejor)):
+            mejor = app
+    return mejor or modulo.split(".")[0]
+
+
+def agrupar_por_app(modulos, apps):
+    """{app: {"ms": tiempo propio sumado, "modulos": cantidad}}, de mayor a menor tiempo."""
+    grupos = defaultdict(lambda: {"ms": 0.0, "modulos": 0})
+    for modulo, propio, _ in modulos:
+        grupo = grupos[app_de(modulo, apps)]
+        grupo["ms"] += propio / 1000
+        grupo["modulos"] += 1
+    return {
+        app: {"ms": round(g["ms"], 2), "modulos": g["modulos"]}
+        for app, g in sorted(grupos.items(), key=lambda item: -item[1]["ms"])
+    }
+
+
+def perfilar(settings_module, repeticiones=5, cwd=None):
+    """
+    Perfil de arranque de `settings_module`: mediana de `repeticiones` arranques sin
+    instrumentar (total y por fase) y un arranque con -X importtime para el detalle.
+    """
+    corridas = [arrancar(settings_module, cwd=cwd) for _ in range(max(1, repeticiones))]
+    _, _, apps, salida = arrancar(settings_module, importtime=True, cwd=cwd)
+    modulos = parsear_importtime(salida)
+    return {
+        "settings": settings_module,
+        "total_ms": round(statistics.median(c[0] for c in corridas), 2),
+        "fases": {f: round(statistics.median(c[1][f] for c in corridas), 2) for f in FASES},
+        "modulos_importados": len(modulos),
+        "apps": agrupar_por_app(modulos, apps),
+        "mas_lentos": [
+            {"modulo": m, "ms": round(propio / 1000, 2)}
+            for m, propio, _ in sorted(modulos, key=lambda m: -m[1])[:20]
+        ],
+    }
@@ -0,0 +1,106 @@
+"""
+CSS crítico y tamaños comprimidos de los estáticos (ver el comando build_static).
+
+extraer_criticas() se queda con las reglas de impa_site.css que pintan lo que se ve
+sin scrollear en cualquier página (cabecera, navegación, tabs, carrusel del inicio,
+título del contenido). build_static las guarda en STATIC_ROOT y el tag
+{% estilos_sitio %} las pone inline; el resto de impa_site.css se carga sin bloquear.
+"""
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+CSS_PRINCIPAL = "css/impa_site.css"
+# Generado por build_static en STATIC_ROOT; se lee del disco, no se sirve
+CSS_CRITICO = "css/impa_site.critico.css"
+
+# Una regla es crítica si alguno de sus selectores empieza con uno de estos
+SELECTORES_CRITICOS = (
+    ":root",
+    "*",
+    "html",
+    "body",
+    ".site-header",
+    ".site-logo",
+    ".site-nav",
+    ".site-tabs",
+    ".home-carousel",
+    ".home-main",
+    ".main-content",
+)
+
+
+def _bloques(css):
+    """[(prelude, cuerpo)] de las reglas de primer nivel (el cuerpo de un @media queda sin parsear)."""
+    bloques = []
+    profundidad = 0
+    inicio = apertura = 0
+    for i, ch in enumerate(css):
+        if ch == "{":
+            if profundidad == 0:
+                apertura = i
+            profundidad += 1
+        elif ch == "}":
+            profundidad -= 1
+            if profundidad == 0:
+                bloques.append((css[inicio:apertura].strip(), css[apertura + 1 : i]))
+                inicio = i + 1
+    return bloques
+
+
+def _es_critica(selectores, prefijos):
+    for selector in selectores.split(","):
+        partes = selector.split()
+        if partes and partes[0].startswith(prefijos):
+            return True
+    return False
+
+
+def _minificar(texto, selector=False):
+    texto = re.sub(r"\s+", " ", texto).strip()
+    if selector:
+        # En selectores el espacio antes de ":" es un combinador (".a :hover"): no tocarlo
+        return re.sub(r"\s*([,>])\s*", r"\1", texto)
+    return re.sub(r"\s*([;:,])\s*", r"\1", texto).rstrip(";")
+
+
+def extraer_criticas(css, prefijos=SELECTORES_CRITICOS):
+    """Las reglas críticas de `css`, minificadas. Las de un @media quedan dentro de su @media."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    salida = []
+    for prelude, cuerpo in _bloques(css):
+        if prelude.startswith("@media"):
+            internas = extraer_criticas(cuerpo, prefijos)
+            if internas:
+                media = re.sub(r"\s+", " ", prelude)
+                salida.append(f"{media}{{{internas}}}")
+        elif not prelude.startswith("@") and _es_critica(prelude, prefijos):
+            salida.append(f"{_minificar(prelude, selector=True)}{{{_minificar(cuerpo)}}}")
+    return "".join(salida)
+
+
+@lru_cache(maxsize=1)
+def css_critico():
+    """El CSS crítico generado por build_static ("" si no se generó)."""
+    try:
+        return (Path(settings.STATIC_ROOT) / CSS_CRITICO).read_text(encoding="utf-8")
+    except OSError:
+        return ""
+
+
+def tamanos(raiz, rutas):
+    """{ruta: {"bytes", "gzip", "brotli"}} de cada archivo de `rutas` en `raiz` (None si falta la variante)."""
+    resultado = {}
+    for ruta in rutas:
+        archivo = Path(raiz) / ruta
+        if not archivo.exists():
+            continue
+        variantes = {sufijo: archivo.with_name(archivo.name + sufijo) for sufijo in (".gz", ".br")}
+        resultado[ruta] = {
+            "bytes": archivo.stat().st_size,
+            "gzip": variantes[".gz"].stat().st_size if variantes[".gz"].exists() else None,
+            "brotli": variantes[".br"].stat().st_size if variantes[".br"].exists() else None,
+        }
+    return resultado
@@ -3,17 +3,29 @@ Obtiene y lista las radios disponibles en https://imparg.org/stream/
 Parseando la página HTML del servidor Icecast2.
 """
 
+import logging
+import os
 import re
 import urllib.error
 import urllib.request
 from dataclasses import dataclass
 from typing import Optional
 
+try:
+    from impa_site.profiling_middleware import medir_http
+except ImportError:  # ejecutado como script suelto, fuera del proyecto
+    from contextlib import nullcontext as medir_http
+
+logger = logging.getLogger(__name__)
+
 # Base relativa para enlaces de reproducción (mismo dominio: impa.ar o imparg.org)
 STREAM_PUBLIC_BASE = "/stream"
 
 # URLs para obtener el status (probar interna primero si la VM no alcanza imparg.org)
+# STREAM_STATUS_URLS en el entorno (separadas por coma) las reemplaza; ej. el stub de loadtest/
 _STREAM_STATUS_CANDIDATES = [
+    u.strip() for u in os.environ.get("STREAM_STATUS_URLS", "").split(",") if u.strip()
+] or [
     "http://192.168.1.40:3000",   # interna: máquina del stream
     "https://imparg.org/stream",  # pública
 ]
@@ -60,7 +72,7 @@ def obtener_radios_stream(timeout: int = 15) -> list[RadioStream]:
                 url,
                 headers={"User-Agent": "IMPA-Radios-Fetcher/1.0"},
             )
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
+            with medir_http("icecast"), urllib.request.urlopen(req, timeout=timeout) as resp:
                 html = resp.read().decode("utf-8", errors="replace")
             return _parsear_html_icecast(html, stream_base=STREAM_PUBLIC_BASE)
         except Exception as e:
@@ -69,6 +81,93 @@ def obtener_radios_stream(timeout: int = 15) -> list[RadioStream]:
     raise last_error  # type: ignore
 
 
+async def aobtener_radios_stream(timeout: int = 15) -> list[RadioStream]:
+    """
+    Versión async de obtener_radios_stream (con httpx): mientras espera a Icecast
+    no ocupa un thread del servidor. Mismo orden de URLs y mismo resultado.
+    """
+    import httpx
+
+    last_error = None
+    headers = {"User-Agent": "IMPA-Radios-Fetcher/1.0"}
+    async with httpx.AsyncClient(timeout=timeout, headers=headers) as client:
+        for base in _STREAM_STATUS_CANDIDATES:
+            url = base.rstrip("/") + "/"
+            try:
+                with medir_http("icecast"):
+                    resp = await client.get(url)
+                resp.raise_for_status()
+                return _parsear_html_icecast(resp.text, stream_base=STREAM_PUBLIC_BASE)
+            except Exception as e:
+                last_error = e
+                continue
+    raise last_error  # type: ignore
+
+
+# Último status de Icecast en la caché: la página Radios lo muestra en el HTML del
+# servidor (sin JS también se ve) y /radios/estado/ lo refresca
+ESTADO_CACHE_KEY = "radios:estado"
+ESTADO_CACHE_SECONDS = 30
+
+
+# Un solo request por vez consulta a Icecast cuando vence el status (ver aradios_estado)
+ESTADO_LOCK_KEY = "radios:estado:lock"
+ESTADO_ESPERA_SEGUNDOS = 0.25
+
+
+async def aradios_estado(timeout: int = 8) -> list[RadioStream]:
+    """
+    Radios para /radios/estado/: las de la caché o, si vencieron, las de Icecast. Así
+    las consultas a Icecast quedan en una cada ESTADO_CACHE_SECONDS aunque cada visita
+    a la página pida el fragmento. Con la caché vacía, un lock corto (cache.add) deja
+    que consulte un solo request; los demás esperan a que aparezca el status (hasta
+    `timeout`) y si no llega responden sin radios, sin cachearlo.
+    """
+    import asyncio
+
+    from django.core.cache import cache
+
+    radios = await cache.aget(ESTADO_CACHE_KEY)
+    if radios is not None:
+        return radios
+    if not await cache.aadd(ESTADO_LOCK_KEY, True, timeout + 2):
+        for _ in range(int(timeout / ESTADO_ESPERA_SEGUNDOS)):
+            await asyncio.sleep(ESTADO_ESPERA_SEGUNDOS)
+            radios = await cache.aget(ESTADO_CACHE_KEY)
+            if radios is not None:
+                return radios
+        return []
+    try:
+        try:
+            radios = await aobtener_radios_stream(timeout=timeout)
+        except Exception as e:
+            logger.warning("No se pudo obtener radios de imparg.org/stream/: %s", e)
+            radios = []
+        await cache.aset(ESTADO_CACHE_KEY, radios, ESTADO_CACHE_SECONDS)
+    finally:
+        await cache.adelete(ESTADO_LOCK_KEY)
+    return radios
+
+
+def radios_para_pagina(timeout: int = 3) -> list[RadioStream]:
+    """
+    Radios para el primer render de la página: las de la caché o, si no hay, las de
+    Icecast con un timeout corto. Si Icecast no responde también se cachea (lista
+    vacía), para no esperarlo en cada visita.
+    """
+    from django.core.cache import cache
+
+    radios = cache.get(ESTADO_CACHE_KEY)
+    if radios is None:
+        try:
+            radios = obtener_radios_stream(timeout=timeout)
+        except Exception as e:
+            logger.warning("No se pudo obtener radios de imparg.org/stream/: %s", e)
+            radios = []
+        cache.set(ESTADO_CACHE_KEY, radios, ESTADO_CACHE_SECONDS)
+    return radios
+
+
 def _parsear_html_icecast(html: str, stream_base: str = STREAM_PUBLIC_BASE) -> list[RadioStream]:
     """Extrae los mount points del HTML de Icecast."""
     radios: list[RadioStream] = []
@@ -1,8 +1,22 @@
+from typing import NamedTuple
+
 from django import template
-from wagtail.models import Site
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from home import cache_deps
+from home.render_cache import campo_html
+from home.sitios import sitio_por_defecto
+from home.static_assets import CSS_PRINCIPAL, css_critico
+from home.urls_paginas import url_for
 
 register = template.Library()
 
+# Duración máxima de un fragmento cacheado; normalmente se invalida antes por sus dependencias
+FRAGMENT_CACHE_SECONDS = getattr(settings, "FRAGMENT_CACHE_SECONDS", 3600)
+
 
 @register.simple_tag(takes_context=True)
 def can_edit_iglesia_site(context):
@@ -22,22 +36,38 @@ def can_edit_iglesia_site(context):
     return can_edit_church_site(page, user)
 
 
+@register.simple_tag(takes_context=True)
+def userbar(context):
+    """
+    Barra de edición de Wagtail ({% wagtailuserbar %}) para los editores logueados.
+    Sin URLs del admin (settings.public) no hay adónde enlazar: no se muestra.
+    """
+    if not settings.ADMIN_URLS_ENABLED:
+        return ""
+    from wagtail.admin.templatetags.wagtailuserbar import wagtailuserbar
+
+    return wagtailuserbar(context)
+
+
 @register.simple_tag
-def doctrina_articulo_num(stream_value, block_index):
+def estilos_sitio():
     """
-    Para la página Doctrina: devuelve el número de artículo (1-12) en la posición block_index.
-    Cuenta solo bloques de tipo 'heading' hasta esa posición.
-    Uso: {% doctrina_articulo_num page.body forloop.counter0 as num %}
+    Hoja de estilos principal (impa_site.css, con hash en el nombre: no hace falta ?v=).
+    Si build_static generó el CSS crítico, va inline y impa_site.css se carga sin
+    bloquear el render; si no (runserver, sin build), un <link> común.
     """
-    if not stream_value or block_index is None:
-        return 1
-    n = 0
-    for i, block in enumerate(stream_value):
-        if i > block_index:
-            break
-        if getattr(block, "block_type", None) == "heading":
-            n += 1
-    return n if n else 1
+    href = static(CSS_PRINCIPAL)
+    critico = "" if settings.DEBUG else css_critico()
+    if not critico:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+    return format_html(
+        '<style>{}</style>\n'
+        '        <link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '        <noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(critico),
+        href,
+        href,
+    )
 
 
 @register.filter
@@ -51,10 +81,56 @@ def path_startswith(path, prefix):
 @register.simple_tag
 def get_site_menu():
     """Devuelve los hijos publicados de la página raíz para el menú."""
-    site = Site.objects.filter(is_default_site=True).first()
+    site = sitio_por_defecto()
     if not site or not site.root_page_id:
         return []
     try:
         return list(site.root_page.get_children().live())
     except Exception:
         return []
+
+
+@register.simple_tag(takes_context=True)
+def urlpagina(context, page):
+    """
+    Como {% pageurl page %}, pero desde la tabla de URLs en memoria (home/urls_paginas.py):
+    para listados y menú, sin resolver la raíz del sitio por cada ítem.
+    """
+    return url_for(page, context.get("request"))
+
+
+@register.simple_tag(takes_context=True)
+def render_cacheado(context, page, campo, template=None):
+    """
+    HTML de un campo de contenido (StreamField o rich text) cacheado por revisión
+    publicada (home/render_cache.py). Con `template`, el campo se renderiza con ese
+    template (recibe `page` y `valor`).
+
+    Uso:
+        {% render_cacheado page "body" %}
+        {% render_cacheado page "body" "home/includes/institutional_body.html" %}
+    """
+    return campo_html(page, campo, context, template)
+
+
+class Fragmento(NamedTuple):
+    timeout: int
+    version: str
+
+
+@register.simple_tag(takes_context=True)
+def cache_fragmento(context, *deps):
+    """
+    Timeout y versión para el {% cache %} de Django: la versión junta las de las
+    dependencias de home.cache_deps ("noticias", ...) y va como vary-on, así que el
+    fragmento se invalida al cambiar cualquiera de ellas. En la vista previa del admin
+    el contenido no es el publicado: otra clave y timeout 0 (ni se lee ni se guarda).
+
+    Uso:
+        {% cache_fragmento "noticias" as frag %}
+        {% cache frag.timeout "home-noticias" page.pk frag.version %}...{% endcache %}
+    """
+    request = context.get("request")
+    if request is not None and getattr(request, "is_preview", False):
+        return Fragmento(0, "preview")
+    return Fragmento(FRAGMENT_CACHE_SECONDS, cache_deps.versions(*deps) if deps else "")
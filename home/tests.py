@@ -1,6 +1,64 @@
-from home.models import HomePage
+import asyncio
+import json
+import os
+import runpy
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
+from asgiref.sync import AsyncToSync, SyncToAsync
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core import mail
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from home import (
+    benchmarks,
+    cache_deps,
+    exportar,
+    outbox,
+    redirects,
+    render_cache,
+    renditions,
+    rich_text,
+    sitios,
+    startup_profile,
+    static_assets,
+    stream_radios,
+    urls_paginas,
+)
+from home.models import (
+    ContactoPage,
+    EmailSaliente,
+    FormField,
+    HomePage,
+    IglesiaPage,
+    IglesiasIndexPage,
+    InstitutionalPage,
+    NoticiaPage,
+    NoticiasIndexPage,
+    RadiosIndexPage,
+)
+from home.signals import DEP_NOTICIAS, DEP_PAGINAS
+from impa_site.profiling_middleware import QueryBudgetExceeded
+from loadtest.escenarios import correr, get
+from loadtest.stubs import Falla, IcecastStub, IntranetStub, RssStub
+from search.diferido import indexado_diferido
+
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
 from wagtail.models import Page, Site
+from wagtail.rich_text import expand_db_html
 from wagtail.test.utils import WagtailPageTestCase
 
 
@@ -40,3 +98,887 @@ class HomeTests(WagtailPageTestCase):
     def test_homepage_template_used(self):
         response = self.client.get(self.homepage.url)
         self.assertTemplateUsed(response, "home/home_page.html")
+
+    def test_latest_news_fragment_invalidated_on_publish(self):
+        index = NoticiasIndexPage(title="Noticias", slug="noticias")
+        self.homepage.add_child(instance=index)
+        self.assertNotContains(self.client.get(self.homepage.url), "Noticia nueva")
+        noticia = NoticiaPage(title="Noticia nueva", date=date(2026, 3, 1))
+        index.add_child(instance=noticia)
+        noticia.save_revision().publish()
+        self.assertContains(self.client.get(self.homepage.url), "Noticia nueva")
+
+
+class CacheDepsTests(TestCase):
+    """
+    Tests for dependency versions in home.cache_deps.
+    """
+
+    def test_bump_and_eviction_never_reuse_a_version(self):
+        antes = cache_deps.version("test")
+        cache_deps.bump("test")
+        despues = cache_deps.version("test")
+        self.assertNotEqual(antes, despues)
+        # La caché desaloja la clave: no vuelve a ninguna versión anterior
+        caches["default"].delete("deps:test")
+        self.assertNotIn(cache_deps.versions("test"), (antes, despues))
+        self.assertEqual(cache_deps.versions("test"), cache_deps.version("test"))
+
+
+class GunicornConfigTests(TestCase):
+    """
+    Tests for the worker sizing and env overrides in gunicorn.conf.py.
+    """
+
+    def cargar(self, **env):
+        with mock.patch.dict("os.environ", env):
+            return runpy.run_path(str(settings.BASE_DIR / "gunicorn.conf.py"))
+
+    def test_workers_limitados_por_memoria(self):
+        calcular = self.cargar()["calcular_workers"]
+        self.assertEqual(calcular(8, None), 8)
+        self.assertEqual(calcular(2, None, "sync"), 5)
+        self.assertEqual(calcular(8, 1024), 2)  # (1024 - 512) // 200
+        self.assertEqual(calcular(4, 256), 1)
+
+    def test_lee_gunicorn_del_env(self):
+        carpeta = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, carpeta, ignore_errors=True)
+        shutil.copy(settings.BASE_DIR / "gunicorn.conf.py", carpeta)
+        (carpeta / ".env").write_text("GUNICORN_WORKERS=5\nGUNICORN_THREADS=2\n")
+        with mock.patch.dict("os.environ", {"GUNICORN_THREADS": "3"}):
+            config = runpy.run_path(str(carpeta / "gunicorn.conf.py"))
+        # El entorno del proceso (ej. Environment= de systemd) gana sobre .env
+        self.assertEqual((config["workers"], config["threads"]), (5, 3))
+
+    def test_uvicorn_sirve_asgi_sin_threads(self):
+        config = self.cargar(GUNICORN_WORKER_CLASS="uvicorn", GUNICORN_WORKERS="3")
+        self.assertEqual(config["worker_class"], "uvicorn_worker.UvicornWorker")
+        self.assertEqual(config["wsgi_app"], "impa_site.asgi:application")
+        self.assertEqual((config["workers"], config["threads"]), (3, 1))
+        self.assertTrue(config["preload_app"])
+        self.assertFalse(self.cargar(GUNICORN_WORKER_CLASS="gevent")["preload_app"])
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfilingTests(WagtailPageTestCase):
+    """
+    Tests for the opt-in profiling middleware.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        self.homepage = HomePage(title="Home")
+        root_page.add_child(instance=self.homepage)
+        Site.objects.create(hostname="testsite", root_page=self.homepage, is_default_site=True)
+
+    def test_server_timing_header(self):
+        with self.assertLogs("impa_site.profiling", "INFO") as logs:
+            response = self.client.get("/")
+        self.assertIn("sql;dur=", response["Server-Timing"])
+        self.assertIn("render;dur=", response["Server-Timing"])
+        self.assertIn('"path": "/"', logs.output[0])
+
+    @override_settings(PROFILING_QUERY_BUDGETS={r"^/$": 1}, PROFILING_QUERY_BUDGET_RAISE=True)
+    def test_query_budget_exceeded(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get("/")
+
+    async def test_asgi_request_counts_sql_run_in_the_view_thread(self):
+        with self.assertLogs("impa_site.profiling", "INFO") as logs:
+            response = await self.async_client.get("/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(json.loads(logs.records[0].getMessage())["sql_count"], 0)
+
+
+class NoticiasIndexTests(WagtailPageTestCase):
+    """
+    Tests for keyset pagination of the news index.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        self.index = NoticiasIndexPage(title="Noticias", slug="noticias")
+        homepage.add_child(instance=self.index)
+        # Dos noticias con la misma fecha para probar el desempate por id
+        for i, dia in enumerate([1, 2, 2, 3, 4]):
+            self.index.add_child(instance=NoticiaPage(title=f"Noticia {i}", date=date(2026, 3, dia)))
+
+    def test_keyset_pages_cover_all_news_once(self):
+        vistas = []
+        cursor = None
+        while True:
+            noticias, cursor = self.index.get_noticias_pagina(cursor=cursor, limit=2)
+            vistas.extend(n.title for n in noticias)
+            if not cursor:
+                break
+        self.assertEqual(vistas, ["Noticia 4", "Noticia 3", "Noticia 2", "Noticia 1", "Noticia 0"])
+
+    def test_deep_page_uses_single_query(self):
+        _, cursor = self.index.get_noticias_pagina(limit=3)
+        with self.assertNumQueries(1):
+            noticias, _ = self.index.get_noticias_pagina(cursor=cursor, limit=3)
+            [(n.title, n.date, n.url_path) for n in noticias]
+
+    def test_index_renders_next_link(self):
+        response = self.client.get(self.index.url, {"n": 2})
+        self.assertEqual(len(response.context["noticias"]), 2)
+        self.assertContains(response, "?n=2&amp;desde=")
+        siguiente = self.client.get(self.index.url, {"n": 2, "desde": response.context["cursor_siguiente"]})
+        self.assertEqual([n.title for n in siguiente.context["noticias"]], ["Noticia 2", "Noticia 1"])
+        self.assertContains(siguiente, 'href="/noticias/?n=2"')
+
+
+class RichTextTests(WagtailPageTestCase):
+    """
+    Tests for batched rich text link and image resolution.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        caches["renditions"].clear()
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        self.index = NoticiasIndexPage(title="Noticias", slug="noticias")
+        homepage.add_child(instance=self.index)
+        self.iglesias = IglesiasIndexPage(title="Iglesias", slug="iglesias")
+        homepage.add_child(instance=self.iglesias)
+
+    def test_links_resolve_from_url_table(self):
+        intros = [f'<p><a linktype="page" id="{p.pk}">ver</a></p>' for p in (self.index, self.iglesias)] * 3
+        Site.get_site_root_paths()
+        urls_paginas.tabla.vigente()
+        with self.assertNumQueries(0):
+            html = [expand_db_html(intro) for intro in intros]
+        self.assertEqual(html[0], f'<p><a href="{self.index.url}">ver</a></p>')
+        self.assertEqual(html[1], f'<p><a href="{self.iglesias.url}">ver</a></p>')
+
+    def test_precargar_batches_images_across_fragments(self):
+        fotos = [get_image_model().objects.create(title=f"Foto {i}", file=get_test_image_file()) for i in range(3)]
+        for foto in fotos:
+            foto.get_rendition("width-500")  # formato "left"
+        caches["renditions"].clear()
+        intros = [f'<embed embedtype="image" id="{foto.pk}" format="left" alt="foto"/>' for foto in fotos]
+        token = rich_text._memo.set({})
+        self.addCleanup(rich_text._memo.reset, token)
+        with self.assertNumQueries(2):  # imágenes y renditions, para todos los fragmentos
+            rich_text.precargar(intros)
+        with self.assertNumQueries(0):
+            html = [expand_db_html(intro) for intro in intros]
+        self.assertIn(fotos[2].get_rendition("width-500").url, html[2])
+
+    def test_listing_image_expands_only_the_image(self):
+        image = get_image_model().objects.create(title="Foto", file=get_test_image_file())
+        noticia = NoticiaPage(
+            title="Con foto",
+            date=date(2026, 3, 1),
+            body=f'<p><a linktype="page" id="{self.iglesias.pk}">x</a></p>'
+            f'<embed embedtype="image" id="{image.pk}" format="left" alt="foto"/>',
+        )
+        self.index.add_child(instance=noticia)
+        url = noticia.get_imagen_listing_url()
+        self.assertEqual(url, image.get_rendition("width-500").url)
+
+
+class DoctrinaTests(WagtailPageTestCase):
+    """
+    Tests for article numbering on the Doctrina page.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        self.page = InstitutionalPage(
+            title="Doctrina",
+            tipo="doctrina",
+            body=[
+                ("heading", "De Dios"),
+                ("paragraph", "<p>Texto</p>"),
+                ("heading", "De la Biblia"),
+                ("paragraph", "<p>Texto</p>"),
+                ("heading", "Del hombre"),
+            ],
+        )
+        homepage.add_child(instance=self.page)
+
+    def test_articles_numbered_in_order(self):
+        bloques, indice = self.page.get_body_blocks()
+        self.assertEqual([numero for _, numero, _ in bloques], [1, None, 2, None, 3])
+        self.assertEqual(indice[1], (2, "De la Biblia", "articulo-2"))
+
+    def test_page_renders_numbers_and_index(self):
+        response = self.client.get(self.page.url)
+        self.assertContains(response, 'id="articulo-3"')
+        self.assertContains(response, 'href="#articulo-2"')
+
+
+class RenderCacheTests(WagtailPageTestCase):
+    """
+    Tests for the revision-keyed body render cache.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        self.page = InstitutionalPage(
+            title="Doctrina",
+            tipo="doctrina",
+            body=[("heading", "De Dios"), ("paragraph", "<p>Primera</p>"), ("heading", "De la Biblia")],
+        )
+        homepage.add_child(instance=self.page)
+        self.page.save_revision().publish()
+        cache_deps.bump(render_cache.DEP_RENDER)
+
+    def test_unchanged_page_skips_block_rendering(self):
+        self.assertContains(self.client.get(self.page.url), 'href="#articulo-2"')
+        with mock.patch.object(InstitutionalPage, "get_body_blocks") as get_body_blocks:
+            response = self.client.get(self.page.url)
+        get_body_blocks.assert_not_called()
+        self.assertContains(response, 'id="articulo-2"')
+        self.assertContains(response, "Primera")
+
+    def test_publishing_renders_new_revision(self):
+        self.client.get(self.page.url)
+        self.page.body = [("paragraph", "<p>Segunda</p>")]
+        self.page.save_revision().publish()
+        response = self.client.get(self.page.url)
+        self.assertContains(response, "Segunda")
+        self.assertNotContains(response, "Primera")
+
+    def test_image_change_invalidates_rendered_bodies(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        clave = render_cache.clave(self.page, "body")
+        image = get_image_model().objects.create(title="Foto", file=get_test_image_file())
+        self.assertNotEqual(render_cache.clave(self.page, "body"), clave)
+        clave = render_cache.clave(self.page, "body")
+        image.set_focal_point(None)
+        image.save()
+        self.assertNotEqual(render_cache.clave(self.page, "body"), clave)
+
+
+class UrlTableTests(WagtailPageTestCase):
+    """
+    Tests for the in-memory page URL table.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        self.index = IglesiasIndexPage(title="Iglesias", slug="iglesias")
+        homepage.add_child(instance=self.index)
+        self.iglesias = [IglesiaPage(title=f"Iglesia {i}", slug=f"iglesia-{i}") for i in range(3)]
+        for iglesia in self.iglesias:
+            self.index.add_child(instance=iglesia)
+
+    def test_urls_for_matches_page_url_without_queries(self):
+        urls_paginas.tabla.vigente()
+        with self.assertNumQueries(0):
+            urls = urls_paginas.urls_for(self.iglesias)
+        self.assertEqual(urls, {i.pk: i.url for i in self.iglesias})
+
+    def test_slug_change_updates_table(self):
+        urls_paginas.tabla.vigente()
+        iglesia = self.iglesias[0]
+        iglesia.slug = "renombrada"
+        with self.captureOnCommitCallbacks(execute=True):
+            iglesia.save_revision().publish()
+        self.assertTrue(urls_paginas.url_for(iglesia).endswith("/iglesias/renombrada/"))
+
+    def test_listing_uses_table(self):
+        response = self.client.get("/iglesias/", HTTP_HOST="testsite")
+        self.assertContains(response, 'href="/iglesias/iglesia-2/"')
+
+
+class RedirectTableTests(WagtailPageTestCase):
+    """
+    Tests for the in-memory redirect table.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        index = IglesiasIndexPage(title="Iglesias", slug="iglesias")
+        homepage.add_child(instance=index)
+        self.iglesia = IglesiaPage(title="Añelo", slug="añelo")
+        index.add_child(instance=self.iglesia)
+        # La tabla es global al proceso: que no quede la de otro test
+        redirects.invalidar()
+        self.addCleanup(redirects.invalidar)
+
+    def test_ascii_variant_redirects_without_queries(self):
+        redirects.tabla.vigente()
+        with self.assertNumQueries(0):
+            response = self.client.get("/iglesias/anelo/")
+        self.assertRedirects(response, "/iglesias/a%C3%B1elo/", status_code=301, fetch_redirect_response=False)
+
+    def test_live_page_is_not_redirected(self):
+        response = self.client.get("/iglesias/añelo/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_slug_change_adds_redirect(self):
+        self.client.get("/")  # tabla armada antes del cambio
+        self.iglesia.slug = "anelo-centro"
+        with self.captureOnCommitCallbacks(execute=True):  # Wagtail avisa el cambio de slug al commit
+            self.iglesia.save_revision().publish()
+        self.assertTrue(Redirect.objects.filter(old_path="/iglesias/añelo").exists())
+        response = self.client.get("/iglesias/añelo/")
+        self.assertRedirects(response, "/iglesias/anelo-centro/", status_code=301, fetch_redirect_response=False)
+
+    def test_content_only_publish_keeps_the_table(self):
+        self.iglesia.save_revision().publish()  # ya estaba publicada (add_child)
+        version = cache_deps.version(redirects.DEP_REDIRECTS)
+        self.iglesia.title = "Añelo Centro"
+        self.iglesia.save_revision().publish()
+        self.assertEqual(cache_deps.version(redirects.DEP_REDIRECTS), version)
+        self.iglesia.unpublish()
+        self.assertNotEqual(cache_deps.version(redirects.DEP_REDIRECTS), version)
+
+    def test_bulk_publish_rebuilds_the_table_once(self):
+        version = cache_deps.version(redirects.DEP_REDIRECTS)
+        with mock.patch.object(redirects, "invalidar", wraps=redirects.invalidar) as invalidar:
+            with self.captureOnCommitCallbacks(execute=True), indexado_diferido():
+                for n in range(3):
+                    iglesia = IglesiaPage(title=f"Iglesia {n}", live=False)
+                    self.iglesia.get_parent().add_child(instance=iglesia)
+                    iglesia.save_revision().publish()
+                self.assertEqual(cache_deps.version(redirects.DEP_REDIRECTS), version)
+        invalidar.assert_called_once_with()
+
+
+class HostMiddlewareTests(WagtailPageTestCase):
+    """
+    Tests for in-memory Site resolution and the canonical-host redirect.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        self.homepage = HomePage(title="Home")
+        root_page.add_child(instance=self.homepage)
+        Site.objects.create(hostname="testsite", root_page=self.homepage, is_default_site=True)
+
+    def test_site_resolved_without_queries(self):
+        sitios.mapa.vigente()
+        with self.assertNumQueries(0):
+            site = sitios.mapa.buscar("otro-host", 80)
+        self.assertEqual(site.hostname, "testsite")
+
+    def test_site_save_reloads_map(self):
+        Site.objects.create(hostname="impa.ar", root_page=self.homepage)
+        self.assertEqual(sitios.mapa.vigente().buscar("impa.ar", 443).hostname, "impa.ar")
+
+    @override_settings(CANONICAL_HOST="imparg.org")
+    def test_canonical_host_redirect(self):
+        response = self.client.get("/noticias/?desde=x", HTTP_HOST="www.impa.ar")
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response["Location"], "https://imparg.org/noticias/?desde=x")
+        # Chequeos locales y POST no se redirigen
+        self.assertEqual(self.client.get("/", HTTP_HOST="127.0.0.1").status_code, 200)
+        self.assertNotEqual(self.client.post("/", HTTP_HOST="www.impa.ar").status_code, 301)
+
+
+class PruneRevisionsTests(WagtailPageTestCase):
+    """
+    Tests for the revision retention command.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        self.page = IglesiaPage(title="Iglesia", slug="iglesia")
+        homepage.add_child(instance=self.page)
+        self.revisiones = [self.page.save_revision() for _ in range(6)]
+        self.revisiones[1].publish()
+        self.programada = self.revisiones[0]
+        self.programada.approved_go_live_at = timezone.now() + timedelta(days=1)
+        self.programada.save()
+        self.revisiones.append(self.page.save_revision())
+
+    def test_keeps_latest_live_and_scheduled(self):
+        salida = StringIO()
+        call_command("prune_revisions", conservar=2, lote=2, pausa=0, stdout=salida)
+        self.page.refresh_from_db()
+        quedan = set(self.page.revisions.values_list("pk", flat=True))
+        esperadas = {self.revisiones[-1].pk, self.revisiones[-2].pk, self.page.live_revision_id, self.programada.pk}
+        self.assertEqual(quedan, esperadas)
+        self.assertIn("Borradas: 3 revisiones", salida.getvalue())
+
+    def test_dry_run_deletes_nothing(self):
+        antes = self.page.revisions.count()
+        salida = StringIO()
+        call_command("prune_revisions", conservar=2, dry_run=True, stdout=salida)
+        self.assertEqual(self.page.revisions.count(), antes)
+        self.assertIn("Se borrarían: 3 revisiones", salida.getvalue())
+
+
+class EmailOutboxTests(WagtailPageTestCase):
+    """
+    Tests for the contact form email outbox.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        self.contacto = ContactoPage(title="Contacto", slug="contacto", to_address="secretaria@imparg.org", subject="Consulta")
+        homepage.add_child(instance=self.contacto)
+        FormField.objects.create(page=self.contacto, label="Nombre", field_type="singleline")
+
+    def test_submission_queues_email_without_sending(self):
+        response = self.client.post(self.contacto.url, {"nombre": "Ana"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = EmailSaliente.objects.get()
+        self.assertEqual((email.estado, email.destinatarios), (EmailSaliente.PENDIENTE, "secretaria@imparg.org"))
+        self.assertIn("Nombre: Ana", email.cuerpo)
+
+        self.assertEqual(outbox.enviar_pendientes(), {"enviados": 1, "reintentos": 0, "fallidos": 0})
+        self.assertEqual(mail.outbox[0].subject, "Consulta")
+        self.assertEqual(EmailSaliente.objects.get().estado, EmailSaliente.ENVIADO)
+
+    @override_settings(OUTBOX_RETRY_DELAYS=[0])
+    def test_failed_send_is_retried_then_given_up(self):
+        email = outbox.encolar("Consulta", "Hola", ["secretaria@imparg.org"])
+        with mock.patch("django.core.mail.EmailMessage.send", side_effect=OSError("SMTP caído")):
+            self.assertEqual(outbox.enviar_pendientes()["reintentos"], 1)
+            self.assertEqual(outbox.enviar_pendientes()["fallidos"], 1)
+        email.refresh_from_db()
+        self.assertEqual((email.estado, email.intentos, email.ultimo_error), (EmailSaliente.FALLIDO, 2, "SMTP caído"))
+
+
+class ExportTests(WagtailPageTestCase):
+    """
+    Tests for the streaming CSV/JSONL exports.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        index = IglesiasIndexPage(title="Iglesias", slug="iglesias")
+        homepage.add_child(instance=index)
+        for ciudad in ["Viedma", "Chimpay", "Neuquén"]:
+            index.add_child(instance=IglesiaPage(title=f"Iglesia {ciudad}", ciudad=ciudad))
+        self.contacto = ContactoPage(title="Contacto", slug="contacto")
+        homepage.add_child(instance=self.contacto)
+        FormField.objects.create(page=self.contacto, label="Nombre", field_type="singleline")
+        FormField.objects.create(page=self.contacto, label="Mensaje", field_type="multiline")
+        self.contacto.get_submission_class().objects.create(page=self.contacto, form_data={"nombre": "Ana", "mensaje": "Hola"})
+
+    def test_rows_read_in_keyset_batches(self):
+        with self.assertNumQueries(3):  # lotes de 2: [2, 1] y listo (más las raíces de Site)
+            filas = list(exportar.filas_iglesias(lote=2))
+        self.assertEqual([f["ciudad"] for f in filas], ["Viedma", "Chimpay", "Neuquén"])
+        self.assertTrue(filas[0]["url"].endswith("/iglesias/iglesia-viedma/"))
+
+    def test_admin_csv_export_streams(self):
+        self.assertEqual(self.client.get("/admin/exportar/iglesias.csv").status_code, 302)  # login del admin
+        self.login()
+        response = self.client.get("/admin/exportar/iglesias.csv")
+        self.assertTrue(response.streaming)
+        lineas = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual(lineas[0].split(",")[:3], ["id", "titulo", "nombre"])
+        self.assertEqual(len(lineas), 4)
+
+    def test_church_export_requires_change_permission(self):
+        editor = self.create_user("editor", password="clave")
+        editor.user_permissions.add(Permission.objects.get(codename="access_admin"))
+        self.client.force_login(editor)
+        self.assertEqual(self.client.get("/admin/exportar/iglesias.csv").status_code, 403)
+        editor.user_permissions.add(Permission.objects.get(codename="change_iglesiapage"))
+        self.assertEqual(self.client.get("/admin/exportar/iglesias.csv").status_code, 200)
+
+    def test_csv_neutralizes_formulas(self):
+        lineas = list(exportar.csv_lineas(["nombre", "monto"], [{"nombre": "=HYPERLINK(\"x\")", "monto": -3}]))
+        self.assertEqual(lineas[1], "\"'=HYPERLINK(\"\"x\"\")\",-3\r\n")
+
+    def test_form_submissions_jsonl(self):
+        self.login()
+        response = self.client.get(f"/admin/exportar/formularios/{self.contacto.pk}.jsonl")
+        fila = json.loads(b"".join(response.streaming_content))
+        self.assertEqual((fila["nombre"], fila["mensaje"]), ("Ana", "Hola"))
+        self.assertEqual(exportar.columnas_envios([self.contacto.pk]), ["id", "pagina", "fecha", "nombre", "mensaje"])
+
+    def test_form_field_named_like_a_fixed_column(self):
+        FormField.objects.create(page=self.contacto, label="Fecha", field_type="date")
+        envio = self.contacto.get_submission_class().objects.create(
+            page=self.contacto, form_data={"nombre": "Ana", "id": "999", "fecha": "2020-01-01"}
+        )
+        columnas = exportar.columnas_envios([self.contacto.pk])
+        self.assertEqual(columnas, ["id", "pagina", "fecha", "nombre", "mensaje", "campo_fecha"])
+        fila = list(exportar.filas_envios([self.contacto.pk]))[-1]
+        self.assertEqual((fila["id"], fila["pagina"]), (envio.pk, self.contacto.pk))
+        self.assertEqual((fila["campo_id"], fila["campo_fecha"]), ("999", "2020-01-01"))
+        self.assertNotEqual(fila["fecha"], "2020-01-01")
+
+
+class ApiTests(WagtailPageTestCase):
+    """
+    Tests for the cached read-only JSON API.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        self.index = IglesiasIndexPage(title="Iglesias", slug="iglesias")
+        homepage.add_child(instance=self.index)
+        for ciudad, provincia in [("Viedma", "Río Negro"), ("Neuquén", "Neuquén"), ("Chimpay", "Río Negro")]:
+            self.index.add_child(
+                instance=IglesiaPage(title=f"Iglesia {ciudad}", ciudad=ciudad, provincia=provincia, pastor_email="p@x.org")
+            )
+        # Las versiones siguen en la caché entre tests (la base no): no reusar respuestas de otro test
+        cache_deps.bump(DEP_PAGINAS, DEP_NOTICIAS)
+
+    def test_filter_fields_and_keyset_pages(self):
+        response = self.client.get("/api/v1/churches/", {"provincia": "río negro", "campos": "titulo,pastor_email", "limite": 1})
+        datos = response.json()
+        self.assertEqual(datos["results"], [{"titulo": "Iglesia Viedma", "pastor_email": ""}])
+        siguiente = self.client.get(datos["next"]).json()
+        self.assertEqual([r["titulo"] for r in siguiente["results"]], ["Iglesia Chimpay"])
+        self.assertIsNone(siguiente["next"])
+        self.assertEqual(self.client.get("/api/v1/churches/", {"campos": "clave"}).status_code, 400)
+
+    def test_etag_and_invalidation_on_publish(self):
+        response = self.client.get("/api/v1/churches/")
+        etag = response["ETag"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/v1/churches/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        nueva = IglesiaPage(title="Iglesia Cipolletti", ciudad="Cipolletti")
+        self.index.add_child(instance=nueva)
+        nueva.save_revision().publish()
+        response = self.client.get("/api/v1/churches/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 4)
+
+    def test_unknown_params_share_the_cached_response(self):
+        primera = self.client.get("/api/v1/churches/", {"provincia": "Río Negro ", "limite": 1})
+        with self.assertNumQueries(0):
+            otra = self.client.get("/api/v1/churches/", {"provincia": "río negro", "limite": "1", "x": "2"})
+        self.assertEqual(otra["ETag"], primera["ETag"])
+        self.assertNotIn("x=", otra.json()["next"])
+
+    def test_radios_without_icecast(self):
+        with mock.patch("home.stream_radios.aobtener_radios_stream", side_effect=OSError("sin stream")):
+            response = self.client.get("/api/v1/radios/")
+        self.assertEqual(response.json(), {"results": [], "en_vivo": []})
+
+
+class RenditionsTests(TestCase):
+    """
+    Tests for rendition pre-generation.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        # las renditions cacheadas por otros tests apuntan a imágenes con los mismos IDs
+        caches["renditions"].clear()
+
+    def test_every_template_image_has_an_origin(self):
+        self.assertEqual(
+            [clave for clave in renditions.specs_en_templates() if clave not in renditions.ORIGENES],
+            [],
+        )
+
+    def test_local_renditions_cache_clears_when_images_change(self):
+        local = renditions.CacheRenditionsLocal("test-renditions", {})
+        self.addCleanup(local.clear)
+        self.assertIsNone(local.get("rendition"))  # primera lectura: toma la versión
+        local.set("rendition", "fill-400x220")
+        cache_deps.bump(renditions.DEP_IMAGENES)  # otro worker borró renditions
+        # Dentro de MEMORY_TABLES_RECHECK_SECONDS no consulta la versión
+        self.assertEqual(local.get("rendition"), "fill-400x220")
+        local.invalidar()
+        self.assertIsNone(local.get("rendition"))
+        local.set("rendition", "fill-400x220")
+        self.assertEqual(local.get_many(["rendition"]), {"rendition": "fill-400x220"})
+
+    def test_generar_rendition_only_once(self):
+        image = get_image_model().objects.create(title="Foto", file=get_test_image_file())
+        self.assertEqual(renditions.generar_rendition(image.pk, "fill-400x220"), "creada")
+        self.assertEqual(renditions.generar_rendition(image.pk, "fill-400x220"), "existente")
+        self.assertEqual(image.renditions.filter(filter_spec="fill-400x220").count(), 1)
+
+    def test_todas_regenerates_renditions_with_missing_files(self):
+        image = get_image_model().objects.create(title="Foto", file=get_test_image_file())
+        rendition = image.get_rendition("fill-400x220")
+        rendition.file.storage.delete(rendition.file.name)
+        self.assertEqual(renditions.generar_rendition(image.pk, "fill-400x220"), "existente")
+        self.assertEqual(renditions.generar_rendition(image.pk, "fill-400x220", verificar_archivo=True), "regenerada")
+        nueva = image.renditions.get(filter_spec="fill-400x220")
+        self.assertTrue(nueva.file.storage.exists(nueva.file.name))
+        self.assertEqual(renditions.generar_rendition(image.pk, "fill-400x220", verificar_archivo=True), "existente")
+
+    def test_publish_pregeneration_uses_one_queue_thread(self):
+        liberar = threading.Event()
+        generadas = []
+
+        def generar(image_id, spec):
+            liberar.wait(5)
+            generadas.append((image_id, spec))
+            return "creada"
+
+        with mock.patch.object(renditions, "generar_rendition", generar):
+            with self.captureOnCommitCallbacks(execute=True):
+                for n in range(20):  # una publicación masiva: 20 páginas con 5 imágenes
+                    renditions.generar_en_segundo_plano([(n % 5, "fill-400x220")])
+            self.assertEqual(len([t for t in threading.enumerate() if t.name == "renditions"]), 1)
+            liberar.set()
+            renditions._cola.join()
+        self.assertEqual(sorted(generadas), [(n, "fill-400x220") for n in range(5)])
+
+    def test_request_time_rendition_rechecks_inside_lock(self):
+        Image = get_image_model()
+        image = Image.objects.create(title="Foto", file=get_test_image_file())
+        image.get_rendition("fill-400x220")
+        # Otro request que no la vio al buscarla (la creó otro worker mientras tanto)
+        otra = Image.objects.get(pk=image.pk)
+        with (
+            mock.patch.object(Image, "find_existing_rendition", side_effect=image.renditions.model.DoesNotExist),
+            mock.patch.object(Image, "generate_rendition_file") as generar,
+        ):
+            otra.get_rendition("fill-400x220")
+        generar.assert_not_called()
+        self.assertEqual(image.renditions.filter(filter_spec="fill-400x220").count(), 1)
+
+    def test_listing_renditions_load_in_constant_queries(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        index = NoticiasIndexPage(title="Noticias", slug="noticias")
+        homepage.add_child(instance=index)
+        for i in range(4):
+            image = get_image_model().objects.create(title=f"Foto {i}", file=get_test_image_file())
+            image.get_rendition("fill-400x220")
+            index.add_child(instance=NoticiaPage(title=f"Noticia {i}", date=date(2026, 3, i + 1), imagen_destacada=image))
+        # página Noticias + noticias + imágenes + renditions, sin importar cuántas noticias haya
+        with self.assertNumQueries(4):
+            noticias = homepage.get_ultimas_noticias()
+            urls = [n.imagen_destacada.get_rendition("fill-400x220").url for n in noticias]
+        self.assertEqual(len(urls), 4)
+
+
+class BenchmarkTests(TestCase):
+    """
+    Smoke test for the synthetic-site benchmark harness.
+    """
+
+    def test_synthetic_site_pages_render(self):
+        urls = benchmarks.construir_sitio(iglesias=6, noticias=30, micrositios=2)
+        resultados = benchmarks.medir_paginas(urls, repeticiones=1)
+        self.assertEqual({nombre: r["status"] for nombre, r in resultados.items()}, {nombre: 200 for nombre in urls})
+        self.assertEqual(benchmarks.comparar(resultados, resultados), [])
+
+    def test_compare_flags_regressions(self):
+        base = {"home": {"p50_ms": 10.0, "consultas": 5, "consultas_frio": 8}}
+        actual = {"home": {"p50_ms": 20.0, "consultas": 6, "consultas_frio": 8}}
+        self.assertEqual(len(benchmarks.comparar(actual, base, umbral=1.5)), 2)
+
+
+class StartupProfileTests(TestCase):
+    """
+    Tests for the import-time grouping behind profile_startup.
+    """
+
+    def test_imports_grouped_by_installed_app(self):
+        salida = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |     wagtail.admin.panels\n"
+            "import time:       300 |        400 |   wagtail.admin\n"
+            "import time:       500 |        900 | wagtail\n"
+            "import time:       250 |        250 | requests\n"
+        )
+        modulos = startup_profile.parsear_importtime(salida)
+        self.assertEqual(modulos[0], ("wagtail.admin.panels", 100, 100))
+        grupos = startup_profile.agrupar_por_app(modulos, ["wagtail.admin", "wagtail"])
+        self.assertEqual(list(grupos), ["wagtail", "wagtail.admin", "requests"])
+        self.assertEqual(grupos["wagtail.admin"], {"ms": 0.4, "modulos": 2})
+
+    def test_settings_public_boots(self):
+        with mock.patch.dict("os.environ", {"SECRET_KEY": "test"}):
+            total, fases, apps, _ = startup_profile.arrancar("impa_site.settings.public", cwd=settings.BASE_DIR)
+        self.assertNotIn("django.contrib.admin", apps)
+        self.assertEqual(list(fases), list(startup_profile.FASES))
+
+
+class StaticAssetsTests(TestCase):
+    """
+    Tests for critical CSS extraction and the site stylesheet tag.
+    """
+
+    def test_extrae_reglas_criticas(self):
+        css = """
+        /* cabecera */
+        .site-header { padding: 1rem; }
+        .site-footer, .otra { color: red; }
+        .site-nav a:hover,
+        .site-footer a { color : blue ; }
+        @media (max-width: 640px) {
+          .site-tabs { display: none; }
+          .entrar { margin: 0; }
+        }
+        @media print { .site-footer { display: none; } }
+        """
+        self.assertEqual(
+            static_assets.extraer_criticas(css),
+            ".site-header{padding:1rem}.site-nav a:hover,.site-footer a{color:blue}"
+            "@media (max-width: 640px){.site-tabs{display:none}}",
+        )
+
+    def test_estilos_sitio_inline_si_hay_css_critico(self):
+        from home.templatetags.home_tags import estilos_sitio
+
+        with mock.patch("home.templatetags.home_tags.css_critico", return_value="body{margin:0}"):
+            html = estilos_sitio()
+        self.assertIn("<style>body{margin:0}</style>", html)
+        self.assertIn('rel="preload"', html)
+        with mock.patch("home.templatetags.home_tags.css_critico", return_value=""):
+            self.assertNotIn("<style>", estilos_sitio())
+
+
+class StreamRadiosTests(TestCase):
+    """
+    Tests for the Icecast status parser and the Radios page against the load-test stub.
+    """
+
+    def test_parses_stub_status_page(self):
+        with IcecastStub() as stub, mock.patch.object(stream_radios, "_STREAM_STATUS_CANDIDATES", [stub.url]):
+            radios = stream_radios.obtener_radios_stream(timeout=5)
+        self.assertEqual([r.mount_point for r in radios], ["/centro.mp3", "/sur.mp3", "/norte.mp3"])
+        self.assertEqual(radios[0].description, "Radio IMPA Centro")
+
+    def test_radios_page_renders_cached_status_without_js(self):
+        caches["default"].delete(stream_radios.ESTADO_CACHE_KEY)
+        self.addCleanup(caches["default"].delete, stream_radios.ESTADO_CACHE_KEY)
+        homepage = HomePage(title="Home")
+        Page.get_first_root_node().add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        radios = RadiosIndexPage(title="Radios", slug="radios")
+        homepage.add_child(instance=radios)
+        with IcecastStub() as stub, mock.patch.object(stream_radios, "_STREAM_STATUS_CANDIDATES", [stub.url]):
+            self.assertContains(self.client.get(radios.url), "/stream/centro.mp3")
+        # Icecast ya no está: la segunda visita usa el status cacheado
+        self.assertContains(self.client.get(radios.url), "/stream/centro.mp3")
+
+    def test_falls_back_to_next_url_on_error(self):
+        with IcecastStub(falla=Falla(tasa_error=1)) as caido, IcecastStub() as sano:
+            with mock.patch.object(stream_radios, "_STREAM_STATUS_CANDIDATES", [caido.url, sano.url]):
+                radios = stream_radios.obtener_radios_stream(timeout=5)
+        self.assertEqual(len(radios), 3)
+
+
+class ImportarFbTests(WagtailPageTestCase):
+    """
+    Tests for the RSS news import against the load-test stub.
+    """
+
+    def setUp(self):
+        homepage = HomePage(title="Home")
+        Page.get_first_root_node().add_child(instance=homepage)
+        homepage.add_child(instance=NoticiasIndexPage(title="Noticias", slug="noticias"))
+
+    def importar(self, stub):
+        out, err = StringIO(), StringIO()
+        with mock.patch.dict(os.environ, {"FB_RSS_URL": stub.feed_url}):
+            call_command("importar_fb", stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_each_feed_request_brings_new_items(self):
+        with RssStub(items=2, nuevas=1) as stub:
+            self.assertIn("Se importaron 3 noticias", self.importar(stub)[0])
+            self.assertIn("Se importaron 1 noticias", self.importar(stub)[0])
+        self.assertEqual(NoticiaPage.objects.live().count(), 4)
+
+    def test_feed_error_is_reported(self):
+        with RssStub(falla=Falla(tasa_error=1)) as stub:
+            out, err = self.importar(stub)
+        self.assertIn("Error al obtener el feed RSS: 503", err)
+        self.assertNotIn("Proceso terminado", out)
+
+    def test_scenario_tasks_are_reported_as_steps(self):
+        def tarea(rnd):
+            time.sleep(0.05)
+            return 500
+
+        tarea.__name__ = "manage.py importar_fb"
+        resultado = correr("http://127.0.0.1:9", [(1, get("/"))], usuarios=0, duracion=0.2, tareas=[tarea])
+        self.assertGreater(resultado["pasos"]["manage.py importar_fb"]["errores"], 0)
+
+
+class AsyncViewsTests(TestCase):
+    """
+    Tests for the async views that call the intranet and Icecast.
+    """
+
+    def setUp(self):
+        self.intranet = IntranetStub().start()
+        self.addCleanup(self.intranet.stop)
+        override = override_settings(INTRANET_API_BASE_URL=self.intranet.url)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_token_login_stores_intranet_user(self):
+        response = self.client.get("/auth/intranet/", {"token": "token-pastor7", "next": "/iglesias/"})
+        self.assertRedirects(response, "/iglesias/", fetch_redirect_response=False)
+        self.assertEqual(self.client.session["intranet_user"]["usuario"], "pastor7")
+
+    def test_password_login_error_rerenders_form(self):
+        response = self.client.post("/auth/intranet/", {"username": "pastor7", "password": "incorrecta"})
+        self.assertContains(response, "Credenciales inválidas.")
+
+    def test_asgi_middleware_chain_has_no_sync_adapter(self):
+        # Un middleware solo sync haría que Django adapte la cadena y cada vista async ocupe un thread
+        for profiling in (False, True):
+            with self.subTest(profiling=profiling), override_settings(PROFILING_ENABLED=profiling):
+                actual = ASGIHandler()._middleware_chain
+                while actual is not None:
+                    self.assertNotIsInstance(actual, (SyncToAsync, AsyncToSync))
+                    actual = getattr(actual, "__wrapped__", None) or getattr(actual, "get_response", None)
+
+    def test_radios_estado_fragment(self):
+        caches["default"].delete(stream_radios.ESTADO_CACHE_KEY)
+        self.addCleanup(caches["default"].delete, stream_radios.ESTADO_CACHE_KEY)
+        with IcecastStub() as stub, mock.patch.object(stream_radios, "_STREAM_STATUS_CANDIDATES", [stub.url]):
+            for _ in range(3):
+                response = self.client.get("/radios/estado/")
+                self.assertContains(response, "/stream/centro.mp3")
+        # Una sola consulta a Icecast mientras el status cacheado no venza
+        self.assertEqual(stub.pedidos, 1)
+
+    async def test_concurrent_radios_estado_fetch_icecast_once(self):
+        await caches["default"].adelete(stream_radios.ESTADO_CACHE_KEY)
+        self.addCleanup(caches["default"].delete, stream_radios.ESTADO_CACHE_KEY)
+        with IcecastStub(falla=Falla(latencia=0.3)) as stub, mock.patch.object(
+            stream_radios, "_STREAM_STATUS_CANDIDATES", [stub.url]
+        ):
+            radios = await asyncio.gather(*(stream_radios.aradios_estado(timeout=5) for _ in range(5)))
+        self.assertEqual([len(r) for r in radios], [3] * 5)
+        self.assertEqual(stub.pedidos, 1)
@@ -1,5 +1,5 @@
 from django.urls import path, register_converter
-from home import views
+from home import api, views
 
 
 class UnicodeSlugConverter:
@@ -24,4 +24,9 @@ urlpatterns = [
     path("iglesias/<unicode_slug:slug>/sitio/subir-foto/", views.iglesia_sitio_subir_foto, name="iglesia_sitio_subir_foto"),
     path("auth/intranet/", views.auth_intranet, name="auth_intranet"),
     path("auth/intranet/logout/", views.auth_intranet_logout, name="auth_intranet_logout"),
+    path("radios/estado/", views.radios_estado, name="radios_estado"),
+    # API de solo lectura (home/api.py)
+    path("api/v1/churches/", api.iglesias, name="api_iglesias"),
+    path("api/v1/noticias/", api.noticias, name="api_noticias"),
+    path("api/v1/radios/", api.radios, name="api_radios"),
 ]
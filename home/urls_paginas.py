@@ -0,0 +1,153 @@
+"""
+URL de cada página desde una tabla en memoria (id de página → URL), como {% pageurl %}
+pero sin resolver las raíces de los sitios por página.
+
+page.get_url() busca en cada llamada las raíces de los Site (Site.get_site_root_paths,
+en la caché), elige la que corresponde y hace el reverse de wagtail_serve. En el mapa
+con todas las iglesias, los listados y el menú eso se repite por cada ítem.
+
+La tabla se arma con una consulta (id y url_path de todas las páginas) y se rearma
+cuando sube la versión "urls" (home.cache_deps): al crear, mover o borrar páginas, al
+cambiar un slug y al guardar un Site (home/signals.py). Con preload, gunicorn la arma
+en el master y los workers la heredan; cada worker revisa la versión cada
+MEMORY_TABLES_RECHECK_SECONDS, como la tabla de redirects.
+
+- urls_for(paginas, request) → {pk: URL}. Las que no estén en la tabla (recién creadas
+  en otro worker) se resuelven con page.get_url().
+- {% urlpagina page %} (home_tags) reemplaza a {% pageurl page %} en listados y menú.
+- url_relativa y url_publica arman la URL desde url_path para filas de .values().
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.urls import NoReverseMatch, reverse
+from wagtail.models import Page, Site
+
+from home import cache_deps
+
+logger = logging.getLogger(__name__)
+
+DEP_URLS = "urls"
+
+
+def _partes(url_path, raices):
+    """(site_id, root_url, path) de cada sitio que sirve la página, en el orden de Wagtail."""
+    partes = []
+    for raiz in raices:
+        if url_path.startswith(raiz.root_path):
+            try:
+                path = reverse("wagtail_serve", args=(url_path[len(raiz.root_path) :],))
+            except NoReverseMatch:
+                continue
+            partes.append((raiz.site_id, raiz.root_url, path))
+    return tuple(partes)
+
+
+def _elegir(partes, site_id, un_sitio):
+    # Como Page.get_url(): relativa si la página es del sitio del request o hay uno solo
+    elegida = next((p for p in partes if p[0] == site_id), partes[0])
+    if un_sitio or elegida[0] == site_id:
+        return elegida[2]
+    return elegida[1] + elegida[2]
+
+
+def url_de_path(url_path, raices, site_id=None):
+    """Como page.get_url() (con el Site `site_id` del request) desde url_path; None si no tiene URL."""
+    partes = _partes(url_path, raices)
+    return _elegir(partes, site_id, len({r.site_id for r in raices}) <= 1) if partes else None
+
+
+def url_relativa(url_path, raices):
+    """URL relativa al sitio de una página a partir de su url_path (sin consultas)."""
+    partes = _partes(url_path, raices)
+    return partes[0][2] if partes else ""
+
+
+def url_publica(url_path, raices):
+    """URL absoluta de una página a partir de su url_path (sin consultas)."""
+    partes = _partes(url_path, raices)
+    return partes[0][1] + partes[0][2] if partes else ""
+
+
+class TablaUrls:
+    def __init__(self):
+        self.partes = {}  # page_id → ((site_id, root_url, path), ...)
+        self.un_sitio = True
+        self.version = None
+        self._chequeado = None  # time.monotonic() de la última revisión
+        self._lock = threading.Lock()
+
+    def construir(self):
+        raices = Site.get_site_root_paths()
+        self.partes = {
+            pk: partes
+            for pk, url_path in Page.objects.filter(depth__gt=1).values_list("pk", "url_path")
+            if (partes := _partes(url_path, raices))
+        }
+        self.un_sitio = len({raiz.site_id for raiz in raices}) <= 1
+
+    def vigente(self):
+        """Rearma la tabla si es la primera vez o si cambió la versión "urls" (revisada cada tanto)."""
+        ahora = time.monotonic()
+        if self._chequeado is not None and ahora - self._chequeado < settings.MEMORY_TABLES_RECHECK_SECONDS:
+            return self
+        with self._lock:
+            if self._chequeado is not None and ahora - self._chequeado < settings.MEMORY_TABLES_RECHECK_SECONDS:
+                return self
+            version = cache_deps.version(DEP_URLS)
+            if version != self.version:
+                try:
+                    self.construir()
+                    self.version = version
+                except Exception:
+                    logger.exception("No se pudo armar la tabla de URLs")
+            self._chequeado = ahora
+        return self
+
+    def invalidar(self):
+        """Revisar la versión en el próximo request (después de subirla)."""
+        self._chequeado = None
+
+    def url(self, page_id, site_id=None):
+        """
+        Como page.get_url(request) con el Site del request (o sin request si site_id es
+        None): relativa si la página es de ese sitio o hay uno solo. None si no está.
+        """
+        partes = self.partes.get(page_id)
+        return _elegir(partes, site_id, self.un_sitio) if partes else None
+
+
+tabla = TablaUrls()
+
+
+def invalidar():
+    """Avisar a todos los workers que rearmen la tabla (y a este, en el próximo request)."""
+    cache_deps.bump(DEP_URLS)
+    tabla.invalidar()
+
+
+def _site_id(request):
+    if request is None:
+        return None
+    # LogHostMiddleware ya dejó el Site en el request (home.sitios): sin consultas
+    site = Site.find_for_request(request)
+    return site.id if site else None
+
+
+def url_for(page, request=None):
+    """URL de una página como {% pageurl %}, desde la tabla."""
+    url = tabla.vigente().url(page.pk, _site_id(request))
+    return url if url is not None else page.get_url(request=request)
+
+
+def urls_for(paginas, request=None):
+    """{pk: URL} de varias páginas, como {% pageurl %} de cada una, desde la tabla."""
+    t = tabla.vigente()
+    site_id = _site_id(request)
+    urls = {}
+    for page in paginas:
+        url = t.url(page.pk, site_id)
+        urls[page.pk] = url if url is not None else page.get_url(request=request)
+    return urls
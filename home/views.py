@@ -4,27 +4,40 @@ Vistas para el sitio imparg.org (Django).
 - Edición con permisos intranet (secretaría ≈ admin, pastor = solo su iglesia).
 - Auth intranet: guardar token en sesión.
 """
+import logging
 import os
 import re
 import unicodedata
 import uuid
 from types import SimpleNamespace
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
-from django.http import HttpResponseForbidden, JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.views.decorators.http import require_http_methods, require_GET, require_POST
 from django.http import Http404
 from django.conf import settings
 from django.views.decorators.csrf import ensure_csrf_cookie
 from wagtail.models import Page
 
+from home import exportar
 from home.models import IglesiasIndexPage, IglesiaPage, ChurchSiteContent
 from home.intranet_auth import (
+    aensure_intranet_user_for_edit,
     fetch_me_from_intranet,
     get_intranet_user,
     can_edit_church_site,
     ensure_intranet_user_for_edit,
 )
 
+logger = logging.getLogger(__name__)
+
+# Las vistas async (auth_intranet, subir foto, estado de radios) esperan a la intranet
+# o a Icecast sin ocupar un thread; lo que toca la base o renderiza base.html (que
+# consulta el menú) va por sync_to_async.
+_render = sync_to_async(render)
+
 
 def _fake_page(title, description=""):
     """Objeto tipo página para templates que esperan page en context."""
@@ -156,14 +169,27 @@ MAX_TAMANO_FOTO_MB = 5
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 
 
+def _guardar_foto(archivo, ext):
+    """Guarda la foto en media/church_site_uploads/ y devuelve su URL."""
+    subdir = "church_site_uploads"
+    upload_dir = os.path.join(settings.MEDIA_ROOT, subdir)
+    os.makedirs(upload_dir, exist_ok=True)
+    nombre = f"{uuid.uuid4().hex}{ext}"
+    path = os.path.join(upload_dir, nombre)
+    with open(path, "wb") as f:
+        for chunk in archivo.chunks():
+            f.write(chunk)
+    return f"{settings.MEDIA_URL.rstrip('/')}/{subdir}/{nombre}"
+
+
 @require_POST
 @ensure_csrf_cookie
-def iglesia_sitio_subir_foto(request, slug):
+async def iglesia_sitio_subir_foto(request, slug):
     """Sube una foto para el sitio de la iglesia. Máx 5MB por archivo. Respuesta JSON con { url } o { error }."""
-    iglesia = _get_iglesia_by_slug(slug)
+    iglesia = await sync_to_async(_get_iglesia_by_slug)(slug)
     if not iglesia:
         return JsonResponse({"error": "Iglesia no encontrada"}, status=404)
-    intranet_user = ensure_intranet_user_for_edit(request) or get_intranet_user(request)
+    intranet_user = await aensure_intranet_user_for_edit(request) or await request.session.aget("intranet_user")
     if not intranet_user:
         return JsonResponse({
             "error": "Tenés que iniciar sesión con la intranet para subir fotos. Entrá por «Entrar» y elegí «Sitio de las iglesias»."
@@ -195,30 +221,20 @@ def iglesia_sitio_subir_foto(request, slug):
     if not content_type.startswith("image/"):
         return JsonResponse({"error": "El archivo no es una imagen válida"}, status=400)
 
-    # Guardar en media/church_site_uploads/
-    subdir = "church_site_uploads"
-    upload_dir = os.path.join(settings.MEDIA_ROOT, subdir)
-    os.makedirs(upload_dir, exist_ok=True)
-    nombre = f"{uuid.uuid4().hex}{ext}"
-    path = os.path.join(upload_dir, nombre)
-    with open(path, "wb") as f:
-        for chunk in archivo.chunks():
-            f.write(chunk)
-
-    url = f"{settings.MEDIA_URL.rstrip('/')}/{subdir}/{nombre}"
+    url = await sync_to_async(_guardar_foto)(archivo, ext)
     return JsonResponse({"url": url})
 
 
 @require_http_methods(["GET", "POST"])
-def auth_intranet(request):
+async def auth_intranet(request):
     """
     Iniciar sesión con la intranet para editar en imparg.org.
     - POST con username + password: llama a la API de la intranet y guarda sesión.
     - GET con ?token=... o POST con access_token: guarda sesión con ese token (sin pedir contraseña).
     """
     from home.intranet_auth import (
-        login_intranet,
-        fetch_me_from_intranet,
+        alogin_intranet,
+        afetch_me_from_intranet,
         build_user_data_from_login,
     )
 
@@ -233,47 +249,61 @@ def auth_intranet(request):
         login_user = None
         # Opción 1: usuario y contraseña (login contra la intranet)
         if username and password:
-            token, login_user, err = login_intranet(username, password)
+            token, login_user, err = await alogin_intranet(username, password)
             if err:
                 ctx["error"] = err
                 ctx["username_value"] = username
-                return render(request, "home/auth_intranet.html", ctx)
+                return await _render(request, "home/auth_intranet.html", ctx)
         elif token_from_form:
             token = token_from_form.strip()
         else:
             ctx["error"] = "Ingresá tu usuario y contraseña de la intranet, o pegá el token de acceso."
-            return render(request, "home/auth_intranet.html", ctx)
+            return await _render(request, "home/auth_intranet.html", ctx)
 
         if not token:
             ctx["error"] = "Falta el token o las credenciales."
-            return render(request, "home/auth_intranet.html", ctx)
+            return await _render(request, "home/auth_intranet.html", ctx)
 
         # Si entró con usuario/contraseña, usar los datos del login (incluye church_id).
         # No llamar a /public/me desde el servidor porque suele devolver 401 (token válido pero la intranet rechaza la petición desde imparg.org).
         if login_user:
             user_data = build_user_data_from_login(login_user)
         else:
-            user_data = fetch_me_from_intranet(token)
+            user_data = await afetch_me_from_intranet(token)
         if not user_data:
             ctx["error"] = "Token inválido o expirado. Volvé a iniciar sesión en la intranet."
             ctx["username_value"] = username
-            return render(request, "home/auth_intranet.html", ctx)
+            return await _render(request, "home/auth_intranet.html", ctx)
 
-        request.session["intranet_user"] = user_data
-        request.session["intranet_access_token"] = token
+        await request.session.aset("intranet_user", user_data)
+        await request.session.aset("intranet_access_token", token)
         return redirect(next_url)
 
     # GET: token en query (p. ej. redirección desde intranet)
     token = request.GET.get("token")
     if token:
-        user_data = fetch_me_from_intranet(token)
+        user_data = await afetch_me_from_intranet(token)
         if user_data:
-            request.session["intranet_user"] = user_data
-            request.session["intranet_access_token"] = token
+            await request.session.aset("intranet_user", user_data)
+            await request.session.aset("intranet_access_token", token)
             return redirect(next_url)
         ctx["error"] = "Token inválido o expirado."
     ctx["next"] = next_url
-    return render(request, "home/auth_intranet.html", ctx)
+    return await _render(request, "home/auth_intranet.html", ctx)
+
+
+@require_GET
+async def radios_estado(request):
+    """
+    Fragmento HTML con las radios en vivo (status de Icecast). La página Radios se
+    renderiza con el último status cacheado y lo refresca con esto por JS; Icecast se
+    consulta solo cuando el status cacheado venció.
+    """
+    from home.stream_radios import aradios_estado
+
+    radios = await aradios_estado(timeout=8)
+    html = render_to_string("home/includes/stream_radios.html", {"stream_radios": radios})
+    return HttpResponse(html)
 
 
 def auth_intranet_logout(request):
@@ -282,3 +312,44 @@ def auth_intranet_logout(request):
     request.session.pop("intranet_access_token", None)
     next_url = request.GET.get("next", "/")
     return redirect(next_url)
+
+
+# ---------- Exportaciones (admin: /admin/exportar/, ver home/wagtail_hooks.py) ----------
+async def _en_async(bloques):
+    """En ASGI, Django juntaría en memoria un iterador sync entero: pedir cada bloque en un thread."""
+    siguiente = sync_to_async(lambda: next(bloques, None))
+    while (bloque := await siguiente()) is not None:
+        yield bloque
+
+
+def _exportacion(request, nombre, formato, columnas, filas):
+    if formato not in exportar.FORMATOS:
+        raise Http404
+    bloques = exportar.en_bloques(exportar.lineas(formato, columnas, filas))
+    tipo = "text/csv" if formato == "csv" else "application/x-ndjson"
+    response = StreamingHttpResponse(
+        _en_async(bloques) if isinstance(request, ASGIRequest) else bloques,
+        content_type=f"{tipo}; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{nombre}.{formato}"'
+    return response
+
+
+@require_GET
+def exportar_iglesias(request, formato):
+    """Todas las iglesias publicadas, con los datos de contacto (también los no públicos)."""
+    if not request.user.has_perm(exportar.PERMISO_IGLESIAS):
+        return HttpResponseForbidden()
+    return _exportacion(request, "iglesias", formato, exportar.COLUMNAS_IGLESIAS, exportar.filas_iglesias())
+
+
+@require_GET
+def exportar_envios(request, page_id, formato):
+    """Envíos de un formulario (ej. Contacto), si el usuario puede verlos en el admin."""
+    from wagtail.contrib.forms.utils import get_forms_for_user
+
+    if not get_forms_for_user(request.user).filter(pk=page_id).exists():
+        return HttpResponseForbidden()
+    return _exportacion(
+        request, f"formulario-{page_id}", formato, exportar.columnas_envios([page_id]), exportar.filas_envios([page_id])
+    )
@@ -0,0 +1,37 @@
+"""Hooks de Wagtail: exportaciones en streaming (home/exportar.py) y rich text en bloque (home/rich_text.py)."""
+from django.urls import path, reverse
+from wagtail import hooks
+from wagtail.admin.menu import MenuItem
+
+from home import exportar, rich_text, views
+
+
+@hooks.register("register_admin_urls")
+def urls_exportar():
+    # Bajo /admin/: Wagtail exige sesión con acceso al admin
+    return [
+        path("exportar/iglesias.<str:formato>", views.exportar_iglesias, name="exportar_iglesias"),
+        path("exportar/formularios/<int:page_id>.<str:formato>", views.exportar_envios, name="exportar_envios"),
+    ]
+
+
+class MenuItemExportarIglesias(MenuItem):
+    def is_shown(self, request):
+        return request.user.has_perm(exportar.PERMISO_IGLESIAS)
+
+
+@hooks.register("register_reports_menu_item")
+def menu_exportar_iglesias():
+    return MenuItemExportarIglesias(
+        "Exportar iglesias (CSV)",
+        reverse("exportar_iglesias", args=["csv"]),
+        icon_name="download",
+        order=900,
+    )
+
+
+@hooks.register("register_rich_text_features", order=100)
+def rich_text_en_bloque(features):
+    # Después de los de Wagtail (order 0): reemplaza los handlers de enlaces a páginas e imágenes
+    features.register_link_type(rich_text.PageLinkHandler)
+    features.register_embed_type(rich_text.ImageEmbedHandler)
@@ -0,0 +1,18 @@
+"""
+ASGI config for impa_site project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Con gunicorn: gunicorn impa_site.asgi:application -k uvicorn_worker.UvicornWorker
+(las vistas async que esperan a la intranet o a Icecast no ocupan un thread).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "impa_site.settings.dev")
+
+application = get_asgi_application()
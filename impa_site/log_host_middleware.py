@@ -1,11 +1,51 @@
-"""Middleware: corrige Host duplicado, fuerza HTTPS y evita 403 por Referer faltante."""
+"""
+Middleware: corrige Host duplicado, fuerza HTTPS, redirige al host canónico, resuelve
+el Site de Wagtail desde memoria (home.sitios) y evita 403 por Referer faltante.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponsePermanentRedirect
+
+from home import sitios
+
+# Dominios que se sirven siempre por HTTPS
+HOSTS_HTTPS = ("impa.ar", "www.impa.ar", "imparg.org", "www.imparg.org")
 
 
 class LogHostMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self._antes(request)
+        if response is not None:
+            return response
+        # Wagtail (Site.find_for_request), el menú y los redirects toman el Site del request
+        request._wagtail_site = sitios.mapa.para_request(request)
+        self._referer(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        response = self._antes(request)
+        if response is not None:
+            return response
+        # Revisar la versión de los Site puede consultar la caché o la base: solo eso va a un thread
+        if sitios.mapa.vencido():
+            await sync_to_async(sitios.mapa.vigente)()
+        request._wagtail_site = sitios.mapa.resolver(request)
+        self._referer(request)
+        return await self.get_response(request)
+
+    def _antes(self, request):
+        """Corrige Host y X-Forwarded-Proto; devuelve el 301 al host canónico si corresponde."""
         host = request.META.get("HTTP_HOST", "")
         # El proxy a veces reenvía Host duplicado (ej. "imparg.org,imparg.org"); Django rechaza con 400
         if host and "," in host:
@@ -18,13 +58,28 @@ class LogHostMiddleware:
         # En impa.ar e imparg.org el sitio se sirve siempre por HTTPS. Si el proxy no reenvía
         # X-Forwarded-Proto (o envía "http"), las URLs absolutas salen en http:// y
         # el navegador bloquea (Mixed Content). Forzamos https para estos dominios.
-        if host:
-            host_clean = host.split(":")[0].lower()
-            if host_clean in ("impa.ar", "www.impa.ar", "imparg.org", "www.imparg.org"):
-                request.META["HTTP_X_FORWARDED_PROTO"] = "https"
+        host_clean = host.split(":")[0].lower() if host else ""
+        if host_clean in HOSTS_HTTPS:
+            request.META["HTTP_X_FORWARDED_PROTO"] = "https"
+        # Un solo host para buscadores y cachés (CANONICAL_HOST): el resto, 301 al mismo path.
+        # Solo GET/HEAD: un POST redirigido perdería el cuerpo.
+        canonico = settings.CANONICAL_HOST
+        if (
+            canonico
+            and host_clean
+            and host_clean != canonico
+            and host_clean not in settings.CANONICAL_HOST_EXEMPT
+            and request.method in ("GET", "HEAD")
+        ):
+            scheme = "https" if canonico in HOSTS_HTTPS else request.scheme
+            return HttpResponsePermanentRedirect(f"{scheme}://{canonico}{request.get_full_path()}")
+        return None
+
+    @staticmethod
+    def _referer(request):
         # Si no hay Referer pero el Host es nuestro, añadimos Referer para que CSRF no devuelva 403
         # (p. ej. al abrir el sitio desde un enlace externo o por IP que no envía Referer)
+        host = request.META.get("HTTP_HOST", "")
         if not request.META.get("HTTP_REFERER") and host:
             scheme = "https" if request.META.get("HTTP_X_FORWARDED_PROTO") == "https" else request.scheme
             request.META["HTTP_REFERER"] = f"{scheme}://{host}/"
-        return self.get_response(request)
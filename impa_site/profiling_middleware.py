@@ -0,0 +1,195 @@
+"""
+Middleware de perfilado por request (opcional: PROFILING_ENABLED=1 en .env).
+
+Mide para cada request el tiempo total, cantidad y tiempo de consultas SQL, tiempo
+en llamadas HTTP externas (intranet, Icecast, RSS; ver medir_http) y tiempo de
+render de templates. Lo escribe como una línea JSON en el logger
+"impa_site.profiling" y, si PROFILING_SERVER_TIMING, en el header Server-Timing
+(visible en la pestaña Network del navegador).
+
+PROFILING_QUERY_BUDGETS = {r"^/$": 25, r"^/search/": 10} fija un máximo de
+consultas por patrón de URL (regex sobre el path; gana el primero que coincide).
+Si se pasa, se loguea un warning, o se lanza QueryBudgetExceeded si
+PROFILING_QUERY_BUDGET_RAISE (para tests).
+
+Con PROFILING_ENABLED apagado el middleware se desactiva al arrancar (MiddlewareNotUsed)
+y medir_http no hace nada: no agrega costo a los requests.
+"""
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_started
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger("impa_site.profiling")
+
+_medicion: ContextVar["Medicion | None"] = ContextVar("impa_profiling", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Un request hizo más consultas SQL que las permitidas por PROFILING_QUERY_BUDGETS."""
+
+
+@dataclass
+class Medicion:
+    total_ms: float = 0.0
+    sql_count: int = 0
+    sql_ms: float = 0.0
+    http_count: int = 0
+    http_ms: float = 0.0
+    render_ms: float = 0.0
+    http_por_servicio: dict = field(default_factory=dict)
+    # Profundidad de templates anidados ({% include %}, extends): solo se cronometra el de afuera
+    _render_depth: int = 0
+
+
+def medicion_actual():
+    """Medición del request en curso, o None si no se está perfilando."""
+    return _medicion.get()
+
+
+@contextmanager
+def medir_http(nombre=""):
+    """Cronometra una llamada HTTP externa: with medir_http("intranet"): requests.get(...)"""
+    m = _medicion.get()
+    if m is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - inicio) * 1000
+        m.http_count += 1
+        m.http_ms += ms
+        if nombre:
+            m.http_por_servicio[nombre] = round(m.http_por_servicio.get(nombre, 0) + ms, 1)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    m = _medicion.get()
+    if m is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        m.sql_count += 1
+        m.sql_ms += (time.perf_counter() - inicio) * 1000
+
+
+def _instalar_sql_wrapper(**kwargs):
+    """
+    Deja _sql_wrapper fijo en las conexiones del thread (no hace nada fuera de un request
+    medido). Fijo y no con execute_wrapper() alrededor del request: en ASGI las vistas y
+    middlewares sync corren en otro thread, con otras conexiones. request_started se
+    envía en ese mismo thread, y la medición llega por la ContextVar, que sync_to_async
+    copia al thread.
+    """
+    for conn in connections.all():
+        if _sql_wrapper not in conn.execute_wrappers:
+            conn.execute_wrappers.append(_sql_wrapper)
+
+
+_render_original = None
+
+
+def _render_medido(self, context):
+    m = _medicion.get()
+    if m is None:
+        return _render_original(self, context)
+    m._render_depth += 1
+    inicio = time.perf_counter()
+    try:
+        return _render_original(self, context)
+    finally:
+        m._render_depth -= 1
+        if m._render_depth == 0:
+            m.render_ms += (time.perf_counter() - inicio) * 1000
+
+
+def _compilar_budgets(budgets):
+    return [(re.compile(patron), int(maximo)) for patron, maximo in (budgets or {}).items()]
+
+
+def server_timing(m):
+    """Valor del header Server-Timing para una medición."""
+    return ", ".join([
+        f"total;dur={m.total_ms:.1f}",
+        f'sql;dur={m.sql_ms:.1f};desc="{m.sql_count} consultas"',
+        f'http;dur={m.http_ms:.1f};desc="{m.http_count} llamadas"',
+        f"render;dur={m.render_ms:.1f}",
+    ])
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.server_timing = getattr(settings, "PROFILING_SERVER_TIMING", True)
+        self.budgets = _compilar_budgets(getattr(settings, "PROFILING_QUERY_BUDGETS", {}))
+        self.raise_on_budget = getattr(settings, "PROFILING_QUERY_BUDGET_RAISE", False)
+        # Mismo enganche que usa el test runner de Django para la señal template_rendered
+        global _render_original
+        if Template._render is not _render_medido:
+            _render_original = Template._render
+            Template._render = _render_medido
+        request_started.connect(_instalar_sql_wrapper, dispatch_uid="impa_profiling_sql")
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        m = Medicion()
+        token = _medicion.set(m)
+        inicio = time.perf_counter()
+        try:
+            # Las TemplateResponse ya vuelven renderizadas del handler
+            response = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self._terminar(request, response, m, inicio)
+
+    async def __acall__(self, request):
+        m = Medicion()
+        token = _medicion.set(m)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self._terminar(request, response, m, inicio)
+
+    def _terminar(self, request, response, m, inicio):
+        m.total_ms = (time.perf_counter() - inicio) * 1000
+        if self.server_timing:
+            response["Server-Timing"] = server_timing(m)
+        datos = {k: round(v, 1) if isinstance(v, float) else v for k, v in asdict(m).items() if not k.startswith("_")}
+        logger.info(json.dumps({"method": request.method, "path": request.path, "status": response.status_code, **datos}))
+        self._verificar_budget(request.path, m)
+        return response
+
+    def _verificar_budget(self, path, m):
+        for patron, maximo in self.budgets:
+            if patron.search(path):
+                if m.sql_count > maximo:
+                    mensaje = f"{path}: {m.sql_count} consultas SQL (máximo {maximo} para {patron.pattern})"
+                    if self.raise_on_budget:
+                        raise QueryBudgetExceeded(mensaje)
+                    logger.warning(mensaje)
+                return
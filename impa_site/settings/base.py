@@ -10,24 +10,18 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
-# PyMySQL como driver MySQL (antes de importar django.db)
-import pymysql
-pymysql.install_as_MySQLdb()
-# Django 4.2+ exige mysqlclient 2.2.1+; PyMySQL se hace pasar por él
-import MySQLdb
-MySQLdb.version_info = (2, 2, 1)
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 import os
 from pathlib import Path
 
-from dotenv import load_dotenv
-
 PROJECT_DIR = Path(__file__).resolve().parent.parent
 BASE_DIR = PROJECT_DIR.parent
 
-# Cargar variables de entorno desde .env
-load_dotenv(BASE_DIR / ".env")
+# Cargar variables de entorno desde .env (con systemd/Docker suelen venir ya en el entorno)
+if (BASE_DIR / ".env").exists():
+    from dotenv import load_dotenv
+
+    load_dotenv(BASE_DIR / ".env")
 
 # Clave secreta (en producción definir SECRET_KEY en .env)
 SECRET_KEY = os.environ.get("SECRET_KEY", "django-insecure-dev-only-cambiar-en-produccion")
@@ -40,10 +34,11 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "django-insecure-dev-only-cambiar-en-p
 # Application definition
 
 INSTALLED_APPS = [
+    # Antes que home: sus receivers de cambio de slug crean los Redirect antes de que
+    # home.signals avise a la tabla de redirects en memoria (home/redirects.py)
+    "wagtail.contrib.redirects",
     "home",
-    "search",
     "wagtail.contrib.forms",
-    "wagtail.contrib.redirects",
     "wagtail.embeds",
     "wagtail.sites",
     "wagtail.users",
@@ -51,6 +46,9 @@ INSTALLED_APPS = [
     "wagtail.documents",
     "wagtail.images",
     "wagtail.search",
+    # Después de wagtail.search: cambia su receiver de post_save por uno que respeta el
+    # indexado diferido de los comandos masivos (search/diferido.py)
+    "search",
     "wagtail.admin",
     "wagtail",
     "modelcluster",
@@ -66,18 +64,22 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "impa_site.log_host_middleware.LogHostMiddleware",  # Corrige Host duplicado del proxy (imparg.org,imparg.org)
+    "impa_site.profiling_middleware.ProfilingMiddleware",  # Solo activo con PROFILING_ENABLED
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "impa_site.static_middleware.StaticFilesMiddleware",  # WhiteNoise, async en ASGI
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "wagtail.contrib.redirects.middleware.RedirectMiddleware",
+    "home.redirects.RedirectMiddleware",  # Tabla en memoria en lugar de una consulta por 404
+    "home.rich_text.RichTextMemoMiddleware",  # Enlaces e imágenes del rich text, resueltos una vez por request
 ]
 
 ROOT_URLCONF = "impa_site.urls"
+# /admin/ y /django-admin/ (False en settings.public: el admin corre en otro proceso)
+ADMIN_URLS_ENABLED = True
 
 TEMPLATES = [
     {
@@ -100,6 +102,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "impa_site.wsgi.application"
+ASGI_APPLICATION = "impa_site.asgi.application"
 
 
 # Database
@@ -107,6 +110,13 @@ WSGI_APPLICATION = "impa_site.wsgi.application"
 
 _db_name = os.environ.get("DB_NAME")
 if _db_name:
+    # PyMySQL como driver MySQL (antes de importar django.db); solo si se usa MySQL
+    import pymysql
+    pymysql.install_as_MySQLdb()
+    # Django 4.2+ exige mysqlclient 2.2.1+; PyMySQL se hace pasar por él
+    import MySQLdb
+    MySQLdb.version_info = (2, 2, 1)
+
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.mysql",
@@ -213,6 +223,50 @@ WAGTAILSEARCH_BACKENDS = {
     }
 }
 
+# Buscador del sitio (/search/): resultados cacheados por consulta normalizada (se invalidan al publicar)
+SEARCH_RESULTS_CACHE_SECONDS = 300
+# Log de consultas (SearchQueryStat): se vuelca en segundo plano cada N segundos
+SEARCH_QUERY_LOG_ENABLED = True
+SEARCH_QUERY_LOG_FLUSH_SECONDS = 30
+
+# Caché. En desarrollo, memoria del proceso; en producción (settings.production) se usa
+# una caché compartida por todos los workers de Gunicorn (Redis o una tabla en la base)
+# para que las invalidaciones al publicar lleguen a todos.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Wagtail guarda acá la rendition de cada (imagen, filtro) para no consultarla en
+    # cada {% image %}. En desarrollo hay un solo proceso; en producción es Redis o la
+    # memoria de cada worker vaciada por versión (settings.production), para que al
+    # borrar renditions (imagen editada, punto focal) ningún worker siga usándolas.
+    "renditions": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "renditions",
+        "TIMEOUT": 600,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+# Fragmentos de template cacheados con {% cache %} y {% cache_fragmento %} (home_tags); se invalidan
+# antes por revisión publicada o por dependencias (home.cache_deps)
+FRAGMENT_CACHE_SECONDS = 3600
+# Bodies renderizados con {% render_cacheado %} (home/render_cache.py), por revisión publicada
+RENDER_CACHE_SECONDS = 86400
+
+# Perfilado por request (impa_site/profiling_middleware.py): tiempos de SQL, HTTP externo y
+# render en el log "impa_site.profiling" y en el header Server-Timing. Apagado por defecto.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+PROFILING_SERVER_TIMING = True
+# Máximo de consultas SQL por patrón de path (regex); al pasarse se loguea un warning
+PROFILING_QUERY_BUDGETS = {
+    r"^/$": 30,
+    r"^/search/": 15,
+    r"^/noticias/": 30,
+}
+# True: lanzar QueryBudgetExceeded en vez de loguear (útil en tests)
+PROFILING_QUERY_BUDGET_RAISE = False
+
 # Detrás de proxy HTTPS: confiar en X-Forwarded-Proto para que request.is_secure() y las URLs sean https
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
@@ -233,6 +287,35 @@ CSRF_TRUSTED_ORIGINS = [
 # URL base del sitio (emails, enlaces del admin). En producción: https://imparg.org
 WAGTAILADMIN_BASE_URL = os.environ.get("WAGTAILADMIN_BASE_URL", "http://localhost:5010")
 
+# Renditions de imágenes: generarlas en segundo plano al publicar (ver home/renditions.py
+# y el comando pregenerar_renditions) para que el primer visitante no pague el redimensionado
+RENDITIONS_PREGENERATE_ON_PUBLISH = True
+
+# Redirects (home/redirects.py): Wagtail crea uno al cambiar el slug o mover una página
+WAGTAILREDIRECTS_AUTO_CREATE = True
+# Redirects y Site (home/sitios.py) están en memoria de cada worker: cada cuántos
+# segundos revisa si cambiaron
+MEMORY_TABLES_RECHECK_SECONDS = 5
+
+# Host canónico (ej. "imparg.org"): los GET a otros hosts (impa.ar, www., la IP) se
+# redirigen con 301 al mismo path en este host. Vacío: se sirve en todos los hosts.
+CANONICAL_HOST = os.environ.get("CANONICAL_HOST", "").strip().lower()
+# Hosts que nunca se redirigen (chequeos locales contra gunicorn)
+CANONICAL_HOST_EXEMPT = ["localhost", "127.0.0.1"]
+
+# Outbox de emails (home/outbox.py): el formulario de contacto guarda el email y lo
+# envía un thread después del commit; los reintentos, el comando send_outbox
+OUTBOX_SEND_ON_COMMIT = True
+OUTBOX_BATCH_SIZE = 50
+# Espera (segundos) antes de cada reintento; agotados, el email queda "fallido"
+OUTBOX_RETRY_DELAYS = [60, 300, 900, 3600, 6 * 3600]
+# Backend solo para el outbox ("" = EMAIL_BACKEND). Para probar sin SMTP:
+# django.core.mail.backends.filebased.EmailBackend (con EMAIL_FILE_PATH) o console
+OUTBOX_EMAIL_BACKEND = os.environ.get("OUTBOX_EMAIL_BACKEND", "")
+EMAIL_FILE_PATH = os.environ.get("EMAIL_FILE_PATH", str(BASE_DIR / "emails"))
+# Sin timeout, un servidor SMTP colgado dejaría el envío esperando para siempre
+EMAIL_TIMEOUT = 10
+
 # Allowed file extensions for documents in the document library.
 # This can be omitted to allow all files, but note that this may present a security risk
 # if untrusted users are allowed to upload files -
@@ -36,6 +36,38 @@ STATIC_URL = os.environ.get("STATIC_URL", "/impa-static/")
 # WhiteNoise sirve /impa-static/ cuando el proxy envía la petición a 5010 (cache-busting con manifest)
 STORAGES["staticfiles"]["BACKEND"] = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Caché compartida entre workers (ver base.py). Guarda resultados de búsqueda, bodies
+# renderizados por revisión, respuestas de la API y fragmentos: decenas de miles de claves.
+# - Con REDIS_URL en .env (pip install redis): Redis, con incr atómico.
+# - Si no: una tabla en la base (python manage.py createcachetable). Al pasar MAX_ENTRIES
+#   borra las vencidas y después 1 de cada CULL_FREQUENCY claves. Si entre ellas cae una
+#   versión de home.cache_deps se crea otra nueva: invalida, nunca sirve contenido viejo.
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+        "TIMEOUT": 3600,
+    }
+else:
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": os.environ.get("CACHE_TABLE", "impa_cache"),
+        "TIMEOUT": 3600,
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", 50000)), "CULL_FREQUENCY": 4},
+    }
+# Renditions de Wagtail: con Redis, en la caché compartida (Wagtail las borra de ahí al
+# borrar la rendition). Con la tabla, cada {% image %} sería una consulta: memoria de
+# cada worker, vaciada en todos al cambiar una imagen o borrar renditions (home/renditions.py).
+if os.environ.get("REDIS_URL"):
+    CACHES["renditions"] = {**CACHES["default"], "KEY_PREFIX": "renditions"}
+else:
+    CACHES["renditions"] = {
+        "BACKEND": "home.renditions.CacheRenditionsLocal",
+        "LOCATION": "renditions",
+        "TIMEOUT": 600,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    }
+
 # Log de errores a consola (journalctl -u impaorg muestra el traceback del 500)
 LOGGING = {
     "version": 1,
@@ -0,0 +1,23 @@
+"""
+Settings para los workers que solo sirven el sitio público (arranque más liviano).
+
+Igual que production, sin las URLs del admin (/admin/, /django-admin/) ni las apps
+que solo usa el admin: cada worker arranca sin importar las vistas, formularios y
+la API del admin de Wagtail, ni el admin de Django (ver el comando profile_startup).
+
+El admin sigue en un gunicorn aparte con settings.production, y Nginx le manda
+/admin/ y /django-admin/ (ver "Sitio público y admin separados" en el README).
+"""
+from .production import *
+
+# Apps que solo usa el admin. wagtail.admin, wagtail.embeds y taggit se quedan: los
+# usan los modelos (paneles), el render de rich text (embeds) y las imágenes (tags).
+ADMIN_ONLY_APPS = ["django.contrib.admin", "django_filters", "wagtail.snippets", "wagtail.users"]
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ADMIN_ONLY_APPS]
+
+ADMIN_URLS_ENABLED = False
+
+try:
+    from .local import *
+except ImportError:
+    pass
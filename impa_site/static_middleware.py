@@ -0,0 +1,37 @@
+"""
+WhiteNoise para WSGI y ASGI.
+
+WhiteNoiseMiddleware es solo sync: bajo uvicorn, Django adapta toda la cadena de
+middlewares a sync y cada request (también las vistas async que esperan a la
+intranet o a Icecast) ocupa un thread. Esta subclase declara async_capable: en ASGI
+la búsqueda del archivo es un dict en memoria, y solo servir un estático va a un
+thread. El resto de los requests sigue de largo sin pasar por un thread.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Solo en desarrollo (WHITENOISE_AUTOREFRESH): busca en disco
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
@@ -1,19 +1,29 @@
 from django.conf import settings
 from django.urls import include, path, re_path
-from django.contrib import admin
 from django.views.static import serve
 
-from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
 from search import views as search_views
 
-urlpatterns = [
-    path("django-admin/", admin.site.urls),
-    path("admin/", include(wagtailadmin_urls)),
+urlpatterns = []
+
+# Con settings.public el admin lo atiende otro proceso: no importar sus URLs (y todas
+# sus vistas) en los workers del sitio público
+if settings.ADMIN_URLS_ENABLED:
+    from django.contrib import admin
+    from wagtail.admin import urls as wagtailadmin_urls
+
+    urlpatterns += [
+        path("django-admin/", admin.site.urls),
+        path("admin/", include(wagtailadmin_urls)),
+    ]
+
+urlpatterns += [
     path("documents/", include(wagtaildocs_urls)),
     path("search/", search_views.search, name="search"),
+    path("search/suggest/", search_views.suggest, name="search_suggest"),
     # Páginas sitio de iglesias y auth intranet (antes de Wagtail para que /iglesias/<slug>/sitio/ no sea capturado por Wagtail)
     path("", include("home.urls")),
 ]
@@ -0,0 +1,8 @@
+"""
+Pruebas de carga del sitio con los servicios externos simulados.
+
+- stubs: servidores locales de Icecast, intranet y RSS con latencia y fallas configurables.
+- escenarios: mezclas de tráfico y el runner que mide throughput, p50/p99 y errores.
+
+Uso: python -m loadtest --help (ver loadtest/README.md).
+"""
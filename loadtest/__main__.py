@@ -0,0 +1,167 @@
+"""
+Línea de comandos del paquete de pruebas de carga (ver loadtest/README.md).
+
+  python -m loadtest stubs --icecast-latencia 8
+  python -m loadtest correr --url http://127.0.0.1:5010 --escenario navegacion --usuarios 20
+  python -m loadtest completo --escenario radios --icecast-latencia 8 --duracion 60
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from loadtest.escenarios import ESCENARIOS, TAREAS, correr, formatear
+from loadtest.stubs import Falla, IcecastStub, IntranetStub, RssStub, entorno_para
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SERVICIOS = ("icecast", "intranet", "rss")
+
+
+def _args_fallas(parser):
+    for servicio in SERVICIOS:
+        g = parser.add_argument_group(f"stub {servicio}")
+        g.add_argument(f"--{servicio}-latencia", type=float, default=0.0, help="Segundos de demora por pedido.")
+        g.add_argument(f"--{servicio}-jitter", type=float, default=0.0, help="Demora extra aleatoria (0 a N s).")
+        g.add_argument(f"--{servicio}-errores", type=float, default=0.0, help="Fracción de pedidos con 503 (0-1).")
+        g.add_argument(f"--{servicio}-cuelgues", type=float, default=0.0, help="Fracción de pedidos que no responden (0-1).")
+        g.add_argument(f"--{servicio}-puerto", type=int, default=0, help="Puerto (0 = uno libre).")
+        if servicio == "rss":
+            g.add_argument("--rss-nuevas", type=int, default=0, help="Noticias nuevas en cada pedido del feed.")
+
+
+def _args_escenario(parser):
+    parser.add_argument("--escenario", choices=sorted(ESCENARIOS), default="navegacion")
+    parser.add_argument("--usuarios", type=int, default=10, help="Usuarios virtuales concurrentes.")
+    parser.add_argument("--duracion", type=float, default=30.0, help="Segundos de carga.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por pedido (s).")
+    parser.add_argument("--json", help="Guardar el resultado en este archivo.")
+
+
+def _levantar_stubs(args):
+    stubs = {}
+    for servicio, clase in zip(SERVICIOS, (IcecastStub, IntranetStub, RssStub)):
+        falla = Falla(
+            latencia=getattr(args, f"{servicio}_latencia"),
+            jitter=getattr(args, f"{servicio}_jitter"),
+            tasa_error=getattr(args, f"{servicio}_errores"),
+            tasa_cuelgue=getattr(args, f"{servicio}_cuelgues"),
+        )
+        extra = {"nuevas": args.rss_nuevas} if servicio == "rss" else {}
+        stubs[servicio] = clase(puerto=getattr(args, f"{servicio}_puerto"), falla=falla, **extra).start()
+    return stubs
+
+
+def _correr_y_reportar(args, url, env=None):
+    print(f"Escenario {args.escenario}: {args.usuarios} usuarios durante {args.duracion:.0f} s contra {url}\n")
+    # Las tareas (ej. importar_fb) corren con el mismo entorno que el sitio: misma base y stubs
+    tareas = [fabrica(env, BASE_DIR) for fabrica in TAREAS.get(args.escenario, ())]
+    resultado = correr(
+        url, args.escenario, usuarios=args.usuarios, duracion=args.duracion, timeout=args.timeout, tareas=tareas
+    )
+    print(formatear(resultado))
+    if args.json:
+        Path(args.json).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nResultado guardado en {args.json}")
+    return resultado
+
+
+def cmd_stubs(args):
+    stubs = _levantar_stubs(args)
+    print("Stubs escuchando. Para que el sitio los use, exportar:\n")
+    for k, v in entorno_para(**stubs).items():
+        print(f"  export {k}={v}")
+    print("\nCtrl+C para terminar.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for stub in stubs.values():
+            stub.stop()
+
+
+def cmd_correr(args):
+    _correr_y_reportar(args, args.url)
+
+
+def _esperar(url, segundos=30):
+    limite = time.monotonic() + segundos
+    while time.monotonic() < limite:
+        try:
+            urllib.request.urlopen(url, timeout=2).close()
+            return True
+        except urllib.error.HTTPError:
+            return True  # responde, aunque sea con error
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.3)
+    return False
+
+
+def cmd_completo(args):
+    """Stubs + gunicorn apuntando a los stubs + escenario; apaga todo al terminar."""
+    stubs = _levantar_stubs(args)
+    env = {**os.environ, **entorno_para(**stubs)}
+    env.setdefault("DJANGO_SETTINGS_MODULE", args.settings)
+    env.setdefault("SECRET_KEY", "loadtest-no-usar-en-produccion")
+    url = f"http://127.0.0.1:{args.puerto}"
+    comando = [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+        "--bind", f"127.0.0.1:{args.puerto}",
+        "--workers", str(args.workers), "--threads", str(args.threads),
+        "--timeout", str(args.gunicorn_timeout),
+        "--log-level", "warning",
+    ]
+    if args.asgi:
+        comando += ["-k", "uvicorn_worker.UvicornWorker", "impa_site.asgi:application"]
+    else:
+        comando += ["impa_site.wsgi:application"]
+    print("Arrancando:", " ".join(comando[2:]))
+    gunicorn = subprocess.Popen(comando, cwd=BASE_DIR, env=env)
+    try:
+        if not _esperar(url + "/"):
+            sys.exit("gunicorn no respondió a tiempo.")
+        _correr_y_reportar(args, url, env)
+        print("\nPedidos recibidos por los stubs: " + ", ".join(f"{n}={s.pedidos}" for n, s in stubs.items()))
+    finally:
+        gunicorn.terminate()
+        gunicorn.wait(timeout=30)
+        for stub in stubs.values():
+            stub.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Pruebas de carga del sitio IMPA.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("stubs", help="Levantar solo los stubs de Icecast, intranet y RSS.")
+    _args_fallas(p)
+    p.set_defaults(func=cmd_stubs)
+
+    p = sub.add_parser("correr", help="Correr un escenario contra un sitio ya levantado.")
+    p.add_argument("--url", default="http://127.0.0.1:5010")
+    _args_escenario(p)
+    p.set_defaults(func=cmd_correr)
+
+    p = sub.add_parser("completo", help="Stubs + gunicorn + escenario.")
+    _args_escenario(p)
+    _args_fallas(p)
+    p.add_argument("--puerto", type=int, default=5099, help="Puerto de gunicorn.")
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--threads", type=int, default=2)
+    p.add_argument("--gunicorn-timeout", type=int, default=30)
+    p.add_argument("--settings", default="impa_site.settings.production")
+    p.add_argument("--asgi", action="store_true", help="Servir impa_site.asgi con workers de uvicorn.")
+    p.set_defaults(func=cmd_completo)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Escenarios de carga: mezclas de tráfico con pesos, reproducidas por N usuarios
+virtuales concurrentes durante un tiempo fijo contra el sitio (gunicorn).
+
+Cada usuario virtual tiene su propia sesión (cookies) y elige el siguiente paso al
+azar según los pesos del escenario. Al final se informa throughput, latencias
+p50/p99 y tasa de errores, en total y por paso.
+
+Algunos escenarios tienen además tareas (TAREAS): algo que no es un request, como
+un comando de manage.py, que corre una vez tras otra en su propio thread mientras
+dura la carga. Se informa como un paso más (cada corrida es una muestra).
+"""
+import http.cookiejar
+import random
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+_CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class Sesion:
+    """Cliente HTTP con cookies (sesión de Django y CSRF) para un usuario virtual."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _SinRedirecciones,
+        )
+
+    def pedir(self, path, datos=None):
+        """Devuelve (status, cuerpo). Errores de conexión/timeout → status 0."""
+        url = self.base_url + path
+        body = urllib.parse.urlencode(datos).encode("utf-8") if datos is not None else None
+        req = urllib.request.Request(url, data=body, headers={"User-Agent": "IMPA-loadtest/1.0", "Referer": url})
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                return resp.status, resp.read().decode("utf-8", errors="replace")
+        except urllib.error.HTTPError as e:
+            return e.code, ""
+        except (urllib.error.URLError, TimeoutError, ConnectionError):
+            return 0, ""
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    """Un 302 cuenta como respuesta (ej. login correcto), no se sigue."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+    def http_error_302(self, req, fp, code, msg, headers):
+        return fp
+
+    http_error_301 = http_error_303 = http_error_307 = http_error_302
+
+
+# ---------- Pasos ----------
+def get(path):
+    def paso(sesion, rnd):
+        return sesion.pedir(path)[0]
+
+    paso.__name__ = f"GET {path}"
+    return paso
+
+
+def busqueda(sesion, rnd):
+    query = rnd.choice(["iglesia", "neuquen", "culto", "jovenes", "retiro", "río negro", "anelo"])
+    return sesion.pedir("/search/?" + urllib.parse.urlencode({"query": query}))[0]
+
+
+def sugerencias(sesion, rnd):
+    q = rnd.choice(["ig", "igl", "neu", "cip", "rio n", "not"])
+    return sesion.pedir("/search/suggest/?" + urllib.parse.urlencode({"q": q}))[0]
+
+
+def login_intranet(sesion, rnd):
+    """GET del formulario (cookie y token CSRF) y POST con usuario/contraseña: llama a /auth/login."""
+    status, html = sesion.pedir("/auth/intranet/")
+    m = _CSRF_RE.search(html)
+    if status != 200 or not m:
+        return status or 599
+    password = "incorrecta" if rnd.random() < 0.1 else "secreta"
+    return sesion.pedir("/auth/intranet/", {
+        "csrfmiddlewaretoken": m.group(1),
+        "username": f"pastor{rnd.randint(1, 500)}",
+        "password": password,
+        "next": "/",
+    })[0]
+
+
+def token_intranet(sesion, rnd):
+    """Entrada con ?token= (redirección desde la intranet): llama a /public/me."""
+    return sesion.pedir(f"/auth/intranet/?token=token-pastor{rnd.randint(1, 500)}")[0]
+
+
+def importar_fb(env=None, cwd=None, timeout=300):
+    """
+    Tarea: manage.py importar_fb, que lee el feed RSS (FB_RSS_URL, el stub) y publica
+    las noticias nuevas. 200 si terminó bien, 500 si falló (ej. el feed respondió con
+    error) y 0 si pasó el timeout.
+    """
+
+    def tarea(rnd):
+        try:
+            r = subprocess.run(
+                [sys.executable, "manage.py", "importar_fb"],
+                cwd=cwd, env=env, capture_output=True, text=True, timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return 0
+        return 200 if r.returncode == 0 and "Proceso terminado" in r.stdout else 500
+
+    tarea.__name__ = "manage.py importar_fb"
+    return tarea
+
+
+busqueda.__name__ = "GET /search/"
+sugerencias.__name__ = "GET /search/suggest/"
+login_intranet.__name__ = "POST /auth/intranet/"
+token_intranet.__name__ = "GET /auth/intranet/?token="
+
+# nombre → [(peso, paso)]
+ESCENARIOS = {
+    # Visitas típicas del sitio público
+    "navegacion": [
+        (35, get("/")),
+        (20, get("/noticias/")),
+        (12, get("/iglesias/")),
+        (5, get("/mapa/")),
+        (5, get("/doctrina/")),
+        (4, get("/radios/")),
+        (4, get("/radios/estado/")),
+        (10, busqueda),
+        (5, sugerencias),
+    ],
+    # Muchos oyentes entrando a /radios/: la página pide /radios/estado/, que espera a Icecast
+    "radios": [
+        (30, get("/radios/")),
+        (30, get("/radios/estado/")),
+        (40, get("/")),
+    ],
+    # Pastores entrando a editar: cada login espera a la intranet
+    "intranet": [
+        (30, login_intranet),
+        (20, token_intranet),
+        (50, get("/")),
+    ],
+}
+# Visitas típicas mientras importar_fb publica noticias (ver TAREAS)
+ESCENARIOS["importacion"] = ESCENARIOS["navegacion"]
+
+# nombre de escenario → fábricas de tareas: fabrica(env, cwd) → tarea(rnd) → status
+TAREAS = {
+    "importacion": [importar_fb],
+}
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def _resumen(muestras, duracion):
+    tiempos = [ms for ms, _ in muestras]
+    errores = sum(1 for _, status in muestras if status == 0 or status >= 500)
+    return {
+        "pedidos": len(muestras),
+        "rps": round(len(muestras) / duracion, 2) if duracion else 0.0,
+        "p50_ms": round(statistics.median(tiempos), 1) if tiempos else 0.0,
+        "p99_ms": round(_percentil(tiempos, 99), 1),
+        "errores": errores,
+        "tasa_error": round(errores / len(muestras), 4) if muestras else 0.0,
+    }
+
+
+def correr(base_url, escenario, usuarios=10, duracion=30.0, timeout=30, semilla=None, tareas=()):
+    """
+    Corre el escenario con `usuarios` threads durante `duracion` segundos, y cada una
+    de `tareas` en un thread más, una corrida tras otra.
+    Devuelve {"total": resumen, "pasos": {nombre: resumen}, "status": {código: cantidad}}.
+    """
+    pasos = ESCENARIOS[escenario] if isinstance(escenario, str) else escenario
+    pesos = [peso for peso, _ in pasos]
+    funciones = [paso for _, paso in pasos]
+    muestras = defaultdict(list)
+    lock = threading.Lock()
+    fin = time.monotonic() + duracion
+    semilla_base = random.Random(semilla)
+
+    def usuario(rnd):
+        sesion = Sesion(base_url, timeout=timeout)
+        while time.monotonic() < fin:
+            paso = rnd.choices(funciones, weights=pesos)[0]
+            inicio = time.perf_counter()
+            status = paso(sesion, rnd)
+            ms = (time.perf_counter() - inicio) * 1000
+            with lock:
+                muestras[paso.__name__].append((ms, status))
+
+    def repetir(tarea, rnd):
+        while time.monotonic() < fin:
+            inicio = time.perf_counter()
+            status = tarea(rnd)
+            ms = (time.perf_counter() - inicio) * 1000
+            with lock:
+                muestras[tarea.__name__].append((ms, status))
+
+    inicio = time.monotonic()
+    threads = [
+        threading.Thread(target=usuario, args=(random.Random(semilla_base.random()),), daemon=True)
+        for _ in range(usuarios)
+    ]
+    threads += [
+        threading.Thread(target=repetir, args=(tarea, random.Random(semilla_base.random())), daemon=True)
+        for tarea in tareas
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    transcurrido = time.monotonic() - inicio
+
+    todas = [m for lista in muestras.values() for m in lista]
+    status = defaultdict(int)
+    for _, s in todas:
+        status[s] += 1
+    return {
+        "total": _resumen(todas, transcurrido),
+        "pasos": {nombre: _resumen(lista, transcurrido) for nombre, lista in sorted(muestras.items())},
+        "status": dict(sorted(status.items())),
+    }
+
+
+def formatear(resultado):
+    """Tabla de texto con el resultado de correr()."""
+    lineas = [f"{'paso':<28} {'pedidos':>8} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'errores':>8}"]
+    filas = list(resultado["pasos"].items()) + [("TOTAL", resultado["total"])]
+    for nombre, r in filas:
+        lineas.append(
+            f"{nombre:<28} {r['pedidos']:>8} {r['rps']:>7} {r['p50_ms']:>8} {r['p99_ms']:>8} "
+            f"{r['errores']:>4} ({r['tasa_error']:.1%})"
+        )
+    lineas.append("status: " + ", ".join(f"{k}={v}" for k, v in resultado["status"].items()))
+    return "\n".join(lineas)
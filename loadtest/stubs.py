@@ -0,0 +1,272 @@
+"""
+Servidores HTTP locales que imitan los servicios externos del sitio:
+
+- Icecast: página de status con los mount points (la lee home.stream_radios).
+- Intranet: POST /api/v1/auth/login, GET /api/v1/public/me y /api/v1/public/churches.
+- RSS: el feed que importa el comando importar_fb.
+
+Cada stub acepta una Falla con latencia (más jitter), tasa de errores 5xx y tasa
+de "cuelgues" (no responde hasta pasado un rato, como un upstream trabado), para
+reproducir localmente los 504 que produce un servicio lento ocupando los threads
+de gunicorn. Solo usa la biblioteca estándar.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+@dataclass
+class Falla:
+    """Comportamiento degradado de un stub. Tiempos en segundos, tasas entre 0 y 1."""
+
+    latencia: float = 0.0
+    jitter: float = 0.0
+    tasa_error: float = 0.0
+    tasa_cuelgue: float = 0.0
+    cuelgue: float = 60.0
+
+    def aplicar(self, rnd):
+        """Espera lo que corresponda; devuelve un status de error o None si hay que responder bien."""
+        if self.tasa_cuelgue and rnd.random() < self.tasa_cuelgue:
+            time.sleep(self.cuelgue)
+            return 504
+        espera = self.latencia + (rnd.uniform(0, self.jitter) if self.jitter else 0)
+        if espera > 0:
+            time.sleep(espera)
+        if self.tasa_error and rnd.random() < self.tasa_error:
+            return 503
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # sin log por request: ensucia la salida del escenario
+        pass
+
+    def _responder(self, status, content_type, body):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _despachar(self, metodo):
+        stub = self.server.stub
+        largo = int(self.headers.get("Content-Length") or 0)
+        cuerpo = self.rfile.read(largo) if largo else b""
+        with stub.lock:
+            stub.pedidos += 1
+        error = stub.falla.aplicar(stub.rnd)
+        if error:
+            self._responder(error, "text/plain", "stub: error inyectado")
+            return
+        ruta = stub.rutas.get((metodo, urlparse(self.path).path.rstrip("/") or "/"))
+        if not ruta:
+            self._responder(404, "text/plain", "stub: ruta desconocida")
+            return
+        self._responder(*ruta(self, cuerpo))
+
+    def do_GET(self):
+        self._despachar("GET")
+
+    def do_POST(self):
+        self._despachar("POST")
+
+
+class StubServer:
+    """Un stub escuchando en 127.0.0.1:<puerto> en un thread propio (puerto 0 = libre)."""
+
+    nombre = "stub"
+
+    def __init__(self, puerto=0, falla=None, semilla=None):
+        self.falla = falla or Falla()
+        self.rnd = random.Random(semilla)
+        self.lock = threading.Lock()
+        self.pedidos = 0
+        self.rutas = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", puerto), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, puerto = self._server.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name=self.nombre, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ---------- Icecast ----------
+MOUNTS = [
+    ("/centro.mp3", "Radio IMPA Centro"),
+    ("/sur.mp3", "Radio IMPA Sur"),
+    ("/norte.mp3", "Radio IMPA Norte"),
+]
+
+
+def html_icecast(mounts=MOUNTS, rnd=random):
+    """HTML con el formato de la página de status de Icecast 2 (la que parsea stream_radios)."""
+    bloques = []
+    for mount, descripcion in mounts:
+        filas = [
+            ("Stream Description:", descripcion),
+            ("Bitrate:", "128"),
+            ("Listeners (current):", str(rnd.randint(0, 80))),
+            ("Listeners (peak):", "120"),
+            ("Currently playing:", "Alabanza en vivo"),
+            ("Genre:", "Cristiana"),
+            ("Stream started:", formatdate()),
+        ]
+        tabla = "".join(f'<tr><td>{k}</td><td class="streamstats">{v}</td></tr>' for k, v in filas)
+        bloques.append(f'<div class="roundbox"><h3 class="mount">Mount Point {mount}</h3><table>{tabla}</table></div>')
+    return f"<html><body><h2>Icecast2 Status</h2>{''.join(bloques)}</body></html>"
+
+
+class IcecastStub(StubServer):
+    nombre = "icecast"
+
+    def __init__(self, *args, mounts=MOUNTS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rutas[("GET", "/")] = lambda h, _: (200, "text/html; charset=utf-8", html_icecast(mounts, self.rnd))
+
+
+# ---------- Intranet ----------
+def _usuario(username, church_id=1):
+    return {
+        "username": username,
+        "role": "pastorado",
+        "first_name": "Usuario",
+        "last_name": username.capitalize(),
+        "church_id": church_id,
+    }
+
+
+class IntranetStub(StubServer):
+    """Intranet: cualquier usuario entra salvo con la contraseña "incorrecta"."""
+
+    nombre = "intranet"
+
+    def __init__(self, *args, iglesias=200, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.iglesias = iglesias
+        self.rutas[("POST", "/api/v1/auth/login")] = self._login
+        self.rutas[("GET", "/api/v1/public/me")] = self._me
+        self.rutas[("GET", "/api/v1/public/churches")] = self._churches
+
+    @staticmethod
+    def _json(status, data):
+        return status, "application/json", json.dumps(data)
+
+    def _login(self, handler, cuerpo):
+        try:
+            datos = json.loads(cuerpo or b"{}")
+        except ValueError:
+            return self._json(400, {"error": "JSON inválido"})
+        username = datos.get("username") or ""
+        if not username or datos.get("password") == "incorrecta":
+            return self._json(401, {"error": "Credenciales inválidas."})
+        return self._json(200, {"access_token": f"token-{username}", "user": _usuario(username)})
+
+    def _me(self, handler, cuerpo):
+        auth = handler.headers.get("Authorization", "")
+        if not auth.startswith("Bearer token-"):
+            return self._json(401, {"error": "Token inválido"})
+        u = _usuario(auth[len("Bearer token-"):])
+        return self._json(200, {
+            "usuario": u["username"],
+            "tipo_de_usuario": u["role"],
+            "first_name": u["first_name"],
+            "last_name": u["last_name"],
+            "full_name": f"{u['first_name']} {u['last_name']}",
+            "roles": [u["role"]],
+            "is_staff": False,
+            "church_id": u["church_id"],
+        })
+
+    def _churches(self, handler, cuerpo):
+        return self._json(200, {"data": [
+            {
+                "id": i,
+                "name": f"Iglesia Stub {i}",
+                "province": "Neuquén",
+                "city": "Neuquén",
+                "address": f"Calle {i}",
+                "latitude": -38.95 + i / 1000,
+                "longitude": -68.06 - i / 1000,
+                "pastor": {"first_name": "Pastor", "last_name": str(i)},
+            }
+            for i in range(1, self.iglesias + 1)
+        ]})
+
+
+# ---------- RSS ----------
+def _item_rss(guid, titulo, horas):
+    return (
+        f"<item><title>{titulo}</title><link>https://example.org/posts/{guid}</link>"
+        f"<guid>{guid}</guid><pubDate>{formatdate(time.time() - horas * 3600)}</pubDate>"
+        f"<description>&lt;p&gt;Texto de {titulo}&lt;/p&gt;</description></item>"
+    )
+
+
+def rss_feed(items=20, nuevas=()):
+    """Feed con `items` noticias fijas (stub-0, stub-1, ...) y las `nuevas` (guids) primero."""
+    entradas = "".join(_item_rss(guid, f"Noticia nueva {guid}", 0) for guid in nuevas)
+    entradas += "".join(_item_rss(f"stub-{i}", f"Noticia stub {i}", i) for i in range(items))
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>Stub</title>{entradas}</channel></rss>'
+
+
+class RssStub(StubServer):
+    """
+    Feed para importar_fb. Con nuevas=N cada pedido trae además N noticias que no
+    estaban en el anterior, así cada importación publica páginas.
+    """
+
+    nombre = "rss"
+
+    def __init__(self, *args, items=20, nuevas=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.nuevas = nuevas
+        self.rutas[("GET", "/feed.xml")] = lambda h, _: (200, "application/rss+xml", rss_feed(items, self._guids_nuevos()))
+
+    def _guids_nuevos(self):
+        # importar_fb arma el slug con los últimos 8 caracteres del guid: que sean al azar
+        return [f"stub-{uuid.uuid4().hex}" for _ in range(self.nuevas)]
+
+    @property
+    def feed_url(self):
+        return f"{self.url}/feed.xml"
+
+
+def entorno_para(icecast=None, intranet=None, rss=None):
+    """Variables de entorno para que el sitio use los stubs en lugar de los servicios reales."""
+    env = {}
+    if icecast:
+        env["STREAM_STATUS_URLS"] = icecast.url
+    if intranet:
+        env["INTRANET_API_BASE_URL"] = intranet.url
+        env["INTRANET_CHURCHES_API_URL"] = f"{intranet.url}/api/v1/public/churches"
+    if rss:
+        env["FB_RSS_URL"] = rss.feed_url
+    return env
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "search"
+
+    def ready(self):
+        from search import signals  # noqa: F401
+        from search.diferido import reemplazar_receivers
+
+        reemplazar_receivers()
@@ -0,0 +1,135 @@
+"""
+Indexado de búsqueda diferido para operaciones masivas (comandos, importaciones).
+
+Normalmente cada publicación actualiza en el momento el SearchDocument de la página,
+el índice de autocompletar y el índice de wagtail.search (este último en cada save de
+la página: save_revision() y publish() lo hacen dos veces). En un comando que publica
+cientos de páginas eso multiplica el tiempo de la corrida.
+
+Dentro de indexado_diferido() las señales solo anotan qué páginas cambiaron; al salir
+se reindexan todas juntas:
+- SearchDocument: por lote, una consulta por tipo de página, un DELETE y un INSERT;
+- autocompletar: se sube la versión una vez y cada proceso lo rearma;
+- wagtail.search: add_bulk por modelo;
+- la tabla de redirects (home.redirects): se sube la versión una vez.
+Si se sale dentro de una transacción, el reindexado espera al commit (y no ocurre si
+hay rollback). Fuera de indexado_diferido (el admin, las ediciones de a una) todo
+sigue siendo inmediato.
+
+Uso:
+    with indexado_diferido():
+        for page in paginas:
+            page.save_revision().publish()
+
+    @indexado_diferido()
+    def handle(self, *args, **options): ...
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from wagtail.models import Page
+from wagtail.search import index
+from wagtail.search.backends import get_search_backends
+from wagtail.search.signal_handlers import post_save_signal_handler
+
+logger = logging.getLogger(__name__)
+
+LOTE = 200
+
+
+@dataclass
+class Pendientes:
+    paginas: set = field(default_factory=set)  # ids publicados o despublicados (SearchDocument)
+    sugerencias: bool = False  # cambió alguna página del índice de autocompletar
+    objetos: dict = field(default_factory=dict)  # modelo indexado → pks para wagtail.search
+    redirects: bool = False  # cambió una URL publicada o un Redirect (home.signals)
+
+
+_pendientes: ContextVar["Pendientes | None"] = ContextVar("search_indexado_diferido", default=None)
+
+
+def pendientes():
+    """Los cambios anotados si hay un indexado_diferido activo, o None."""
+    return _pendientes.get()
+
+
+@contextmanager
+def indexado_diferido():
+    if _pendientes.get() is not None:
+        # Anidado: reindexa el de afuera
+        yield _pendientes.get()
+        return
+    p = Pendientes()
+    token = _pendientes.set(p)
+    try:
+        yield p
+    finally:
+        _pendientes.reset(token)
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: aplicar(p))
+        else:
+            aplicar(p)
+
+
+def _lotes(ids, lote=LOTE):
+    ids = list(ids)
+    for i in range(0, len(ids), lote):
+        yield ids[i : i + lote]
+
+
+def aplicar(p):
+    """Reindexa en bloque lo anotado en `p`."""
+    from home import redirects
+    from search.documents import indexar_paginas
+    from search.suggest import invalidar as invalidar_sugerencias
+
+    if p.paginas:
+        indexar_paginas(p.paginas)
+    if p.sugerencias:
+        invalidar_sugerencias()
+    if p.redirects:
+        redirects.invalidar()
+    backends = list(get_search_backends(with_auto_update=True)) if p.objetos else []
+    for modelo, pks in p.objetos.items():
+        for ids in _lotes(pks):
+            objetos = list(modelo.get_indexed_objects().filter(pk__in=ids))
+            for backend in backends:
+                try:
+                    backend.add_bulk(modelo, objetos)
+                except Exception:
+                    # Como wagtail.search: un backend externo caído no rompe la operación
+                    logger.exception("No se pudo indexar %s en %r", modelo._meta.label, backend)
+                    if not backend.catch_indexing_errors:
+                        raise
+    if p.paginas or p.objetos:
+        logger.info(
+            "Indexado diferido: %s páginas, %s objetos de wagtail.search",
+            len(p.paginas),
+            sum(len(pks) for pks in p.objetos.values()),
+        )
+
+
+def post_save_diferible(sender, instance, **kwargs):
+    """Receiver de wagtail.search para post_save que respeta indexado_diferido."""
+    p = _pendientes.get()
+    if p is None:
+        post_save_signal_handler(instance, **kwargs)
+        return
+    # Se indexa la instancia específica (como get_indexed_instance), sin consultar por ella
+    modelo = instance.specific_class if isinstance(instance, Page) else type(instance)
+    if modelo is not None:
+        p.objetos.setdefault(modelo, set()).add(instance.pk)
+
+
+def reemplazar_receivers():
+    """
+    Cambia el receiver de post_save de wagtail.search por post_save_diferible en
+    cada modelo indexado (llamar después del ready() de wagtail.search).
+    """
+    for modelo in index.get_indexed_models():
+        if post_save.disconnect(post_save_signal_handler, sender=modelo):
+            post_save.connect(post_save_diferible, sender=modelo)
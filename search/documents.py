@@ -0,0 +1,175 @@
+"""
+Índice de búsqueda propio del sitio (tabla SearchDocument).
+
+Cada página publicada tiene un documento con el texto relevante según su tipo
+(iglesia: nombre/ciudad/provincia; noticia: título/intro; institucional: cuerpo),
+normalizado sin acentos para que "cordoba" encuentre "Córdoba" y "anelo"
+encuentre "Añelo". Las búsquedas son por prefijo de palabra ("neuq" → "Neuquén").
+"""
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Case, ExpressionWrapper, IntegerField, Q, Value, When
+from django.utils.html import strip_tags
+from wagtail.models import Page
+
+from search.models import SearchDocument
+
+_NO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+# Puntaje por término: coincidencia en título pesa más que en el texto
+PUNTAJE_TITULO_PALABRA = 4
+PUNTAJE_TITULO_PREFIJO = 3
+PUNTAJE_TEXTO_PALABRA = 2
+PUNTAJE_TEXTO_PREFIJO = 1
+
+# Tope de resultados por consulta (el buscador muestra 10 por página)
+MAX_RESULTADOS = 500
+
+
+def normalizar(texto) -> str:
+    """Minúsculas, sin acentos (ñ → n) y solo letras/dígitos separados por un espacio."""
+    if not texto:
+        return ""
+    nfd = unicodedata.normalize("NFD", str(texto).lower())
+    sin_acentos = "".join(c for c in nfd if unicodedata.category(c) != "Mn")
+    return _NO_ALFANUMERICO.sub(" ", sin_acentos).strip()
+
+
+def terminos(query) -> list[str]:
+    """Términos normalizados de una consulta, sin repetidos y en orden."""
+    return list(dict.fromkeys(normalizar(query).split()))
+
+
+def _texto_html(valor) -> str:
+    if not valor:
+        return ""
+    raw = getattr(valor, "source", None) or str(valor)
+    return strip_tags(raw)
+
+
+def _texto_stream(stream_value) -> str:
+    """Texto plano de un StreamField con BODY_BLOCKS (párrafos, títulos y listas)."""
+    partes = []
+    for block in stream_value or []:
+        if block.block_type == "paragraph":
+            partes.append(_texto_html(block.value))
+        elif block.block_type == "heading":
+            partes.append(str(block.value))
+        elif block.block_type == "list":
+            partes.extend(str(item) for item in block.value)
+    return " ".join(partes)
+
+
+def _campos_pagina(page) -> list[str]:
+    """Textos a indexar según el tipo de página (page debe ser la instancia específica)."""
+    from home.models import IglesiaPage, InstitutionalPage, NoticiaPage
+
+    if isinstance(page, IglesiaPage):
+        return [page.nombre, page.ciudad, page.provincia, page.direccion]
+    if isinstance(page, NoticiaPage):
+        return [_texto_html(page.intro), page.autor]
+    if isinstance(page, InstitutionalPage):
+        return [_texto_stream(page.body)]
+    return [page.search_description]
+
+
+def _con_bordes(texto: str) -> str:
+    """Espacio al inicio y al final para buscar ' term' (prefijo) y ' term ' (palabra)."""
+    return f" {texto} " if texto else ""
+
+
+def _documento(page):
+    """SearchDocument (sin guardar) de una página específica, o None si no se indexa."""
+    if page.depth <= 1 or not page.live:
+        return None
+    titulo = normalizar(page.title)
+    texto = normalizar(" ".join(filter(None, [page.title] + _campos_pagina(page))))
+    return SearchDocument(page_id=page.pk, titulo=_con_bordes(titulo)[:255], texto=_con_bordes(texto))
+
+
+def indexar_pagina(page):
+    """Crea o actualiza el documento de búsqueda de una página publicada."""
+    doc = _documento(page.specific)
+    if doc is None:
+        quitar_pagina(page.pk)
+        return None
+    doc, _ = SearchDocument.objects.update_or_create(
+        page_id=doc.page_id,
+        defaults={"titulo": doc.titulo, "texto": doc.texto},
+    )
+    return doc
+
+
+def indexar_paginas(page_ids, lote=200) -> int:
+    """
+    Reindexa varias páginas (las no publicadas o borradas se quitan del índice).
+    Por lote: una consulta por tipo de página, un DELETE y un INSERT. Devuelve cuántas indexó.
+    """
+    page_ids = sorted(set(page_ids))
+    n = 0
+    for i in range(0, len(page_ids), lote):
+        ids = page_ids[i : i + lote]
+        docs = [doc for page in Page.objects.filter(pk__in=ids).specific() if (doc := _documento(page))]
+        with transaction.atomic():
+            SearchDocument.objects.filter(page_id__in=ids).delete()
+            SearchDocument.objects.bulk_create(docs)
+        n += len(docs)
+    return n
+
+
+def quitar_pagina(page_id):
+    SearchDocument.objects.filter(page_id=page_id).delete()
+
+
+def reconstruir() -> int:
+    """Reconstruye el índice completo a partir de las páginas publicadas. Devuelve cuántas indexó."""
+    SearchDocument.objects.all().delete()
+    ids = Page.objects.live().filter(depth__gt=1).values_list("pk", flat=True)
+    return indexar_paginas(ids)
+
+
+def _puntaje(term):
+    """Puntaje de un término como expresión SQL (la coincidencia más fuerte gana)."""
+    return Case(
+        When(titulo__contains=f" {term} ", then=Value(PUNTAJE_TITULO_PALABRA)),
+        When(titulo__contains=f" {term}", then=Value(PUNTAJE_TITULO_PREFIJO)),
+        When(texto__contains=f" {term} ", then=Value(PUNTAJE_TEXTO_PALABRA)),
+        default=Value(PUNTAJE_TEXTO_PREFIJO),
+        output_field=IntegerField(),
+    )
+
+
+def buscar_ids(query, limite=MAX_RESULTADOS) -> list[int]:
+    """
+    IDs de páginas que contienen todos los términos (como prefijo de palabra),
+    ordenados por relevancia y luego por título, hasta `limite`. Una sola consulta SQL:
+    el puntaje, el orden y el LIMIT los resuelve la base y solo vuelven los IDs.
+
+    LIKE '% term%' no usa índices: recorre la tabla, que tiene una fila corta por
+    página publicada (miles, no millones).
+    """
+    terms = terminos(query)
+    if not terms:
+        return []
+    filtro = Q()
+    puntaje = Value(0)
+    for term in terms:
+        filtro &= Q(texto__contains=f" {term}")
+        puntaje = puntaje + _puntaje(term)
+    return list(
+        SearchDocument.objects.filter(filtro)
+        .annotate(puntaje=ExpressionWrapper(puntaje, output_field=IntegerField()))
+        .order_by("-puntaje", "titulo", "page_id")
+        .values_list("page_id", flat=True)[:limite]
+    )
+
+
+def cargar_paginas(page_ids) -> list:
+    """Páginas específicas para los IDs dados, en el mismo orden (una consulta por tipo)."""
+    page_ids = list(page_ids)
+    if not page_ids:
+        return []
+    by_id = {p.pk: p for p in Page.objects.filter(pk__in=page_ids).live().specific()}
+    return [by_id[pk] for pk in page_ids if pk in by_id]
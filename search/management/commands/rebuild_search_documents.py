@@ -0,0 +1,17 @@
+"""
+Reconstruye el índice de búsqueda propio (SearchDocument) desde las páginas publicadas.
+Ejecutar después de migrar o si el índice quedó desactualizado:
+
+  python manage.py rebuild_search_documents
+"""
+from django.core.management.base import BaseCommand
+
+from search.documents import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los documentos de búsqueda (SearchDocument) de todas las páginas publicadas."
+
+    def handle(self, *args, **options):
+        n = reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"Listo. {n} páginas indexadas."))
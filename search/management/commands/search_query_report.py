@@ -0,0 +1,49 @@
+"""
+Reporte de búsquedas: las más frecuentes y las que no devuelven resultados.
+Sirve para ver qué agregar al contenido o qué ajustar en el índice.
+
+  python manage.py search_query_report
+  python manage.py search_query_report --limit 50 --days 7
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from search import query_log
+from search.models import SearchQueryStat
+
+
+class Command(BaseCommand):
+    help = "Muestra las búsquedas más frecuentes y las que no tienen resultados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20, help="Cantidad de filas por lista (default 20).")
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=0,
+            help="Solo consultas vistas en los últimos N días (0 = todas).",
+        )
+
+    def handle(self, *args, **options):
+        # Lo que haya quedado en el buffer de este proceso (normalmente nada)
+        query_log.flush()
+        qs = SearchQueryStat.objects.all()
+        if options["days"]:
+            qs = qs.filter(last_seen__gte=timezone.now() - timedelta(days=options["days"]))
+        limit = options["limit"]
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Búsquedas más frecuentes"))
+        top = list(qs.order_by("-hits", "consulta")[:limit])
+        if not top:
+            self.stdout.write("  (sin datos)")
+        for stat in top:
+            self.stdout.write(f"  {stat.hits:>7}  {stat.consulta}  ({stat.ultimos_resultados} resultados)")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nBúsquedas sin resultados"))
+        vacias = list(qs.filter(sin_resultados__gt=0).order_by("-sin_resultados", "consulta")[:limit])
+        if not vacias:
+            self.stdout.write("  (ninguna)")
+        for stat in vacias:
+            self.stdout.write(self.style.WARNING(f"  {stat.sin_resultados:>7}  {stat.consulta}"))
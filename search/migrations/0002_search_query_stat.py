@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchQueryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('consulta', models.CharField(max_length=255, unique=True)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('sin_resultados', models.PositiveIntegerField(default=0)),
+                ('ultimos_resultados', models.PositiveIntegerField(default=0)),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Estadística de búsqueda',
+                'verbose_name_plural': 'Estadísticas de búsqueda',
+            },
+        ),
+    ]
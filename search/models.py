@@ -0,0 +1,45 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Documento de búsqueda desnormalizado: un registro por página publicada.
+    titulo y texto se guardan ya normalizados (sin acentos, minúsculas, palabras
+    separadas por un espacio y con espacio al inicio y al final) para poder buscar
+    prefijos de palabra con un simple LIKE '% term%'.
+    """
+    page = models.OneToOneField(
+        "wagtailcore.Page",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+",
+    )
+    titulo = models.CharField(max_length=255, blank=True)
+    texto = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Documento de búsqueda"
+        verbose_name_plural = "Documentos de búsqueda"
+
+    def __str__(self):
+        return self.titulo
+
+
+class SearchQueryStat(models.Model):
+    """
+    Estadística agregada por consulta normalizada (ver search.query_log).
+    sin_resultados cuenta las veces que la consulta no devolvió nada.
+    """
+    consulta = models.CharField(max_length=255, unique=True)
+    hits = models.PositiveIntegerField(default=0)
+    sin_resultados = models.PositiveIntegerField(default=0)
+    ultimos_resultados = models.PositiveIntegerField(default=0)
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Estadística de búsqueda"
+        verbose_name_plural = "Estadísticas de búsqueda"
+
+    def __str__(self):
+        return f"{self.consulta} ({self.hits})"
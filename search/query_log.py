@@ -0,0 +1,117 @@
+"""
+Registro de consultas del buscador sin escribir en la base dentro del request.
+
+record() solo suma en un buffer en memoria; un thread en segundo plano vuelca el
+buffer a SearchQueryStat cada SEARCH_QUERY_LOG_FLUSH_SECONDS (o antes si se
+acumulan muchas consultas distintas), con un UPDATE por consulta.
+"""
+import atexit
+import logging
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from search.models import SearchQueryStat
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SECONDS = getattr(settings, "SEARCH_QUERY_LOG_FLUSH_SECONDS", 30)
+# Con esta cantidad de consultas distintas en el buffer se vuelca sin esperar
+MAX_PENDIENTES = 200
+
+
+@dataclass
+class _Pendiente:
+    hits: int = 0
+    sin_resultados: int = 0
+    ultimos_resultados: int = 0
+
+
+_lock = threading.Lock()
+_buffer: dict[str, _Pendiente] = {}
+_despertar = threading.Event()
+_thread = None
+
+
+def record(consulta, n_resultados):
+    """Anota una búsqueda (consulta ya normalizada). No toca la base de datos."""
+    if not consulta or not getattr(settings, "SEARCH_QUERY_LOG_ENABLED", True):
+        return
+    consulta = consulta[:255]
+    with _lock:
+        pendiente = _buffer.setdefault(consulta, _Pendiente())
+        pendiente.hits += 1
+        if not n_resultados:
+            pendiente.sin_resultados += 1
+        pendiente.ultimos_resultados = n_resultados
+        lleno = len(_buffer) >= MAX_PENDIENTES
+    _asegurar_thread()
+    if lleno:
+        _despertar.set()
+
+
+def flush():
+    """Vuelca el buffer a SearchQueryStat. Devuelve cuántas consultas escribió."""
+    global _buffer
+    with _lock:
+        pendientes, _buffer = _buffer, {}
+    if not pendientes:
+        return 0
+    ahora = timezone.now()
+    for consulta, p in pendientes.items():
+        cambios = {
+            "hits": F("hits") + p.hits,
+            "sin_resultados": F("sin_resultados") + p.sin_resultados,
+            "ultimos_resultados": p.ultimos_resultados,
+            "last_seen": ahora,
+        }
+        if SearchQueryStat.objects.filter(consulta=consulta).update(**cambios):
+            continue
+        try:
+            with transaction.atomic():
+                SearchQueryStat.objects.create(
+                    consulta=consulta,
+                    hits=p.hits,
+                    sin_resultados=p.sin_resultados,
+                    ultimos_resultados=p.ultimos_resultados,
+                    last_seen=ahora,
+                )
+        except IntegrityError:
+            # Otro worker la creó entre el UPDATE y el INSERT
+            SearchQueryStat.objects.filter(consulta=consulta).update(**cambios)
+    return len(pendientes)
+
+
+def _loop():
+    while True:
+        _despertar.wait(FLUSH_SECONDS)
+        _despertar.clear()
+        try:
+            flush()
+        except Exception as e:
+            logger.warning("No se pudo guardar el log de búsquedas: %s", e)
+        finally:
+            connection.close()
+
+
+def _asegurar_thread():
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    with _lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_loop, name="search-query-log", daemon=True)
+        _thread.start()
+
+
+@atexit.register
+def _flush_al_salir():
+    try:
+        flush()
+    except Exception as e:
+        logger.warning("No se pudo guardar el log de búsquedas al salir: %s", e)
@@ -0,0 +1,66 @@
+"""
+Mantiene SearchDocument y el índice de autocompletar al día al publicar o despublicar páginas.
+Dentro de indexado_diferido() solo se anotan las páginas y se reindexan al final (search/diferido.py).
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from wagtail.models import Page
+from wagtail.signals import page_published, page_slug_changed, page_unpublished, post_page_move
+
+from home.models import IglesiaPage, NoticiaPage
+from search import suggest
+from search.diferido import pendientes
+from search.documents import indexar_pagina, quitar_pagina
+
+# Tipos de página que entran en el índice de autocompletar
+TIPOS_SUGERENCIAS = (IglesiaPage, NoticiaPage)
+
+
+def _diferir(sender, instance):
+    p = pendientes()
+    if p is None:
+        return False
+    p.paginas.add(instance.pk)
+    p.sugerencias = p.sugerencias or issubclass(sender, TIPOS_SUGERENCIAS)
+    return True
+
+
+def _invalidar_sugerencias():
+    p = pendientes()
+    if p is not None:
+        p.sugerencias = True
+    else:
+        suggest.invalidar()
+
+
+@receiver(page_published)
+def indexar_al_publicar(sender, instance, **kwargs):
+    if _diferir(sender, instance):
+        return
+    indexar_pagina(instance)
+    if issubclass(sender, TIPOS_SUGERENCIAS):
+        suggest.registrar_cambio(instance.pk)
+
+
+@receiver(page_unpublished)
+def quitar_al_despublicar(sender, instance, **kwargs):
+    if _diferir(sender, instance):
+        return
+    quitar_pagina(instance.pk)
+    if issubclass(sender, TIPOS_SUGERENCIAS):
+        suggest.registrar_cambio(instance.pk)
+
+
+# Las sugerencias guardan URLs: mover una página o cambiar un slug cambia las de toda
+# la rama, y una página borrada no puede seguir apareciendo
+@receiver(page_slug_changed)
+@receiver(post_page_move)
+def invalidar_sugerencias_urls(sender, instance, **kwargs):
+    _invalidar_sugerencias()
+
+
+@receiver(post_delete)
+def invalidar_sugerencias_pagina_borrada(sender, instance, **kwargs):
+    # Al borrar una rama, las iglesias y noticias pueden borrarse como Page base
+    if isinstance(instance, Page):
+        _invalidar_sugerencias()
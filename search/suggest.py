@@ -0,0 +1,258 @@
+"""
+Índice en memoria para autocompletar (/search/suggest/?q=...).
+
+Cubre iglesias (título, ciudad, provincia) y las noticias más recientes (título).
+Se arma una vez por proceso con dos consultas y después responde sin SQL:
+cada prefijo de palabra normalizado (ver search.documents.normalizar) apunta al
+conjunto de entradas que lo contienen.
+
+Cada proceso revisa cada MEMORY_TABLES_RECHECK_SECONDS, como la tabla de redirects:
+- al publicar o despublicar una iglesia o noticia, el page_id se anota en una lista
+  de cambios en la caché y cada proceso relee solo esas páginas;
+- al borrar o mover una página, o al cambiar un slug (cambian las URLs de toda la
+  rama), se cambia la versión "sugerencias" (home.cache_deps) y cada proceso lo
+  reconstruye.
+La lista se escribe con un lock corto (cache.add). Si no se consigue, o si la lista
+no corresponde a la versión actual (se llenó o la caché la desalojó), se cambia la
+versión: a lo sumo se reconstruye de más, nunca se pierde un cambio.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from wagtail.models import Site
+
+from home import cache_deps
+from home.urls_paginas import url_relativa
+from search.documents import normalizar
+
+# Cantidad de noticias recientes que entran en el índice
+NOTICIAS_RECIENTES = 300
+# Largo máximo de prefijo indexado (consultas más largas se filtran sobre el texto)
+MAX_PREFIJO = 12
+MAX_RESULTADOS = 10
+
+# Versión del índice (home.cache_deps): al cambiar, cada proceso lo rearma
+DEP_SUGERENCIAS = "sugerencias"
+
+# (versión, page_ids cambiados desde que se armó esa versión)
+CAMBIOS_CACHE_KEY = "sugerencias:cambios"
+CAMBIOS_LOCK_KEY = "sugerencias:cambios:lock"
+MAX_CAMBIOS = 200
+LOCK_SEGUNDOS = 5
+LOCK_INTENTOS = 20
+
+# Orden de los tipos en los resultados: primero iglesias (lo que más se busca)
+ORDEN_TIPO = {"iglesia": 0, "noticia": 1}
+
+
+@dataclass
+class Sugerencia:
+    page_id: int
+    tipo: str
+    titulo: str
+    detalle: str
+    url: str
+    texto: str = field(repr=False)
+
+    def as_dict(self):
+        return {"id": self.page_id, "tipo": self.tipo, "titulo": self.titulo, "detalle": self.detalle, "url": self.url}
+
+
+def _estado():
+    """La versión "sugerencias" y los page_id cambiados desde entonces."""
+    version = cache_deps.version(DEP_SUGERENCIAS)
+    cambios = cache.get(CAMBIOS_CACHE_KEY)
+    if not cambios or cambios[0] != version:
+        return version, ()
+    return version, cambios[1]
+
+
+class IndiceSugerencias:
+    """Prefijo de palabra → IDs de página. Seguro para usar desde varios threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lock_revision = threading.Lock()
+        self._entradas = {}
+        self._prefijos = {}
+        self._version = None
+        self._aplicados = 0  # cambios de la lista ya aplicados
+        self._chequeado = None  # time.monotonic() de la última revisión
+
+    def _agregar(self, entrada):
+        self._entradas[entrada.page_id] = entrada
+        for palabra in entrada.texto.split():
+            for n in range(1, min(len(palabra), MAX_PREFIJO) + 1):
+                self._prefijos.setdefault(palabra[:n], set()).add(entrada.page_id)
+
+    def _quitar(self, page_id):
+        entrada = self._entradas.pop(page_id, None)
+        if entrada is None:
+            return
+        for palabra in entrada.texto.split():
+            for n in range(1, min(len(palabra), MAX_PREFIJO) + 1):
+                ids = self._prefijos.get(palabra[:n])
+                if ids is not None:
+                    ids.discard(page_id)
+                    if not ids:
+                        del self._prefijos[palabra[:n]]
+
+    def reconstruir(self):
+        version, cambios = _estado()
+        entradas = _cargar_entradas()
+        with self._lock:
+            self._entradas = {}
+            self._prefijos = {}
+            for entrada in entradas:
+                self._agregar(entrada)
+            self._version = version
+            self._aplicados = len(cambios)
+        self._chequeado = time.monotonic()
+
+    def _actualizar(self, page_ids):
+        """Relee estas páginas: las que siguen publicadas se reemplazan, las demás se quitan."""
+        entradas = {e.page_id: e for e in _cargar_entradas(page_ids)}
+        with self._lock:
+            for page_id in page_ids:
+                self._quitar(page_id)
+                if page_id in entradas:
+                    self._agregar(entradas[page_id])
+
+    def vigente(self):
+        """Aplica los cambios o reconstruye si cambió la versión (revisado cada tanto)."""
+        ahora = time.monotonic()
+        if self._chequeado is not None and ahora - self._chequeado < settings.MEMORY_TABLES_RECHECK_SECONDS:
+            return self
+        with self._lock_revision:
+            if self._chequeado is not None and ahora - self._chequeado < settings.MEMORY_TABLES_RECHECK_SECONDS:
+                return self
+            version, cambios = _estado()
+            if version != self._version:
+                self.reconstruir()
+                return self
+            if len(cambios) > self._aplicados:
+                self._actualizar(set(cambios[self._aplicados :]))
+                self._aplicados = len(cambios)
+            self._chequeado = ahora
+        return self
+
+    def invalidar(self):
+        """Revisar la versión y los cambios en la próxima consulta."""
+        self._chequeado = None
+
+    def buscar(self, query, limit=MAX_RESULTADOS):
+        terms = normalizar(query).split()
+        if not terms:
+            return []
+        self.vigente()
+        with self._lock:
+            candidatos = None
+            for term in terms:
+                ids = self._prefijos.get(term[:MAX_PREFIJO], set())
+                candidatos = set(ids) if candidatos is None else candidatos & ids
+                if not candidatos:
+                    return []
+            entradas = [self._entradas[i] for i in candidatos]
+        largos = [t for t in terms if len(t) > MAX_PREFIJO]
+        if largos:
+            entradas = [
+                e for e in entradas
+                if all(f" {t}" in f" {e.texto}" for t in largos)
+            ]
+        entradas.sort(key=lambda e: (ORDEN_TIPO.get(e.tipo, 9), e.titulo.lower()))
+        return entradas[:limit]
+
+
+def _entrada_iglesia(page, root_paths):
+    detalle = ", ".join(filter(None, [page.ciudad, page.provincia]))
+    return Sugerencia(
+        page_id=page.pk,
+        tipo="iglesia",
+        titulo=page.title,
+        detalle=detalle,
+        url=url_relativa(page.url_path, root_paths),
+        texto=normalizar(" ".join(filter(None, [page.title, page.ciudad, page.provincia]))),
+    )
+
+
+def _entrada_noticia(page, root_paths):
+    return Sugerencia(
+        page_id=page.pk,
+        tipo="noticia",
+        titulo=page.title,
+        detalle=page.date.strftime("%d/%m/%Y") if page.date else "",
+        url=url_relativa(page.url_path, root_paths),
+        texto=normalizar(page.title),
+    )
+
+
+def _cargar_entradas(page_ids=None):
+    """Las entradas publicadas (o solo las de estos page_id: una noticia vieja también entra)."""
+    from home.models import IglesiaPage, NoticiaPage
+
+    root_paths = Site.get_site_root_paths()
+    iglesias = IglesiaPage.objects.live().only("title", "url_path", "ciudad", "provincia")
+    noticias = NoticiaPage.objects.live().only("title", "url_path", "date")
+    if page_ids is None:
+        noticias = noticias.order_by("-date")[:NOTICIAS_RECIENTES]
+    else:
+        iglesias = iglesias.filter(pk__in=page_ids)
+        noticias = noticias.filter(pk__in=page_ids)
+    entradas = [_entrada_iglesia(p, root_paths) for p in iglesias]
+    entradas += [_entrada_noticia(p, root_paths) for p in noticias]
+    return entradas
+
+
+indice = IndiceSugerencias()
+
+
+def sugerir(query, limit=MAX_RESULTADOS):
+    return indice.buscar(query, limit=limit)
+
+
+@contextmanager
+def _lock_cambios():
+    """Lock entre procesos para escribir la lista de cambios; da False si no se consiguió."""
+    for _ in range(LOCK_INTENTOS):
+        if cache.add(CAMBIOS_LOCK_KEY, True, LOCK_SEGUNDOS):
+            try:
+                yield True
+            finally:
+                cache.delete(CAMBIOS_LOCK_KEY)
+            return
+        time.sleep(0.05)
+    yield False
+
+
+def _anotar(page_id):
+    with _lock_cambios() as tomado:
+        if not tomado:
+            return False
+        version = cache_deps.version(DEP_SUGERENCIAS)
+        cambios = cache.get(CAMBIOS_CACHE_KEY)
+        if not cambios or cambios[0] != version or len(cambios[1]) >= MAX_CAMBIOS:
+            return False
+        cache.set(CAMBIOS_CACHE_KEY, (version, cambios[1] + (page_id,)), None)
+        return True
+
+
+def registrar_cambio(page_id):
+    """Se publicó o despublicó una página del índice: cada proceso relee solo esa."""
+    if _anotar(page_id):
+        indice.invalidar()
+    else:
+        invalidar()
+
+
+def invalidar():
+    """Que todos los procesos (este incluido) reconstruyan el índice en la próxima consulta."""
+    with _lock_cambios() as tomado:
+        cache_deps.bump(DEP_SUGERENCIAS)
+        if tomado:
+            # Lista nueva, vacía, para la versión nueva
+            cache.set(CAMBIOS_CACHE_KEY, (cache_deps.version(DEP_SUGERENCIAS), ()), None)
+    indice.invalidar()
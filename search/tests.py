@@ -0,0 +1,185 @@
+from unittest import mock
+
+from home import redirects
+from home.models import HomePage, IglesiaPage, IglesiasIndexPage
+
+from wagtail.models import Page, Site
+from wagtail.test.utils import WagtailPageTestCase
+
+from search import query_log, suggest
+from search.diferido import indexado_diferido
+from search.documents import buscar_ids, normalizar
+from search.models import SearchQueryStat
+from search.suggest import IndiceSugerencias, indice
+
+
+class SearchDocumentTests(WagtailPageTestCase):
+    """
+    Tests for the denormalized search index (SearchDocument).
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        self.homepage = HomePage(title="Home")
+        root_page.add_child(instance=self.homepage)
+        Site.objects.create(hostname="testsite", root_page=self.homepage, is_default_site=True)
+        self.index = IglesiasIndexPage(title="Iglesias", slug="iglesias")
+        self.homepage.add_child(instance=self.index)
+        self.iglesia = IglesiaPage(title="Iglesia Central", ciudad="Añelo", provincia="Neuquén")
+        self.index.add_child(instance=self.iglesia)
+        self.iglesia.save_revision().publish()
+
+    def test_normalizar(self):
+        self.assertEqual(normalizar("  Río Negro, Añelo! "), "rio negro anelo")
+
+    def test_accent_insensitive_prefix_search(self):
+        self.assertEqual(buscar_ids("anelo"), [self.iglesia.pk])
+        self.assertEqual(buscar_ids("NEUQ"), [self.iglesia.pk])
+        self.assertEqual(buscar_ids("neuquen cordoba"), [])
+
+    def test_title_matches_rank_first_and_results_are_limited(self):
+        otra = IglesiaPage(title="Iglesia de Añelo", ciudad="Cutral Có")
+        self.index.add_child(instance=otra)
+        otra.save_revision().publish()
+        self.assertEqual(buscar_ids("anelo"), [otra.pk, self.iglesia.pk])
+        self.assertEqual(buscar_ids("iglesia", limite=1), [self.iglesia.pk])  # empate: por título
+
+    def test_unpublish_removes_document(self):
+        self.iglesia.unpublish()
+        self.assertEqual(buscar_ids("anelo"), [])
+
+    def test_search_view_renders_results(self):
+        response = self.client.get("/search/", {"query": "central"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.pk for p in response.context["search_results"]], [self.iglesia.pk])
+
+    def test_query_log_groups_normalized_queries(self):
+        query_log.flush()  # descartar lo que hayan dejado otros tests
+        SearchQueryStat.objects.all().delete()
+        self.client.get("/search/", {"query": "Añelo"})
+        self.client.get("/search/", {"query": " anelo "})
+        self.client.get("/search/", {"query": "zzz"})
+        query_log.flush()
+        self.assertEqual(SearchQueryStat.objects.get(consulta="anelo").hits, 2)
+        self.assertEqual(SearchQueryStat.objects.get(consulta="anelo").sin_resultados, 0)
+        self.assertEqual(SearchQueryStat.objects.get(consulta="zzz").sin_resultados, 1)
+
+    def test_cached_results_invalidated_on_publish(self):
+        self.client.get("/search/", {"query": "anelo"})
+        otra = IglesiaPage(title="Iglesia Sur", ciudad="Añelo")
+        self.index.add_child(instance=otra)
+        otra.save_revision().publish()
+        response = self.client.get("/search/", {"query": "anelo"})
+        self.assertEqual(len(response.context["search_results"]), 2)
+
+
+class SuggestTests(WagtailPageTestCase):
+    """
+    Tests for the in-memory typeahead index.
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        homepage = HomePage(title="Home")
+        root_page.add_child(instance=homepage)
+        Site.objects.create(hostname="testsite", root_page=homepage, is_default_site=True)
+        self.index = IglesiasIndexPage(title="Iglesias", slug="iglesias")
+        homepage.add_child(instance=self.index)
+        self.iglesia = IglesiaPage(title="Iglesia Central", ciudad="Cipolletti", provincia="Río Negro")
+        self.index.add_child(instance=self.iglesia)
+        self.iglesia.save_revision().publish()
+        indice.reconstruir()
+        # Como en producción, la tabla de redirects ya está armada (gunicorn when_ready)
+        redirects.tabla.vigente()
+
+    def test_suggest_without_sql(self):
+        with self.assertNumQueries(0):
+            response = self.client.get("/search/suggest/", {"q": "rio neg"})
+        results = response.json()["results"]
+        self.assertEqual([r["id"] for r in results], [self.iglesia.pk])
+        self.assertEqual(results[0]["url"], "/iglesias/iglesia-central/")
+
+    def test_publish_updates_index(self):
+        nueva = IglesiaPage(title="Iglesia Norte", ciudad="Cipolletti")
+        self.index.add_child(instance=nueva)
+        nueva.save_revision().publish()
+        self.assertEqual({s.page_id for s in indice.buscar("cipo")}, {self.iglesia.pk, nueva.pk})
+        nueva.unpublish()
+        self.assertEqual([s.page_id for s in indice.buscar("cipo")], [self.iglesia.pk])
+
+    def test_other_workers_reload_only_the_changed_page(self):
+        otro = IndiceSugerencias()  # el índice de otro worker
+        otro.reconstruir()
+        nueva = IglesiaPage(title="Iglesia Norte", ciudad="Cipolletti")
+        self.index.add_child(instance=nueva)
+        version = suggest._estado()[0]
+        nueva.save_revision().publish()
+        self.assertEqual(suggest._estado(), (version, (nueva.pk,)))
+        with mock.patch.object(suggest, "_cargar_entradas", wraps=suggest._cargar_entradas) as cargar:
+            # Dentro de MEMORY_TABLES_RECHECK_SECONDS no revisa la caché
+            self.assertEqual([s.page_id for s in otro.buscar("cipo")], [self.iglesia.pk])
+            otro.invalidar()  # como si hubiera pasado el intervalo
+            self.assertEqual({s.page_id for s in otro.buscar("cipo")}, {self.iglesia.pk, nueva.pk})
+        cargar.assert_called_once_with({nueva.pk})
+
+    def test_change_list_falls_back_to_rebuild(self):
+        nueva = IglesiaPage(title="Iglesia Norte", ciudad="Cipolletti")
+        self.index.add_child(instance=nueva)
+        version = suggest._estado()[0]
+        with mock.patch.object(suggest, "LOCK_INTENTOS", 0):
+            nueva.save_revision().publish()
+        # Sin el lock no se anota: cambia la versión y todos reconstruyen
+        self.assertNotEqual(suggest._estado()[0], version)
+        self.assertEqual({s.page_id for s in indice.buscar("cipo")}, {self.iglesia.pk, nueva.pk})
+
+    def test_slug_change_and_delete_update_urls(self):
+        with self.captureOnCommitCallbacks(execute=True):  # page_slug_changed va en on_commit
+            self.index.slug = "templos"
+            self.index.save_revision().publish()
+        self.assertEqual([s.url for s in indice.buscar("cipo")], ["/templos/iglesia-central/"])
+        self.iglesia.delete()
+        self.assertEqual(indice.buscar("cipo"), [])
+
+
+class DeferredIndexTests(WagtailPageTestCase):
+    """
+    Tests for deferred, batched search indexing (search.diferido).
+    """
+
+    def setUp(self):
+        root_page = Page.get_first_root_node()
+        self.homepage = HomePage(title="Home")
+        root_page.add_child(instance=self.homepage)
+        Site.objects.create(hostname="testsite", root_page=self.homepage, is_default_site=True)
+        self.index = IglesiasIndexPage(title="Iglesias", slug="iglesias")
+        self.homepage.add_child(instance=self.index)
+
+    def test_publishes_indexed_together_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with indexado_diferido():
+                iglesias = []
+                for n in range(3):
+                    iglesia = IglesiaPage(title=f"Iglesia {n}", ciudad="Trelew")
+                    self.index.add_child(instance=iglesia)
+                    iglesia.save_revision().publish()
+                    iglesias.append(iglesia)
+                self.assertEqual(buscar_ids("trelew"), [])
+                self.assertEqual(len(IglesiaPage.objects.search("Iglesia")), 0)
+            # Dentro de la transacción del test: espera al commit
+            self.assertEqual(buscar_ids("trelew"), [])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(sorted(buscar_ids("trelew")), sorted(p.pk for p in iglesias))
+        self.assertEqual(len(IglesiaPage.objects.search("Iglesia")), 3)
+
+    def test_unpublish_and_nested_blocks(self):
+        iglesia = IglesiaPage(title="Iglesia Norte", ciudad="Trelew")
+        self.index.add_child(instance=iglesia)
+        iglesia.save_revision().publish()
+        self.assertEqual(buscar_ids("trelew"), [iglesia.pk])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with indexado_diferido():
+                with indexado_diferido():
+                    iglesia.unpublish()
+                self.assertEqual(buscar_ids("trelew"), [iglesia.pk])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(buscar_ids("trelew"), [])
@@ -1,40 +1,57 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import JsonResponse
 from django.template.response import TemplateResponse
+from django.views.decorators.http import require_GET
+
+from home import cache_deps
+from home.signals import DEP_PAGINAS
+from search import query_log
+from search.documents import buscar_ids, cargar_paginas, terminos
+from search.suggest import MAX_RESULTADOS, sugerir
 
-from wagtail.models import Page
+# Segundos que se guardan los IDs de resultados de una consulta (se invalidan al publicar)
+SEARCH_RESULTS_CACHE_SECONDS = getattr(settings, "SEARCH_RESULTS_CACHE_SECONDS", 300)
 
-# To enable logging of search queries for use with the "Promoted search results" module
-# <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
-# uncomment the following line and the lines indicated in the search function
-# (after adding wagtail.contrib.search_promotions to INSTALLED_APPS):
 
-# from wagtail.contrib.search_promotions.models import Query
+def _buscar_cacheado(consulta):
+    """IDs de resultados para una consulta normalizada, cacheados hasta el próximo publish."""
+    digest = hashlib.md5(consulta.encode("utf-8")).hexdigest()
+    key = f"search:results:{cache_deps.version(DEP_PAGINAS)}:{digest}"
+    result_ids = cache.get(key)
+    if result_ids is None:
+        result_ids = buscar_ids(consulta)
+        cache.set(key, result_ids, SEARCH_RESULTS_CACHE_SECONDS)
+    return result_ids
 
 
 def search(request):
     search_query = request.GET.get("query", None)
     page = request.GET.get("page", 1)
 
-    # Search
-    if search_query:
-        search_results = Page.objects.live().search(search_query)
-
-        # To log this query for use with the "Promoted search results" module:
-
-        # query = Query.get(search_query)
-        # query.add_hit()
-
+    # Search: índice propio (search.documents); devuelve IDs ya ordenados por relevancia.
+    # "Neuquén", "neuquen " y "NEUQUEN" comparten la misma clave normalizada.
+    consulta = " ".join(terminos(search_query))
+    if consulta:
+        result_ids = _buscar_cacheado(consulta)
+        # Se cuenta una vez por búsqueda (no por cada página de resultados)
+        if str(page) == "1":
+            query_log.record(consulta, len(result_ids))
     else:
-        search_results = Page.objects.none()
+        result_ids = []
 
-    # Pagination
-    paginator = Paginator(search_results, 10)
+    # Pagination: sobre la lista de IDs (sin COUNT aparte); solo se cargan las páginas visibles
+    paginator = Paginator(result_ids, 10)
     try:
         search_results = paginator.page(page)
     except PageNotAnInteger:
         search_results = paginator.page(1)
     except EmptyPage:
         search_results = paginator.page(paginator.num_pages)
+    search_results.object_list = cargar_paginas(search_results.object_list)
 
     return TemplateResponse(
         request,
@@ -44,3 +61,17 @@ def search(request):
             "search_results": search_results,
         },
     )
+
+
+@require_GET
+def suggest(request):
+    """Autocompletar: /search/suggest/?q=neuq → JSON con iglesias y noticias (sin SQL)."""
+    query = (request.GET.get("q") or "").strip()
+    try:
+        limit = min(int(request.GET.get("limit", MAX_RESULTADOS)), MAX_RESULTADOS)
+    except ValueError:
+        limit = MAX_RESULTADOS
+    results = [s.as_dict() for s in sugerir(query, limit=max(limit, 1))] if query else []
+    response = JsonResponse({"query": query, "results": results})
+    response["Cache-Control"] = "public, max-age=60"
+    return response
@@ -4,8 +4,9 @@
 # Si ./start.sh falla, probar: bash start.sh
 
 cd "$(dirname "$0")"
-export DJANGO_SETTINGS_MODULE=impa_site.settings.production
+export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:-impa_site.settings.production}"
 export PORT="${PORT:-5010}"
 
 source impa/bin/activate
-exec gunicorn impa_site.wsgi:application --bind "0.0.0.0:$PORT" --workers 2 --threads 2
+# Workers, threads, reciclado y timeouts: gunicorn.conf.py (se ajustan con GUNICORN_* en .env)
+exec gunicorn -c gunicorn.conf.py